@@ -0,0 +1,102 @@
+"""
+Bandwidth and latency trade-off of body compression.
+
+Compresses typical large payloads (a batch of cleaned addresses, a wide
+`findAffiliated` response, an autocomplete response with count=20) with each
+available codec and estimates total time at given link speeds:
+compression time + transfer time + decompression time.
+Synthetic payloads are more repetitive than real data, so real ratios are lower.
+
+Usage: uv run python benchmarks/compression.py [--mbps 1 10 100]
+"""
+
+import argparse
+import gzip
+import json
+import time
+from dadata import compression
+
+
+def address(index: int) -> dict:
+    return {
+        "source": f"мск сухонская {index} {index % 90}",
+        "result": f"г Москва, ул Сухонская, д {index}, кв {index % 90}",
+        "postal_code": "127642",
+        "country": "Россия",
+        "region": "Москва",
+        "city_area": "Северо-восточный",
+        "city_district": "Северное Медведково",
+        "street": "Сухонская",
+        "house": str(index),
+        "flat": str(index % 90),
+        "fias_id": f"5ee84ac0-eb9a-4b42-b814-{index:012d}",
+        "timezone": "UTC+3",
+        "geo_lat": f"55.87{index:05d}",
+        "geo_lon": f"37.65{index:05d}",
+        "qc_geo": 0,
+        "qc": 0,
+    }
+
+
+def party(index: int) -> dict:
+    return {
+        "value": f"ООО РОМАШКА-{index}",
+        "unrestricted_value": f'ОБЩЕСТВО С ОГРАНИЧЕННОЙ ОТВЕТСТВЕННОСТЬЮ "РОМАШКА-{index}"',
+        "data": {
+            "inn": f"77{index:08d}",
+            "kpp": "770401001",
+            "ogrn": f"10277{index:08d}",
+            "type": "LEGAL",
+            "state": {"status": "ACTIVE", "registration_date": 1029456000000},
+            "address": {"value": f"г Москва, ул Льва Толстого, д {index % 30}"},
+            "management": {"name": "Иванов Иван Иванович", "post": "ГЕНЕРАЛЬНЫЙ ДИРЕКТОР"},
+            "okved": "62.01",
+        },
+    }
+
+
+PAYLOADS = {
+    "clean batch (100)": [address(i) for i in range(100)],
+    "findAffiliated (300)": {"suggestions": [party(i) for i in range(300)]},
+    "suggest (20)": {"suggestions": [party(i) for i in range(20)]},
+}
+
+DECODERS = {"gzip": gzip.decompress}
+if compression.brotli is not None:
+    DECODERS["br"] = compression.brotli.decompress
+if compression.zstandard is not None:
+    DECODERS["zstd"] = compression.zstandard.ZstdDecompressor().decompress
+
+
+def measure(func, arg, repeat: int = 20) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(arg)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mbps", type=float, nargs="+", default=[1, 10, 100])
+    args = parser.parse_args()
+    header = f"{'payload':<22}{'codec':<10}{'bytes':>10}{'ratio':>8}{'cpu ms':>9}"
+    header += "".join(f"{f'@{mbps:g}Mbit ms':>14}" for mbps in args.mbps)
+    print(header)
+    for title, data in PAYLOADS.items():
+        raw = json.dumps(data, ensure_ascii=False).encode()
+        rows = [("identity", raw, 0.0)]
+        for codec, encode in compression.ENCODERS.items():
+            body = encode(raw)
+            cpu = measure(encode, raw) + measure(DECODERS[codec], body)
+            rows.append((codec, body, cpu))
+        for codec, body, cpu in rows:
+            line = f"{title:<22}{codec:<10}{len(body):>10}{len(raw) / len(body):>8.1f}"
+            line += f"{cpu * 1000:>9.2f}"
+            for mbps in args.mbps:
+                total = cpu + len(body) * 8 / (mbps * 1_000_000)
+                line += f"{total * 1000:>14.1f}"
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
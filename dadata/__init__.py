@@ -4,5 +4,6 @@ Data cleansing and enrichment via Dadata API.
 
 from dadata.sync import DadataClient as Dadata
 from dadata.asynchr import DadataClient as DadataAsync
+from dadata.background import DadataClient as DadataBackground
 
-__all__ = ["Dadata", "DadataAsync"]
+__all__ = ["Dadata", "DadataAsync", "DadataBackground"]
@@ -0,0 +1,188 @@
+"""
+Adaptive concurrency of bulk calls.
+"""
+
+import asyncio
+import contextlib
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from dadata import settings
+
+# responses that say the API is overloaded
+OVERLOAD_STATUSES = {429, 500, 502, 503, 504}
+
+_bulk: ContextVar[bool] = ContextVar("dadata_bulk", default=False)
+
+
+@contextlib.contextmanager
+def bulk_calls() -> Iterator[None]:
+    """Mark requests made within the block as part of a bulk call, subject to adaptive limits."""
+    token = _bulk.set(True)
+    try:
+        yield
+    finally:
+        _bulk.reset(token)
+
+
+def in_bulk_call() -> bool:
+    """Whether requests of the current context are part of a bulk call."""
+    return _bulk.get()
+
+
+class AdaptiveLimit:
+    """Limit of requests in flight to a single API host, adjusted by AIMD.
+
+    Each call that completes within `tolerance` times the baseline (lowest recent) latency
+    raises the limit by one per limit's worth of calls. A slower call, a timeout
+    or an overload response cuts the limit by `backoff`, at most once per round trip.
+    """
+
+    def __init__(
+        self,
+        initial: int = settings.BULK_CONCURRENCY,
+        min_limit: int = 1,
+        max_limit: int = settings.ADAPTIVE_MAX_CONCURRENCY,
+        backoff: float = 0.7,
+        tolerance: float = 2.0,
+        on_change: Optional[Callable[[int], None]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.tolerance = tolerance
+        self.inflight = 0
+        self.baseline: Optional[float] = None
+        self._limit = float(min(max(initial, min_limit), max_limit))
+        self._hold_until = 0.0
+        self._on_change = on_change
+        self._clock = clock
+        self._ready = threading.Condition()
+        # coroutines waiting for a slot, with event loops they run in
+        self._async_waiters: List[Tuple[asyncio.AbstractEventLoop, "asyncio.Future[Any]"]] = []
+
+    @property
+    def limit(self) -> int:
+        """Current number of requests allowed in flight."""
+        return int(self._limit)
+
+    def try_acquire(self) -> bool:
+        """Take a slot if one is free."""
+        with self._ready:
+            if self.inflight >= self.limit:
+                return False
+            self.inflight += 1
+            return True
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Wait for a free slot and take it. Return False on timeout."""
+        with self._ready:
+            if not self._ready.wait_for(lambda: self.inflight < self.limit, timeout):
+                return False
+            self.inflight += 1
+            return True
+
+    async def acquire_async(self):
+        """Wait for a free slot and take it, from a coroutine of any event loop."""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._ready:
+                if self.inflight < self.limit:
+                    self.inflight += 1
+                    return
+                waiter = (loop, loop.create_future())
+                self._async_waiters.append(waiter)
+            try:
+                await waiter[1]
+            finally:
+                with self._ready:
+                    if waiter in self._async_waiters:
+                        self._async_waiters.remove(waiter)
+
+    def release(self, latency: float, overload: bool = False):
+        """Free a slot, adjusting the limit by how the call went."""
+        with self._ready:
+            self.inflight -= 1
+            before = self.limit
+            now = self._clock()
+            slow = self.baseline is not None and latency > self.tolerance * self.baseline
+            if overload or slow:
+                if now >= self._hold_until:
+                    self._limit = max(float(self.min_limit), self._limit * self.backoff)
+                    self._hold_until = now + latency
+            else:
+                self._limit = min(float(self.max_limit), self._limit + 1 / self._limit)
+            if not overload:
+                # lowest latency seen, slowly forgetting it so that it follows lasting changes
+                if self.baseline is None or latency < self.baseline:
+                    self.baseline = latency
+                else:
+                    self.baseline += (latency - self.baseline) * 0.01
+            self._ready.notify_all()
+            waiters, self._async_waiters = self._async_waiters, []
+            changed = self.limit != before
+        for loop, future in waiters:
+            try:
+                loop.call_soon_threadsafe(_wake, future)
+            except RuntimeError:
+                # event loop of the waiter is closed
+                pass
+        if changed and self._on_change is not None:
+            self._on_change(self.limit)
+
+
+def _wake(future: "asyncio.Future[Any]"):
+    """Resume coroutine waiting on `future`, unless it gave up already."""
+    if not future.done():
+        future.set_result(None)
+
+
+class AdaptiveConcurrency:
+    """Adaptive in-flight limits for bulk calls, one per API host.
+
+    With it, bulk methods ignore their fixed `concurrency` and keep as many requests
+    in flight as the host handles without slowing down or returning 429 and 5xx.
+    Current limits are in `limits`, and `on_change(host, limit)` is called whenever
+    one changes (e.g. to export it as a metric).
+    """
+
+    def __init__(
+        self,
+        initial: int = settings.BULK_CONCURRENCY,
+        min_limit: int = 1,
+        max_limit: int = settings.ADAPTIVE_MAX_CONCURRENCY,
+        backoff: float = 0.7,
+        tolerance: float = 2.0,
+        on_change: Optional[Callable[[str, int], None]] = None,
+    ):
+        self.initial = initial
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.tolerance = tolerance
+        self.on_change = on_change
+        self._hosts: Dict[str, AdaptiveLimit] = {}
+        self._lock = threading.Lock()
+
+    def host(self, host: str) -> AdaptiveLimit:
+        """Limit for API `host`."""
+        with self._lock:
+            if host not in self._hosts:
+                on_change = self.on_change
+                self._hosts[host] = AdaptiveLimit(
+                    initial=self.initial,
+                    min_limit=self.min_limit,
+                    max_limit=self.max_limit,
+                    backoff=self.backoff,
+                    tolerance=self.tolerance,
+                    on_change=None if on_change is None else lambda limit: on_change(host, limit),
+                )
+            return self._hosts[host]
+
+    @property
+    def limits(self) -> Dict[str, int]:
+        """Current in-flight limit by API host."""
+        with self._lock:
+            return {host: limit.limit for host, limit in self._hosts.items()}
@@ -2,30 +2,82 @@
 Asynchronous Dadata API client.
 """
 
+import asyncio
+import contextlib
+import contextvars
 import datetime as dt
-from typing import Dict, List, Optional
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Set, Tuple, Union
 import httpx
-from dadata import settings
+from dadata import bulk, deadlines, settings, tracing
+from dadata.adaptive import OVERLOAD_STATUSES, AdaptiveConcurrency, bulk_calls, in_bulk_call
+from dadata.budget import Budget, BudgetExhausted
+from dadata import compression as codecs
+from dadata.cache import GeoCache, IPCache, ResponseCache, SuggestionCache, nearest
+from dadata.keys import KEY_ERRORS, KeyPool, retry_after
+from dadata.normalize import DEFAULT_NORMALIZER, Normalizer
+from dadata.prefetch import Prefetch
+from dadata.scheduling import BATCH, Scheduler, priority
+from dadata.stream import ItemStream
+from dadata.versions import VersionTracker
+
+# keep idle connections longer than httpx does by default
+LIMITS = httpx.Limits(
+    max_connections=100,
+    max_keepalive_connections=20,
+    keepalive_expiry=settings.KEEPALIVE_EXPIRY_SEC,
+)
 
 
 class ClientBase:
     """Base class for API client"""
 
+    SERVICE = ""
+
     def __init__(
         self,
         base_url: str,
-        token: str,
+        token: Union[str, KeyPool],
         secret: Optional[str] = None,
         timeout: int = settings.TIMEOUT_SEC,
+        budget: Optional[Budget] = None,
+        compression: Optional[str] = None,
+        scheduler: Optional[Scheduler] = None,
+        adaptive: Optional[AdaptiveConcurrency] = None,
+        profile_url: Optional[str] = None,
     ):
-        headers = {
-            "Content-type": "application/json",
-            "Accept": "application/json",
-            "Authorization": f"Token {token}",
-        }
-        if secret:
-            headers["X-Secret"] = secret
-        self._client = httpx.AsyncClient(base_url=base_url, headers=headers, timeout=timeout)
+        if compression and compression not in codecs.ENCODERS:
+            raise ValueError(f"Unsupported compression: {compression}")
+        self.budget = budget
+        self.adaptive = adaptive
+        # Profile API base URL for budget polls, e.g. behind a gateway
+        self.profile_url = profile_url
+        self.compression = compression
+        self.compress_above = settings.COMPRESS_MIN_BYTES
+        self.scheduler = scheduler
+        self.keys = token if isinstance(token, KeyPool) else None
+        # shared rate limit: any object with acquire() returning seconds to wait
+        self.limiter: Any = None
+        # traffic recorder: any object with record() (see `dadata.replay.Recorder`)
+        self.recorder: Any = None
+        self._keepalive: Optional[asyncio.Task] = None
+        credentials = self.keys.credentials() if self.keys else [(token, secret)]
+        self._clients = []
+        for key_token, key_secret in credentials:
+            headers = {
+                "Content-type": "application/json",
+                "Accept": "application/json",
+                "Accept-Encoding": codecs.accept_encoding(),
+                "Authorization": f"Token {key_token}",
+            }
+            if key_secret:
+                headers["X-Secret"] = key_secret
+            self._clients.append(
+                httpx.AsyncClient(
+                    base_url=base_url, headers=headers, timeout=timeout, limits=LIMITS
+                )
+            )
+        self._client = self._clients[0]
 
     async def __aenter__(self) -> "ClientBase":
         return self
@@ -35,40 +87,320 @@ class ClientBase:
 
     async def close(self):
         """Close network connections"""
-        await self._client.aclose()
+        if self._keepalive is not None:
+            self._keepalive.cancel()
+            self._keepalive = None
+        for client in self._clients:
+            await client.aclose()
+
+    async def warmup(self, connections: int = 1):
+        """Open `connections` connections to the API host ahead of time."""
+        await asyncio.gather(
+            *(self._ping(client) for client in self._clients for _ in range(connections))
+        )
+
+    async def keepalive(self, interval: float = settings.KEEPALIVE_SEC, connections: int = 1):
+        """Keep `connections` connections open, refreshing them every `interval` seconds."""
+        if self._keepalive is not None:
+            self._keepalive.cancel()
+
+        async def run():
+            while True:
+                await asyncio.sleep(interval)
+                await self.warmup(connections)
+
+        self._keepalive = asyncio.get_running_loop().create_task(run())
+
+    async def _ping(self, client):
+        """Lightweight request that sets up or refreshes a connection"""
+        try:
+            await client.head("")
+        except httpx.HTTPError:
+            pass
 
     async def _get(self, url, data):
         """GET request to Dadata API"""
-        response = await self._client.get(url, params=data)
-        response.raise_for_status()
-        return response.json()
+        return await self._request("GET", url, params=data)
+
+    def _workers(self, concurrency: int) -> int:
+        """Bulk requests at a time: `concurrency`, or enough for the highest adaptive limit"""
+        return concurrency if self.adaptive is None else self.adaptive.max_limit
+
+    async def _poll(self, budget: Budget):
+        """Update budget with balance and daily stats, keeping last known values on errors"""
+        profile_url = self.profile_url or ProfileClient.BASE_URL
+        try:
+            balance = await self._get(profile_url + "profile/balance", data={})
+            stats = await self._get(profile_url + "stat/daily", data={})
+        except httpx.HTTPError:
+            # a transient Profile API error should not stop a bulk job, poll again later
+            return
+        budget.update(balance["balance"], stats)
+
+    async def _throttle(self):
+        """Wait until the bulk budget allows another call"""
+        budget = self.budget
+        if budget is None:
+            return
+        while True:
+            if budget.claim_poll():
+                await self._poll(budget)
+            delay = budget.delay(self.SERVICE)
+            if delay is None:
+                if not budget.wait:
+                    raise BudgetExhausted(f"{self.SERVICE} budget is exhausted")
+                deadlines.check(budget.poll_interval)
+                await asyncio.sleep(budget.poll_interval)
+                continue
+            if delay:
+                deadlines.check(delay)
+                await asyncio.sleep(delay)
+            budget.record(self.SERVICE)
+            return
 
     async def _post(self, url, data):
         """POST request to Dadata API"""
-        response = await self._client.post(url, json=data)
+        return await self._request("POST", url, json=data)
+
+    async def _post_stream(self, url, data, key: Optional[str] = None) -> AsyncIterator[Any]:
+        """POST request to Dadata API, yielding items of the `key` array as they arrive"""
+        async with contextlib.AsyncExitStack() as stack:
+            if self.scheduler is not None:
+                await stack.enter_async_context(self.scheduler.slot())
+            response = await self._call("POST", url, stream=True, **self._encode({"json": data}))
+            stack.push_async_callback(response.aclose)
+            parser = ItemStream(key)
+            async for chunk in response.aiter_bytes():
+                for item in parser.feed(chunk):
+                    yield item
+            parser.close()
+
+    def _encode(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """Encode JSON body of request arguments, compressed if enabled"""
+        if "json" not in kwargs:
+            return kwargs
+        kwargs = dict(kwargs)
+        data = kwargs.pop("json")
+        if not self.compression:
+            kwargs["content"] = codecs.encode_json(data)
+            return kwargs
+        kwargs["content"], kwargs["headers"] = codecs.compress(
+            data, self.compression, self.compress_above
+        )
+        return kwargs
+
+    async def _request(self, method, url, **kwargs):
+        """Request to Dadata API, recording it if a recorder is attached"""
+        recorder = self.recorder
+        if recorder is None:
+            return await self._traced(method, url, **kwargs)
+        start = time.perf_counter()
+        try:
+            result = await self._traced(method, url, **kwargs)
+        except httpx.HTTPStatusError as exc:
+            elapsed = time.perf_counter() - start
+            recorder.record(
+                self.SERVICE, method, url, kwargs, exc.response.status_code, None, elapsed
+            )
+            raise
+        recorder.record(self.SERVICE, method, url, kwargs, 200, result, time.perf_counter() - start)
+        return result
+
+    async def _traced(self, method, url, **kwargs):
+        """Request to Dadata API, timing its phases if tracing is on"""
+        timing = tracing.start(method, url)
+        if timing is None:
+            response = await self._scheduled(method, url, **self._encode(kwargs))
+            return response.json()
+        status_code = None
+        try:
+            with timing.phase("encode"):
+                kwargs = self._encode(kwargs)
+            response = await self._scheduled(method, url, trace=timing.atrace, **kwargs)
+            status_code = response.status_code
+            with timing.phase("decode"):
+                return response.json()
+        except httpx.HTTPStatusError as exc:
+            status_code = exc.response.status_code
+            raise
+        finally:
+            timing.finish(status_code)
+
+    async def _scheduled(self, method, url, **kwargs) -> httpx.Response:
+        """Request to Dadata API, once the scheduler gives a slot"""
+        if self.scheduler is None:
+            return await self._call(method, url, **kwargs)
+        async with self.scheduler.slot():
+            return await self._call(method, url, **kwargs)
+
+    async def _call(self, method, url, stream=False, **kwargs) -> httpx.Response:
+        """Request to Dadata API, switching to another key on key errors"""
+        if self.keys is None:
+            response = await self._send(self._client, method, url, stream, **kwargs)
+        else:
+            for _ in range(len(self.keys)):
+                # fail fast instead of waiting out a cooldown longer than the request timeout
+                index, delay = self.keys.acquire(max_wait=self._client.timeout.read)
+                if delay > 0:
+                    deadlines.check(delay)
+                    await asyncio.sleep(delay)
+                response = await self._send(self._clients[index], method, url, stream, **kwargs)
+                self.keys.report(index, response.status_code, retry_after(response.headers))
+                if response.status_code not in KEY_ERRORS:
+                    break
+                await response.aclose()
+        if response.is_error:
+            await response.aclose()
         response.raise_for_status()
-        return response.json()
+        return response
+
+    async def _send(self, client, method, url, stream=False, trace=None, **kwargs):
+        """Send request once the rate limit allows"""
+        if self.limiter is not None:
+            delay = self.limiter.acquire()
+            if delay > 0:
+                deadlines.check(delay)
+                await asyncio.sleep(delay)
+        # drop the request if its caller has given up while it was queued
+        deadlines.check()
+        extensions = None if trace is None else {"trace": trace}
+        request = client.build_request(
+            method,
+            url,
+            timeout=deadlines.timeout(client.timeout),
+            extensions=extensions,
+            **kwargs,
+        )
+        if self.adaptive is None or not in_bulk_call():
+            return await client.send(request, stream=stream)
+        return await self._send_adaptive(client, request, stream)
+
+    async def _send_adaptive(self, client, request, stream):
+        """Send bulk request within the adaptive in-flight limit of its host"""
+        limit = self.adaptive.host(request.url.host)
+        try:
+            await asyncio.wait_for(limit.acquire_async(), deadlines.remaining())
+        except asyncio.TimeoutError:
+            raise deadlines.DeadlineExceeded(
+                "Deadline exceeded while waiting for a bulk slot"
+            ) from None
+        start = time.perf_counter()
+        overload = True
+        try:
+            response = await client.send(request, stream=stream)
+            overload = response.status_code in OVERLOAD_STATUSES
+            return response
+        except httpx.TimeoutException:
+            # a timeout cut short by the deadline says nothing about the API
+            left = deadlines.remaining()
+            overload = left is None or left > 0
+            raise
+        finally:
+            limit.release(time.perf_counter() - start, overload)
 
 
 class CleanClient(ClientBase):
     """Dadata Cleaner API client"""
 
     BASE_URL = "https://cleaner.dadata.ru/api/v1/"
+    SERVICE = "clean"
 
     def __init__(
         self,
-        token: str,
+        token: Union[str, KeyPool],
         secret: Optional[str] = None,
         timeout: int = settings.TIMEOUT_SEC,
+        budget: Optional[Budget] = None,
+        scheduler: Optional[Scheduler] = None,
+        compression: Optional[str] = None,
+        response_cache: Optional[ResponseCache] = None,
+        base_url: Optional[str] = None,
+        adaptive: Optional[AdaptiveConcurrency] = None,
+        profile_url: Optional[str] = None,
     ):
-        super().__init__(base_url=self.BASE_URL, token=token, secret=secret, timeout=timeout)
+        super().__init__(
+            base_url=base_url or self.BASE_URL,
+            token=token,
+            secret=secret,
+            timeout=timeout,
+            budget=budget,
+            scheduler=scheduler,
+            compression=compression,
+            adaptive=adaptive,
+            profile_url=profile_url,
+        )
+        self.response_cache = response_cache
 
     async def clean(self, name: str, source: str) -> Optional[Dict]:
         """Cleanse `source` as `name` data type."""
         url = f"clean/{name}"
         data = [source]
+        if self.response_cache:
+            hit, cached = await self.response_cache.aget(self.SERVICE, url, data)
+            if hit:
+                return cached
         response = await self._post(url, data)
-        return response[0] if response else None
+        result = response[0] if response else None
+        if self.response_cache:
+            await self.response_cache.aput(self.SERVICE, url, data, result)
+        return result
+
+    async def clean_many(
+        self,
+        name: str,
+        sources: Sequence[str],
+        concurrency: int = settings.BULK_CONCURRENCY,
+        normalizer: Optional[Normalizer] = DEFAULT_NORMALIZER,
+    ) -> List[Optional[Dict]]:
+        """Cleanse many `sources` as `name` data type.
+
+        Sources equal after normalization are cleaned once, `concurrency` requests at a time.
+        """
+        keys, unique = bulk.dedupe(sources, normalizer)
+        url = f"clean/{name}"
+        requests = {key: [source] for key, source in unique.items()}
+        found: Dict[str, Optional[Dict]] = await bulk.acached(
+            self.response_cache, self.SERVICE, url, requests
+        )
+        cleaned: Dict[str, Optional[Dict]] = {}
+        semaphore = asyncio.Semaphore(self._workers(concurrency))
+        failed = False
+
+        async def clean(key):
+            nonlocal failed
+            async with semaphore:
+                # stop issuing paid requests once one has failed
+                if failed:
+                    return
+                try:
+                    await self._throttle()
+                    response = await self._post(url, requests[key])
+                except Exception:
+                    failed = True
+                    raise
+                cleaned[key] = response[0] if response else None
+
+        try:
+            with priority(BATCH), bulk_calls():
+                outcomes = await asyncio.gather(
+                    *(clean(key) for key in unique if key not in found), return_exceptions=True
+                )
+        finally:
+            # keep what has been paid for, even if the call fails
+            await bulk.astore(self.response_cache, self.SERVICE, url, requests, cleaned)
+        for outcome in outcomes:
+            if isinstance(outcome, BaseException):
+                raise outcome
+        found.update(cleaned)
+        return bulk.fan_out(sources, keys, found)
+
+    def iter_clean(self, name: str, sources: Sequence[str]) -> AsyncIterator[Dict]:
+        """Cleanse `sources` as `name` data type in a single request.
+
+        Cleaned records are yielded as soon as they arrive.
+        """
+        url = f"clean/{name}"
+        return self._post_stream(url, list(sources))
 
     async def clean_record(self, structure: List[str], record: List[str]) -> List[Dict]:
         """Cleanse `record` of specified `structure`."""
@@ -77,24 +409,125 @@ class CleanClient(ClientBase):
         response = await self._post(url, data)
         return response["data"][0] if response else None
 
+    def iter_clean_records(
+        self, structure: List[str], records: Sequence[List[str]]
+    ) -> AsyncIterator[List[Dict]]:
+        """Cleanse `records` of specified `structure` in a single request.
+
+        Cleaned records are yielded as soon as they arrive.
+        """
+        url = "clean"
+        data = {"structure": structure, "data": list(records)}
+        return self._post_stream(url, data, key="data")
+
 
 class SuggestClient(ClientBase):
     """Dadata Suggestions API client"""
 
     BASE_URL = "https://suggestions.dadata.ru/suggestions/api/4_1/rs/"
+    SERVICE = "suggestions"
 
     def __init__(
         self,
-        token: str,
+        token: Union[str, KeyPool],
         secret: Optional[str] = None,
         timeout: int = settings.TIMEOUT_SEC,
+        suggestion_cache: Optional[SuggestionCache] = None,
+        geo_cache: Optional[GeoCache] = None,
+        ip_cache: Optional[IPCache] = None,
+        budget: Optional[Budget] = None,
+        scheduler: Optional[Scheduler] = None,
+        compression: Optional[str] = None,
+        response_cache: Optional[ResponseCache] = None,
+        base_url: Optional[str] = None,
+        prefetch: Optional[Prefetch] = None,
+        adaptive: Optional[AdaptiveConcurrency] = None,
+        profile_url: Optional[str] = None,
     ):
-        super().__init__(base_url=self.BASE_URL, token=token, secret=secret, timeout=timeout)
+        super().__init__(
+            base_url=base_url or self.BASE_URL,
+            token=token,
+            secret=secret,
+            timeout=timeout,
+            budget=budget,
+            scheduler=scheduler,
+            compression=compression,
+            adaptive=adaptive,
+            profile_url=profile_url,
+        )
+        self.suggestion_cache = suggestion_cache
+        self.geo_cache = geo_cache
+        self.ip_cache = ip_cache
+        self.response_cache = response_cache
+        if prefetch is not None and response_cache is None:
+            raise ValueError("Prefetch needs a response cache")
+        self.prefetch = prefetch
+        self._prefetching: Set[asyncio.Task] = set()
+        self._prefetch_slots: Optional[asyncio.Semaphore] = None
+
+    async def close(self):
+        """Close network connections"""
+        for task in list(self._prefetching):
+            task.cancel()
+        await super().close()
 
     async def geolocate(
         self, name: str, lat: float, lon: float, radius_meters: int = 100, **kwargs
     ) -> List[Dict]:
         """Find places near given coordinates in given radius."""
+        if self.geo_cache:
+            cached = self.geo_cache.get(name, lat, lon, radius_meters, kwargs)
+            if cached is not None:
+                return cached
+        suggestions = await self._geolocate(name, lat, lon, radius_meters, kwargs)
+        if self.geo_cache:
+            self.geo_cache.put(name, lat, lon, radius_meters, kwargs, suggestions)
+        return suggestions
+
+    async def geolocate_many(
+        self,
+        name: str,
+        points: Sequence[Tuple[float, float]],
+        radius_meters: int = 100,
+        spread_meters: int = 0,
+        **kwargs,
+    ) -> List[List[Dict]]:
+        """Find places near each of given coordinates in given radius.
+
+        Points covered by an earlier answer are resolved locally. With `spread_meters`,
+        each API call covers a wider area, so that nearby points need no calls of their own.
+        """
+        cache = self.geo_cache or GeoCache()
+        seen: Dict[Tuple[float, float], List[Dict]] = {}
+        results = []
+        with priority(BATCH):
+            for lat, lon in points:
+                found = seen.get((lat, lon))
+                if found is None:
+                    found = cache.get(name, lat, lon, radius_meters, kwargs)
+                if found is None and spread_meters:
+                    radius = min(radius_meters + spread_meters, settings.GEOLOCATE_MAX_RADIUS)
+                    await self._throttle()
+                    suggestions = await self._geolocate(name, lat, lon, radius, kwargs)
+                    cache.put(name, lat, lon, radius, kwargs, suggestions)
+                    found = cache.get(name, lat, lon, radius_meters, kwargs)
+                    if found is None:
+                        # a truncated wide answer still holds the nearest places to its own center
+                        count = kwargs.get("count", settings.SUGGESTION_COUNT)
+                        found = nearest(suggestions, lat, lon, radius_meters, count)
+                        if found is not None:
+                            cache.put(name, lat, lon, radius_meters, kwargs, found)
+                if found is None:
+                    await self._throttle()
+                    found = await self._geolocate(name, lat, lon, radius_meters, kwargs)
+                    cache.put(name, lat, lon, radius_meters, kwargs, found)
+                seen[(lat, lon)] = found
+                results.append(found)
+        return results
+
+    async def _geolocate(
+        self, name: str, lat: float, lon: float, radius_meters: int, kwargs: Dict
+    ) -> List[Dict]:
         url = f"geolocate/{name}"
         data = {"lat": lat, "lon": lon, "radius_meters": radius_meters}
         data.update(kwargs)
@@ -103,21 +536,37 @@ class SuggestClient(ClientBase):
 
     async def iplocate(self, query: str, **kwargs) -> Optional[Dict]:
         """Detect city by IPv4 or IPv6 address."""
+        if self.ip_cache:
+            hit, location = self.ip_cache.get(query, kwargs)
+            if hit:
+                return location
         url = "iplocate/address"
         data = {"ip": query}
         data.update(kwargs)
         response = await self._get(url, data)
-        return response["location"] if "location" in response else None
+        location = response["location"] if "location" in response else None
+        if self.ip_cache:
+            self.ip_cache.put(query, kwargs, location)
+        return location
 
     async def suggest(
         self, name: str, query: str, count: int = settings.SUGGESTION_COUNT, **kwargs
     ) -> List[Dict]:
         """Suggest from `name` directory according to given `query`."""
+        if self.suggestion_cache:
+            cached = self.suggestion_cache.get(name, query, count, kwargs)
+            if cached is not None:
+                self._prefetch(name, cached)
+                return cached
         url = f"suggest/{name}"
         data = {"query": query, "count": count}
         data.update(kwargs)
         response = await self._post(url, data)
-        return response["suggestions"]
+        suggestions = response["suggestions"]
+        if self.suggestion_cache:
+            self.suggestion_cache.put(name, query, count, kwargs, suggestions)
+        self._prefetch(name, suggestions)
+        return suggestions
 
     async def find_by_id(
         self, name: str, query: str, count: int = settings.SUGGESTION_COUNT, **kwargs
@@ -126,9 +575,85 @@ class SuggestClient(ClientBase):
         url = f"findById/{name}"
         data = {"query": query, "count": count}
         data.update(kwargs)
+        if self.response_cache:
+            hit, cached = await self.response_cache.aget(self.SERVICE, url, data)
+            if hit:
+                return cached
         response = await self._post(url, data)
+        if self.response_cache:
+            await self.response_cache.aput(self.SERVICE, url, data, response["suggestions"])
         return response["suggestions"]
 
+    async def find_by_ids(
+        self,
+        name: str,
+        queries: Sequence[str],
+        concurrency: int = settings.BULK_CONCURRENCY,
+        affiliated: bool = False,
+        **kwargs,
+    ) -> bulk.BulkResult:
+        """Find records in `name` directory by their IDs.
+
+        Each unique ID is requested once, `concurrency` requests at a time.
+        With `affiliated`, also finds affiliated parties for each party found.
+        """
+        if affiliated and name != "party":
+            raise ValueError("Affiliated parties can only be found in party directory")
+        url = f"findById/{name}"
+        params = dict(kwargs)
+        count = params.pop("count", settings.SUGGESTION_COUNT)
+        requests = {
+            query: dict({"query": query, "count": count}, **params)
+            for query in dict.fromkeys(queries)
+        }
+        hits = await bulk.acached(self.response_cache, self.SERVICE, url, requests)
+        fetched: Dict[str, List[Dict]] = {}
+        found: Dict[str, List[Dict]] = {}
+        errors: Dict[str, Exception] = {}
+        related: Dict[str, List[Dict]] = {}
+        related_errors: Dict[str, Exception] = {}
+        semaphore = asyncio.Semaphore(self._workers(concurrency))
+        failed = False
+
+        async def lookup(query):
+            nonlocal failed
+            async with semaphore:
+                # stop issuing paid requests once one has failed for good
+                if failed:
+                    return
+                try:
+                    if query in hits:
+                        suggestions = hits[query]
+                    else:
+                        await self._throttle()
+                        response = await self._post(url, requests[query])
+                        suggestions = fetched[query] = response["suggestions"]
+                    found[query] = suggestions
+                    if affiliated and suggestions:
+                        try:
+                            await self._throttle()
+                            related[query] = await self.find_affiliated(query)
+                        except httpx.HTTPError as exc:
+                            related_errors[query] = exc
+                except httpx.HTTPError as exc:
+                    errors[query] = exc
+                except Exception:
+                    failed = True
+                    raise
+
+        try:
+            with priority(BATCH), bulk_calls():
+                outcomes = await asyncio.gather(
+                    *(lookup(query) for query in requests), return_exceptions=True
+                )
+        finally:
+            # keep what has been paid for, even if the call fails
+            await bulk.astore(self.response_cache, self.SERVICE, url, requests, fetched)
+        for outcome in outcomes:
+            if isinstance(outcome, BaseException):
+                raise outcome
+        return bulk.collect(queries, found, errors, related, related_errors)
+
     async def find_by_email(
         self, name: str, query: str, count: int = settings.SUGGESTION_COUNT, **kwargs
     ) -> List[Dict]:
@@ -146,22 +671,79 @@ class SuggestClient(ClientBase):
         url = "findAffiliated/party"
         data = {"query": query, "count": count}
         data.update(kwargs)
+        if self.response_cache:
+            hit, cached = await self.response_cache.aget(self.SERVICE, url, data)
+            if hit:
+                return cached
         response = await self._post(url, data)
+        if self.response_cache:
+            await self.response_cache.aput(self.SERVICE, url, data, response["suggestions"])
         return response["suggestions"]
 
+    def iter_affiliated(
+        self, query: str, count: int = settings.SUGGESTION_COUNT, **kwargs
+    ) -> AsyncIterator[Dict]:
+        """Find affiliated parties by INN, yielding each one as soon as it arrives."""
+        url = "findAffiliated/party"
+        data = {"query": query, "count": count}
+        data.update(kwargs)
+        return self._post_stream(url, data, key="suggestions")
+
+    def _prefetch(self, name: str, suggestions: List[Dict]):
+        """Fetch details of top suggestions in the background, as the prefetch policy says"""
+        if self.prefetch is None:
+            return
+        for query in self.prefetch.targets(name, suggestions):
+            # fresh context: prefetch is a batch call, not bound by the caller deadline
+            task = contextvars.Context().run(asyncio.ensure_future, self._fetch_ahead(name, query))
+            self._prefetching.add(task)
+            task.add_done_callback(self._prefetching.discard)
+
+    async def _fetch_ahead(self, name: str, query: str):
+        """Put records for suggestion ID into response cache, unless they are there already"""
+        policy, cache = self.prefetch, self.response_cache
+        if policy is None or cache is None:
+            return
+        if self._prefetch_slots is None:
+            self._prefetch_slots = asyncio.Semaphore(policy.concurrency)
+        data = {"query": query, "count": settings.SUGGESTION_COUNT}
+        calls = [(f"findById/{name}", lambda: self.find_by_id(name, query))]
+        if policy.affiliated and name == "party":
+            calls.append(("findAffiliated/party", lambda: self.find_affiliated(query)))
+        async with self._prefetch_slots:
+            with priority(BATCH):
+                for url, call in calls:
+                    if (await cache.aget(self.SERVICE, url, data))[0]:
+                        continue
+                    if not policy.claim(self.budget, self.SERVICE):
+                        return
+                    try:
+                        await call()
+                    except httpx.HTTPError:
+                        return
+
 
 class ProfileClient(ClientBase):
     """Dadata Profile API client"""
 
     BASE_URL = "https://dadata.ru/api/v2/"
+    SERVICE = "profile"
 
     def __init__(
         self,
-        token: str,
+        token: Union[str, KeyPool],
         secret: Optional[str] = None,
         timeout: int = settings.TIMEOUT_SEC,
+        scheduler: Optional[Scheduler] = None,
+        base_url: Optional[str] = None,
     ):
-        super().__init__(base_url=self.BASE_URL, token=token, secret=secret, timeout=timeout)
+        super().__init__(
+            base_url=base_url or self.BASE_URL,
+            token=token,
+            secret=secret,
+            timeout=timeout,
+            scheduler=scheduler,
+        )
 
     async def get_balance(self) -> float:
         """Get account balance."""
@@ -183,27 +765,97 @@ class ProfileClient(ClientBase):
         return response
 
 
+def _service_url(base_url: Optional[str], service: str) -> Optional[str]:
+    """Base URL of `service` behind a gateway (see `dadata.gateway`) at `base_url`"""
+    return None if base_url is None else f"{base_url.rstrip('/')}/{service}/"
+
+
 class DadataClient:
     """Asynchronous Dadata API client"""
 
     def __init__(
         self,
-        token: str,
+        token: Union[str, KeyPool],
         secret: Optional[str] = None,
         timeout: int = settings.TIMEOUT_SEC,
+        suggestion_cache: Optional[SuggestionCache] = None,
+        geo_cache: Optional[GeoCache] = None,
+        ip_cache: Optional[IPCache] = None,
+        budget: Optional[Budget] = None,
+        scheduler: Optional[Scheduler] = None,
+        compression: Optional[str] = None,
+        response_cache: Optional[ResponseCache] = None,
+        base_url: Optional[str] = None,
+        prefetch: Optional[Prefetch] = None,
+        adaptive: Optional[AdaptiveConcurrency] = None,
     ):
-        self._cleaner = CleanClient(token=token, secret=secret, timeout=timeout)
-        self._suggestions = SuggestClient(token=token, secret=secret, timeout=timeout)
-        self._profile = ProfileClient(token=token, secret=secret, timeout=timeout)
+        self._cleaner = CleanClient(
+            token=token,
+            secret=secret,
+            timeout=timeout,
+            budget=budget,
+            scheduler=scheduler,
+            compression=compression,
+            response_cache=response_cache,
+            base_url=_service_url(base_url, CleanClient.SERVICE),
+            adaptive=adaptive,
+            profile_url=_service_url(base_url, ProfileClient.SERVICE),
+        )
+        self._suggestions = SuggestClient(
+            token=token,
+            secret=secret,
+            timeout=timeout,
+            suggestion_cache=suggestion_cache,
+            geo_cache=geo_cache,
+            ip_cache=ip_cache,
+            budget=budget,
+            scheduler=scheduler,
+            compression=compression,
+            response_cache=response_cache,
+            base_url=_service_url(base_url, SuggestClient.SERVICE),
+            prefetch=prefetch,
+            adaptive=adaptive,
+            profile_url=_service_url(base_url, ProfileClient.SERVICE),
+        )
+        self._profile = ProfileClient(
+            token=token,
+            secret=secret,
+            timeout=timeout,
+            scheduler=scheduler,
+            base_url=_service_url(base_url, ProfileClient.SERVICE),
+        )
+        self._watch: Optional[asyncio.Task] = None
 
     async def clean(self, name: str, source: str) -> Optional[Dict]:
         """Cleanse `source` as `name` data type."""
         return await self._cleaner.clean(name=name, source=source)
 
+    async def clean_many(
+        self,
+        name: str,
+        sources: Sequence[str],
+        concurrency: int = settings.BULK_CONCURRENCY,
+        normalizer: Optional[Normalizer] = DEFAULT_NORMALIZER,
+    ) -> List[Optional[Dict]]:
+        """Cleanse many `sources` as `name` data type."""
+        return await self._cleaner.clean_many(
+            name=name, sources=sources, concurrency=concurrency, normalizer=normalizer
+        )
+
+    def iter_clean(self, name: str, sources: Sequence[str]) -> AsyncIterator[Dict]:
+        """Cleanse `sources` as `name` data type, yielding records as they arrive."""
+        return self._cleaner.iter_clean(name=name, sources=sources)
+
     async def clean_record(self, structure: List[str], record: List[str]) -> List[Dict]:
         """Cleanse `record` of specified `structure`."""
         return await self._cleaner.clean_record(structure=structure, record=record)
 
+    def iter_clean_records(
+        self, structure: List[str], records: Sequence[List[str]]
+    ) -> AsyncIterator[List[Dict]]:
+        """Cleanse `records` of specified `structure`, yielding records as they arrive."""
+        return self._cleaner.iter_clean_records(structure=structure, records=records)
+
     async def geolocate(
         self, name: str, lat: float, lon: float, radius_meters: int = 100, **kwargs
     ) -> List[Dict]:
@@ -212,6 +864,23 @@ class DadataClient:
             name=name, lat=lat, lon=lon, radius_meters=radius_meters, **kwargs
         )
 
+    async def geolocate_many(
+        self,
+        name: str,
+        points: Sequence[Tuple[float, float]],
+        radius_meters: int = 100,
+        spread_meters: int = 0,
+        **kwargs,
+    ) -> List[List[Dict]]:
+        """Find places near each of given coordinates in given radius."""
+        return await self._suggestions.geolocate_many(
+            name=name,
+            points=points,
+            radius_meters=radius_meters,
+            spread_meters=spread_meters,
+            **kwargs,
+        )
+
     async def iplocate(self, query: str, **kwargs) -> Optional[Dict]:
         """Detect city by IPv4 or IPv6 address."""
         return await self._suggestions.iplocate(query=query, **kwargs)
@@ -228,6 +897,19 @@ class DadataClient:
         """Find record in `name` directory by its ID."""
         return await self._suggestions.find_by_id(name=name, query=query, count=count, **kwargs)
 
+    async def find_by_ids(
+        self,
+        name: str,
+        queries: Sequence[str],
+        concurrency: int = settings.BULK_CONCURRENCY,
+        affiliated: bool = False,
+        **kwargs,
+    ) -> bulk.BulkResult:
+        """Find records in `name` directory by their IDs."""
+        return await self._suggestions.find_by_ids(
+            name=name, queries=queries, concurrency=concurrency, affiliated=affiliated, **kwargs
+        )
+
     async def find_by_email(
         self, name: str, query: str, count: int = settings.SUGGESTION_COUNT, **kwargs
     ) -> List[Dict]:
@@ -240,6 +922,49 @@ class DadataClient:
         """Find affiliated parties by INN."""
         return await self._suggestions.find_affiliated(query=query, count=count, **kwargs)
 
+    def iter_affiliated(
+        self, query: str, count: int = settings.SUGGESTION_COUNT, **kwargs
+    ) -> AsyncIterator[Dict]:
+        """Find affiliated parties by INN, yielding each one as soon as it arrives."""
+        return self._suggestions.iter_affiliated(query=query, count=count, **kwargs)
+
+    async def warmup(self, connections: int = 1):
+        """Open `connections` connections to each API host ahead of time."""
+        clients = (self._cleaner, self._suggestions, self._profile)
+        await asyncio.gather(*(client.warmup(connections) for client in clients))
+
+    async def keepalive(self, interval: float = settings.KEEPALIVE_SEC, connections: int = 1):
+        """Keep `connections` connections to each API host open until the client is closed."""
+        for client in (self._cleaner, self._suggestions, self._profile):
+            await client.keepalive(interval, connections)
+
+    async def watch_versions(self, interval: float = settings.VERSIONS_POLL_SEC):
+        """Check dataset versions every `interval` seconds until the client is closed.
+        Drop cached results that depend on updated datasets."""
+        tracker = VersionTracker(
+            [
+                self._suggestions.suggestion_cache,
+                self._suggestions.geo_cache,
+                self._suggestions.ip_cache,
+                self._suggestions.response_cache,
+                self._cleaner.response_cache,
+            ]
+        )
+        tracker.update(await self.get_versions())
+        if self._watch is not None:
+            self._watch.cancel()
+
+        async def run():
+            while True:
+                await asyncio.sleep(interval)
+                try:
+                    tracker.update(await self.get_versions())
+                except httpx.HTTPError:
+                    # try again next time
+                    continue
+
+        self._watch = asyncio.get_running_loop().create_task(run())
+
     async def get_balance(self) -> float:
         """Get account balance."""
         return await self._profile.get_balance()
@@ -260,6 +985,9 @@ class DadataClient:
 
     async def close(self):
         """Close network connections"""
+        if self._watch is not None:
+            self._watch.cancel()
+            self._watch = None
         await self._cleaner.close()
         await self._suggestions.close()
         await self._profile.close()
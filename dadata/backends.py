@@ -0,0 +1,299 @@
+"""
+Storage backends for response cache.
+"""
+
+import os
+import socket
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+from dadata import settings
+
+
+class CacheBackend:
+    """Key-value storage for cached responses.
+
+    Keys are strings, values are bytes. Batch methods let bulk lookups
+    check the cache in a single round trip.
+    """
+
+    # whether calls wait on disk or network I/O
+    blocking = True
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        """Values for `keys`, None for missing or expired ones."""
+        raise NotImplementedError
+
+    def set_many(self, items: Dict[str, bytes], ttl: float):
+        """Store values for `ttl` seconds."""
+        raise NotImplementedError
+
+    def delete_prefix(self, prefix: str):
+        """Remove values with keys starting with `prefix`."""
+        raise NotImplementedError
+
+    def clear(self):
+        """Remove all values."""
+        self.delete_prefix("")
+
+    def close(self):
+        """Release resources held by the backend."""
+
+
+class MemoryBackend(CacheBackend):
+    """Storage in process memory, least recently used values are evicted first"""
+
+    blocking = False
+
+    def __init__(self, maxsize: int = settings.CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        now = time.monotonic()
+        values: List[Optional[bytes]] = []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and entry[1] <= now:
+                    del self._entries[key]
+                    entry = None
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                values.append(None if entry is None else entry[0])
+        return values
+
+    def set_many(self, items: Dict[str, bytes], ttl: float):
+        expires = time.monotonic() + ttl
+        with self._lock:
+            for key, value in items.items():
+                self._entries[key] = (value, expires)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete_prefix(self, prefix: str):
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                del self._entries[key]
+
+
+class SQLiteBackend(CacheBackend):
+    """Storage in SQLite database file, shared by processes on one host.
+
+    The database runs in WAL mode, so readers do not block each other or the writer.
+    """
+
+    # expired rows are purged after this many writes
+    PURGE_EVERY = 1000
+
+    def __init__(self, path: Union[str, "os.PathLike[str]"]):
+        self.path = os.fspath(path)
+        self._local = threading.local()
+        self._writes = 0
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache "
+                "(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL NOT NULL)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        """Connection of the current thread"""
+        connection = getattr(self._local, "connection", None)
+        # a forked worker must not reuse connection of the parent process
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=settings.TIMEOUT_SEC)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        found: Dict[str, bytes] = {}
+        connection = self._connection()
+        now = time.time()
+        # stay within SQLite limit on query parameters
+        for start in range(0, len(keys), 500):
+            chunk = list(keys[start : start + 500])
+            marks = ",".join("?" * len(chunk))
+            rows = connection.execute(
+                f"SELECT key, value FROM cache WHERE key IN ({marks}) AND expires > ?",
+                [*chunk, now],
+            )
+            found.update(rows)
+        return [found.get(key) for key in keys]
+
+    def set_many(self, items: Dict[str, bytes], ttl: float):
+        expires = time.time() + ttl
+        with self._connection() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)",
+                [(key, value, expires) for key, value in items.items()],
+            )
+            self._writes += len(items)
+            if self._writes >= self.PURGE_EVERY:
+                self._writes = 0
+                connection.execute("DELETE FROM cache WHERE expires <= ?", (time.time(),))
+
+    def delete_prefix(self, prefix: str):
+        with self._connection() as connection:
+            if prefix:
+                # keys within [prefix, prefix + max char) start with prefix
+                connection.execute(
+                    "DELETE FROM cache WHERE key >= ? AND key < ?", (prefix, prefix + "\U0010ffff")
+                )
+            else:
+                connection.execute("DELETE FROM cache")
+
+    def close(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+
+class RespError(Exception):
+    """Error reply from key-value server"""
+
+
+# errors of unavailable or failing storage, response cache treats them as misses
+BACKEND_ERRORS = (OSError, sqlite3.Error, RespError)
+
+
+class RedisBackend(CacheBackend):
+    """Storage in a network key-value server speaking Redis protocol (Redis, Valkey, KeyDB etc).
+
+    Keys are stored with `namespace` prefix and expire on the server.
+    Batches are sent as a single pipeline.
+    """
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 6379,
+        db: int = 0,
+        password: Optional[str] = None,
+        namespace: str = "dadata:",
+        timeout: float = settings.TIMEOUT_SEC,
+    ):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.namespace = namespace
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        if not keys:
+            return []
+        (values,) = self._execute([("MGET", *(self.namespace + key for key in keys))])
+        return values
+
+    def set_many(self, items: Dict[str, bytes], ttl: float):
+        if not items:
+            return
+        milliseconds = str(max(1, int(ttl * 1000)))
+        commands = [
+            ("SET", self.namespace + key, value, "PX", milliseconds) for key, value in items.items()
+        ]
+        self._execute(commands)
+
+    def delete_prefix(self, prefix: str):
+        pattern = _glob_escape(self.namespace + prefix) + "*"
+        cursor = b"0"
+        while True:
+            ((cursor, keys),) = self._execute([("SCAN", cursor, "MATCH", pattern, "COUNT", "1000")])
+            if keys:
+                self._execute([("DEL", *keys)])
+            if cursor == b"0":
+                return
+
+    def close(self):
+        stream = getattr(self._local, "stream", None)
+        if stream is not None:
+            stream.close()
+            self._local.stream = None
+
+    def _stream(self):
+        """Connection of the current thread"""
+        stream = getattr(self._local, "stream", None)
+        # a forked worker must not reuse connection of the parent process
+        if stream is None or self._local.pid != os.getpid():
+            sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            stream = sock.makefile("rwb")
+            sock.close()
+            self._local.stream = stream
+            self._local.pid = os.getpid()
+            setup = []
+            if self.password:
+                setup.append(("AUTH", self.password))
+            if self.db:
+                setup.append(("SELECT", str(self.db)))
+            if setup:
+                try:
+                    self._execute(setup)
+                except RespError:
+                    self.close()
+                    raise
+        return stream
+
+    def _execute(self, commands: Sequence[Tuple]) -> List:
+        """Send commands in one pipeline and read their replies."""
+        stream = self._stream()
+        try:
+            stream.write(b"".join(_encode(command) for command in commands))
+            stream.flush()
+            replies = [_read(stream) for _ in commands]
+        except OSError:
+            self.close()
+            raise
+        for reply in replies:
+            if isinstance(reply, RespError):
+                raise reply
+        return replies
+
+
+def _glob_escape(text: str) -> str:
+    for char in "\\*?[]":
+        text = text.replace(char, "\\" + char)
+    return text
+
+
+def _encode(command: Tuple) -> bytes:
+    """Encode command as RESP array of bulk strings."""
+    parts = [b"*%d\r\n" % len(command)]
+    for arg in command:
+        data = arg if isinstance(arg, bytes) else str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(parts)
+
+
+def _read(stream):
+    """Read one RESP reply."""
+    line = stream.readline()
+    if not line.endswith(b"\r\n"):
+        raise ConnectionError("Connection closed by key-value server")
+    kind, rest = line[:1], line[1:-2]
+    if kind == b"+":
+        return rest
+    if kind == b"-":
+        return RespError(rest.decode())
+    if kind == b":":
+        return int(rest)
+    if kind == b"$":
+        size = int(rest)
+        if size < 0:
+            return None
+        data = stream.read(size + 2)
+        return data[:-2]
+    if kind == b"*":
+        size = int(rest)
+        if size < 0:
+            return None
+        return [_read(stream) for _ in range(size)]
+    raise ConnectionError(f"Unexpected reply from key-value server: {line!r}")
@@ -0,0 +1,257 @@
+"""
+Synchronous Dadata API client running the async client on a background thread.
+"""
+
+import asyncio
+import contextvars
+import datetime as dt
+import threading
+from concurrent.futures import Future
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+from dadata import asynchr, bulk, settings
+from dadata.adaptive import AdaptiveConcurrency
+from dadata.budget import Budget
+from dadata.cache import GeoCache, IPCache, ResponseCache, SuggestionCache
+from dadata.keys import KeyPool
+from dadata.normalize import DEFAULT_NORMALIZER, Normalizer
+from dadata.prefetch import Prefetch
+from dadata.scheduling import Scheduler
+
+
+async def _in_context(call: Awaitable, context: contextvars.Context) -> Any:
+    """Run the call with context variables (priority, tracing) of the submitting thread."""
+    for var, value in context.items():
+        var.set(value)
+    return await call
+
+
+class DadataClient:
+    """Synchronous Dadata API client backed by an event loop on a background thread.
+
+    Methods block like the ones of `dadata.sync.DadataClient`, but all calls share the async
+    client, its connection pool and scheduler. `submit()` starts a call without waiting
+    for it, so a single thread can have many requests in flight.
+    """
+
+    def __init__(
+        self,
+        token: Union[str, KeyPool],
+        secret: Optional[str] = None,
+        timeout: int = settings.TIMEOUT_SEC,
+        suggestion_cache: Optional[SuggestionCache] = None,
+        geo_cache: Optional[GeoCache] = None,
+        ip_cache: Optional[IPCache] = None,
+        budget: Optional[Budget] = None,
+        scheduler: Optional[Scheduler] = None,
+        compression: Optional[str] = None,
+        response_cache: Optional[ResponseCache] = None,
+        base_url: Optional[str] = None,
+        prefetch: Optional[Prefetch] = None,
+        adaptive: Optional[AdaptiveConcurrency] = None,
+    ):
+        self._client = asynchr.DadataClient(
+            token=token,
+            secret=secret,
+            timeout=timeout,
+            suggestion_cache=suggestion_cache,
+            geo_cache=geo_cache,
+            ip_cache=ip_cache,
+            budget=budget,
+            scheduler=scheduler,
+            compression=compression,
+            response_cache=response_cache,
+            base_url=base_url,
+            prefetch=prefetch,
+            adaptive=adaptive,
+        )
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="dadata-loop", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, method: str, *args, **kwargs) -> "Future[Any]":
+        """Start a call of the async client `method` without waiting for its result."""
+        call = getattr(self._client, method)(*args, **kwargs)
+        return asyncio.run_coroutine_threadsafe(
+            _in_context(call, contextvars.copy_context()), self._loop
+        )
+
+    def _run(self, method: str, *args, **kwargs) -> Any:
+        return self.submit(method, *args, **kwargs).result()
+
+    def _iterate(self, items: AsyncIterator) -> Iterator:
+        """Iterate over async iterator from the calling thread."""
+        context = contextvars.copy_context()
+        try:
+            while True:
+                future = asyncio.run_coroutine_threadsafe(
+                    _in_context(items.__anext__(), context), self._loop
+                )
+                try:
+                    yield future.result()
+                except StopAsyncIteration:
+                    return
+        finally:
+            close = getattr(items, "aclose", None)
+            if close is not None and not self._loop.is_closed():
+                asyncio.run_coroutine_threadsafe(close(), self._loop).result()
+
+    def clean(self, name: str, source: str) -> Optional[Dict]:
+        """Cleanse `source` as `name` data type."""
+        return self._run("clean", name=name, source=source)
+
+    def clean_many(
+        self,
+        name: str,
+        sources: Sequence[str],
+        concurrency: int = settings.BULK_CONCURRENCY,
+        normalizer: Optional[Normalizer] = DEFAULT_NORMALIZER,
+    ) -> List[Optional[Dict]]:
+        """Cleanse many `sources` as `name` data type."""
+        return self._run(
+            "clean_many", name=name, sources=sources, concurrency=concurrency, normalizer=normalizer
+        )
+
+    def iter_clean(self, name: str, sources: Sequence[str]) -> Iterator[Dict]:
+        """Cleanse `sources` as `name` data type, yielding records as they arrive."""
+        return self._iterate(self._client.iter_clean(name=name, sources=sources))
+
+    def clean_record(self, structure: List[str], record: List[str]) -> List[Dict]:
+        """Cleanse `record` of specified `structure`."""
+        return self._run("clean_record", structure=structure, record=record)
+
+    def iter_clean_records(
+        self, structure: List[str], records: Sequence[List[str]]
+    ) -> Iterator[List[Dict]]:
+        """Cleanse `records` of specified `structure`, yielding records as they arrive."""
+        return self._iterate(self._client.iter_clean_records(structure=structure, records=records))
+
+    def geolocate(
+        self, name: str, lat: float, lon: float, radius_meters: int = 100, **kwargs
+    ) -> List[Dict]:
+        """Find places near given coordinates in given radius."""
+        return self._run(
+            "geolocate", name=name, lat=lat, lon=lon, radius_meters=radius_meters, **kwargs
+        )
+
+    def geolocate_many(
+        self,
+        name: str,
+        points: Sequence[Tuple[float, float]],
+        radius_meters: int = 100,
+        spread_meters: int = 0,
+        **kwargs,
+    ) -> List[List[Dict]]:
+        """Find places near each of given coordinates in given radius."""
+        return self._run(
+            "geolocate_many",
+            name=name,
+            points=points,
+            radius_meters=radius_meters,
+            spread_meters=spread_meters,
+            **kwargs,
+        )
+
+    def iplocate(self, query: str, **kwargs) -> Optional[Dict]:
+        """Detect city by IPv4 or IPv6 address."""
+        return self._run("iplocate", query=query, **kwargs)
+
+    def suggest(
+        self, name: str, query: str, count: int = settings.SUGGESTION_COUNT, **kwargs
+    ) -> List[Dict]:
+        """Suggest from `name` directory according to given `query`."""
+        return self._run("suggest", name=name, query=query, count=count, **kwargs)
+
+    def find_by_id(
+        self, name: str, query: str, count: int = settings.SUGGESTION_COUNT, **kwargs
+    ) -> List[Dict]:
+        """Find record in `name` directory by its ID."""
+        return self._run("find_by_id", name=name, query=query, count=count, **kwargs)
+
+    def find_by_ids(
+        self,
+        name: str,
+        queries: Sequence[str],
+        concurrency: int = settings.BULK_CONCURRENCY,
+        affiliated: bool = False,
+        **kwargs,
+    ) -> bulk.BulkResult:
+        """Find records in `name` directory by their IDs."""
+        return self._run(
+            "find_by_ids",
+            name=name,
+            queries=queries,
+            concurrency=concurrency,
+            affiliated=affiliated,
+            **kwargs,
+        )
+
+    def find_by_email(
+        self, name: str, query: str, count: int = settings.SUGGESTION_COUNT, **kwargs
+    ) -> List[Dict]:
+        """Find record in `name` directory by its email."""
+        return self._run("find_by_email", name=name, query=query, count=count, **kwargs)
+
+    def find_affiliated(
+        self, query: str, count: int = settings.SUGGESTION_COUNT, **kwargs
+    ) -> List[Dict]:
+        """Find affiliated parties by INN."""
+        return self._run("find_affiliated", query=query, count=count, **kwargs)
+
+    def iter_affiliated(
+        self, query: str, count: int = settings.SUGGESTION_COUNT, **kwargs
+    ) -> Iterator[Dict]:
+        """Find affiliated parties by INN, yielding each one as soon as it arrives."""
+        return self._iterate(self._client.iter_affiliated(query=query, count=count, **kwargs))
+
+    def warmup(self, connections: int = 1):
+        """Open `connections` connections to each API host ahead of time."""
+        self._run("warmup", connections)
+
+    def keepalive(self, interval: float = settings.KEEPALIVE_SEC, connections: int = 1):
+        """Keep `connections` connections to each API host open until the client is closed."""
+        self._run("keepalive", interval, connections)
+
+    def watch_versions(self, interval: float = settings.VERSIONS_POLL_SEC):
+        """Check dataset versions every `interval` seconds until the client is closed.
+        Drop cached results that depend on updated datasets."""
+        self._run("watch_versions", interval)
+
+    def get_balance(self) -> float:
+        """Get account balance."""
+        return self._run("get_balance")
+
+    def get_daily_stats(self, date: Optional[dt.date] = None) -> Dict:
+        """Get daily service usage stats."""
+        return self._run("get_daily_stats", date=date)
+
+    def get_versions(self) -> Dict:
+        """Get product and dataset versions."""
+        return self._run("get_versions")
+
+    def __enter__(self) -> "DadataClient":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Close network connections and stop the background thread"""
+        if self._loop.is_closed():
+            return
+        self._run("close")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
@@ -0,0 +1,100 @@
+"""
+Budget governor for bulk jobs.
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Optional
+from dadata import settings
+
+
+class BudgetExhausted(Exception):
+    """Bulk job budget or daily quota is exhausted"""
+
+
+class Budget:
+    """Spending limits for bulk jobs.
+
+    Balance and daily stats are polled at most once per `poll_interval`, and calls made
+    in between are counted locally. Bulk calls slow down when less than `slowdown` share
+    of the budget is left, and pause when it is spent. `reserve` share of each daily quota
+    is kept for interactive traffic, which is never throttled.
+
+    `limit` is the amount of money bulk jobs may spend, `cost` is an estimated price
+    of a single call. `daily_limits` are call quotas by service ("clean", "suggestions").
+    """
+
+    def __init__(
+        self,
+        limit: Optional[float] = None,
+        daily_limits: Optional[Dict[str, int]] = None,
+        cost: float = 0.0,
+        reserve: float = 0.1,
+        slowdown: float = 0.1,
+        max_delay: float = 1.0,
+        poll_interval: float = settings.BUDGET_POLL_SEC,
+        wait: bool = True,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.limit = limit
+        self.daily_limits = daily_limits or {}
+        self.cost = cost
+        self.reserve = reserve
+        self.slowdown = slowdown
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.wait = wait
+        self._clock = clock
+        self._next_poll = 0.0
+        self._start_balance: Optional[float] = None
+        self._balance: Optional[float] = None
+        self._used: Dict[str, int] = {}
+        self._calls: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def claim_poll(self) -> bool:
+        """Check if balance and stats are due for a poll. Only one caller gets True."""
+        with self._lock:
+            now = self._clock()
+            if now < self._next_poll:
+                return False
+            self._next_poll = now + self.poll_interval
+            return True
+
+    def update(self, balance: float, stats: Dict):
+        """Apply polled balance and daily stats."""
+        with self._lock:
+            if self._start_balance is None:
+                self._start_balance = balance
+            self._balance = balance
+            self._used = dict(stats.get("services") or {})
+            self._calls.clear()
+
+    def record(self, service: str, calls: int = 1):
+        """Count calls made since the last poll."""
+        with self._lock:
+            self._calls[service] = self._calls.get(service, 0) + calls
+
+    def left(self, service: str) -> float:
+        """Share of the bulk budget left for `service`, from 1 (untouched) to 0 (spent)."""
+        with self._lock:
+            shares = [1.0]
+            if self.limit and self._start_balance is not None and self._balance is not None:
+                calls = sum(self._calls.values())
+                spent = self._start_balance - self._balance + calls * self.cost
+                shares.append((self.limit - spent) / self.limit)
+            quota = self.daily_limits.get(service)
+            if quota:
+                allowed = quota * (1 - self.reserve)
+                used = self._used.get(service, 0) + self._calls.get(service, 0)
+                shares.append((allowed - used) / allowed if allowed > 0 else 0.0)
+            return max(0.0, min(shares))
+
+    def delay(self, service: str) -> Optional[float]:
+        """Seconds to wait before the next bulk call, or None if the budget is spent."""
+        left = self.left(service)
+        if left <= 0:
+            return None
+        if left < self.slowdown:
+            return self.max_delay * (1 - left / self.slowdown)
+        return 0.0
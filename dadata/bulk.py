@@ -0,0 +1,99 @@
+"""
+Bulk operations over Dadata API.
+"""
+
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+
+class BulkResult(NamedTuple):
+    """Bulk lookup outcome"""
+
+    # suggestions for each input position, None if the lookup failed
+    results: List[Optional[List[Dict]]]
+    # unique IDs with no records found
+    not_found: List[str]
+    # unique IDs that failed, with errors
+    errors: Dict[str, Exception]
+    # affiliated parties for each unique ID found, if requested
+    affiliated: Dict[str, List[Dict]]
+    # unique IDs found whose affiliated parties lookup failed, with errors
+    affiliated_errors: Dict[str, Exception] = {}
+
+
+def collect(
+    queries: Sequence[str],
+    found: Dict[str, List[Dict]],
+    errors: Dict[str, Exception],
+    affiliated: Dict[str, List[Dict]],
+    affiliated_errors: Optional[Dict[str, Exception]] = None,
+) -> BulkResult:
+    """Map results for unique IDs back to every input position."""
+    unique = dict.fromkeys(queries)
+    affiliated_errors = affiliated_errors or {}
+    return BulkResult(
+        results=[found.get(query) for query in queries],
+        not_found=[query for query in unique if query in found and not found[query]],
+        errors={query: errors[query] for query in unique if query in errors},
+        affiliated={query: affiliated[query] for query in unique if query in affiliated},
+        affiliated_errors={
+            query: affiliated_errors[query] for query in unique if query in affiliated_errors
+        },
+    )
+
+
+def dedupe(
+    sources: Sequence[str], normalizer: Optional[Callable[[str], str]]
+) -> Tuple[List[str], Dict[str, str]]:
+    """Normalize sources. Return a key for each source and a representative source for each key."""
+    keys = [normalizer(source) for source in sources] if normalizer else list(sources)
+    unique: Dict[str, str] = {}
+    for source, key in zip(sources, keys):
+        unique.setdefault(key, source)
+    return keys, unique
+
+
+def fan_out(
+    sources: Sequence[str], keys: Sequence[str], found: Dict[str, Optional[Dict]]
+) -> List[Optional[Dict]]:
+    """Map results for unique keys back to every source, keeping the original `source` field."""
+    results = []
+    for source, key in zip(sources, keys):
+        result = found[key]
+        if result is not None and "source" in result and result["source"] != source:
+            result = dict(result, source=source)
+        results.append(result)
+    return results
+
+
+def cached(cache: Any, service: str, url: str, requests: Dict[str, Any]) -> Dict[str, Any]:
+    """Look request data up in response cache in a single round trip. Return responses by key."""
+    if not cache or not requests:
+        return {}
+    hits = cache.get_many(service, url, list(requests.values()))
+    return {key: value for key, (hit, value) in zip(requests, hits) if hit}
+
+
+def store(cache: Any, service: str, url: str, requests: Dict[str, Any], responses: Dict[str, Any]):
+    """Put responses by key to response cache in a single round trip."""
+    if not cache or not responses:
+        return
+    cache.put_many(service, url, [(requests[key], value) for key, value in responses.items()])
+
+
+async def acached(cache: Any, service: str, url: str, requests: Dict[str, Any]) -> Dict[str, Any]:
+    """Like `cached`, without blocking the event loop on backend I/O."""
+    if not cache or not requests:
+        return {}
+    hits = await cache.aget_many(service, url, list(requests.values()))
+    return {key: value for key, (hit, value) in zip(requests, hits) if hit}
+
+
+async def astore(
+    cache: Any, service: str, url: str, requests: Dict[str, Any], responses: Dict[str, Any]
+):
+    """Like `store`, without blocking the event loop on backend I/O."""
+    if not cache or not responses:
+        return
+    await cache.aput_many(
+        service, url, [(requests[key], value) for key, value in responses.items()]
+    )
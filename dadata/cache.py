@@ -0,0 +1,499 @@
+"""
+Client-side caches for Dadata API responses.
+"""
+
+import hashlib
+import ipaddress
+import itertools
+import asyncio
+import json
+import logging
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Collection, Dict, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple
+from dadata import settings
+from dadata.backends import BACKEND_ERRORS, CacheBackend, MemoryBackend
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r"\w+")
+_EARTH_RADIUS_METERS = 6371008.8
+_METERS_PER_DEGREE = math.pi * _EARTH_RADIUS_METERS / 180
+_GRID_DEGREES = 0.01
+
+
+def _words(text: str) -> List[str]:
+    """Split `text` into lowercase words."""
+    return _WORD_RE.findall(text.lower().replace("ё", "е"))
+
+
+def _scope(name: str, kwargs: Dict) -> str:
+    """Cache scope for `name` endpoint called with extra `kwargs`."""
+    return name + ":" + json.dumps(kwargs, sort_keys=True, ensure_ascii=False)
+
+
+def _affected(scope: str, directories: Optional[Collection[str]]) -> bool:
+    """Check if results in `scope` depend on updated `directories` (None means all)."""
+    return directories is None or scope.partition(":")[0] in directories
+
+
+def _matches(words: List[str], suggestion: Dict) -> bool:
+    """Check that every query word is a prefix of some word of the suggestion."""
+    text = f"{suggestion.get('value') or ''} {suggestion.get('unrestricted_value') or ''}"
+    targets = _words(text)
+    return all(any(target.startswith(word) for target in targets) for word in words)
+
+
+def _distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points in meters."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    hav = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * _EARTH_RADIUS_METERS * math.asin(min(1.0, math.sqrt(hav)))
+
+
+def _coordinates(suggestion: Dict) -> Optional[Tuple[float, float]]:
+    """Extract suggestion coordinates, if any."""
+    data = suggestion.get("data") or {}
+    try:
+        return float(data["geo_lat"]), float(data["geo_lon"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def nearest(
+    suggestions: List[Dict], lat: float, lon: float, radius_meters: float, count: int
+) -> Optional[List[Dict]]:
+    """Up to `count` suggestions within `radius_meters` of the point, nearest first.
+
+    For a (possibly truncated) `geolocate` answer centered at the point, this is exactly
+    the answer for a smaller radius. Return None if some suggestion has no coordinates.
+    """
+    found = []
+    for suggestion in suggestions:
+        coordinates = _coordinates(suggestion)
+        if coordinates is None:
+            return None
+        distance = _distance(lat, lon, coordinates[0], coordinates[1])
+        if distance <= radius_meters:
+            found.append((distance, suggestion))
+    found.sort(key=lambda item: item[0])
+    return [suggestion for _, suggestion in found[:count]]
+
+
+class _Suggestions(NamedTuple):
+    suggestions: List[Dict]
+    complete: bool
+    strict: bool
+    expires: float
+
+
+class SuggestionCache:
+    """Prefix-aware cache of `suggest` results.
+
+    Results are kept per endpoint name and extra request parameters (filters, bounds etc).
+    A result with fewer suggestions than requested (and than the API ever returns) is complete:
+    the API has nothing more for this query, and a longer query can only narrow it down.
+    If every suggestion in a complete result matches the query words by prefix (no typos
+    or synonyms involved), longer queries are answered locally by filtering it.
+    Everything else goes to the API.
+    """
+
+    def __init__(self, maxsize: int = settings.CACHE_SIZE, ttl: float = settings.CACHE_TTL_SEC):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple[str, str], _Suggestions]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, name: str, query: str, count: int, kwargs: Dict) -> Optional[List[Dict]]:
+        """Answer `query` from cache, or return None if it needs an API call."""
+        scope = _scope(name, kwargs)
+        words = _words(query)
+        key = " ".join(words)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._lookup((scope, key), now)
+            if entry and (entry.complete or len(entry.suggestions) >= count):
+                return entry.suggestions[:count]
+            for size in range(len(key) - 1, 0, -1):
+                entry = self._lookup((scope, key[:size]), now)
+                if not entry or not entry.complete or not entry.strict:
+                    continue
+                found = [item for item in entry.suggestions if _matches(words, item)]
+                # an empty answer may hide a typo the API would have corrected
+                return found[:count] if found else None
+        return None
+
+    def put(self, name: str, query: str, count: int, kwargs: Dict, suggestions: List[Dict]):
+        """Store API `suggestions` for `query`."""
+        words = _words(query)
+        key = (_scope(name, kwargs), " ".join(words))
+        entry = _Suggestions(
+            suggestions=suggestions,
+            complete=len(suggestions) < min(count, settings.SUGGESTION_MAX_COUNT),
+            strict=all(_matches(words, item) for item in suggestions),
+            expires=time.monotonic() + self.ttl,
+        )
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Remove all cached results."""
+        with self._lock:
+            self._entries.clear()
+
+    def invalidate(self, service: str, directories: Optional[Collection[str]] = None):
+        """Remove results from updated `directories` of `service` (all if None)."""
+        if service != "suggestions":
+            return
+        with self._lock:
+            for key in [key for key in self._entries if _affected(key[0], directories)]:
+                del self._entries[key]
+
+    def _lookup(self, key: Tuple[str, str], now: float) -> Optional[_Suggestions]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires <= now:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+
+class _Area(NamedTuple):
+    scope: str
+    lat: float
+    lon: float
+    radius: float
+    points: List[Tuple[float, float, Dict]]
+    expires: float
+
+
+class GeoCache:
+    """Spatial cache of `geolocate` results.
+
+    A result with fewer suggestions than requested (and than the API ever returns)
+    holds every address within the radius.
+    Any query whose circle lies inside such an area is answered locally: the cached
+    addresses are filtered by distance and sorted nearest first, as the API does.
+    Areas are indexed by a coarse lat/lon grid.
+    """
+
+    def __init__(self, maxsize: int = settings.CACHE_SIZE, ttl: float = settings.CACHE_TTL_SEC):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._areas: "OrderedDict[int, _Area]" = OrderedDict()
+        self._grid: Dict[Tuple[int, int], Set[int]] = {}
+        self._ids = itertools.count()
+        self._max_radius = 0.0
+        self._lock = threading.Lock()
+
+    def get(
+        self, name: str, lat: float, lon: float, radius_meters: float, kwargs: Dict
+    ) -> Optional[List[Dict]]:
+        """Answer the query from cache, or return None if it needs an API call."""
+        params = dict(kwargs)
+        count = params.pop("count", settings.SUGGESTION_COUNT)
+        scope = _scope(name, params)
+        now = time.monotonic()
+        with self._lock:
+            for area_id in self._nearby(lat, lon, self._max_radius):
+                area = self._areas[area_id]
+                if area.expires <= now:
+                    self._remove(area_id)
+                    continue
+                if area.scope != scope:
+                    continue
+                if _distance(area.lat, area.lon, lat, lon) + radius_meters > area.radius:
+                    continue
+                self._areas.move_to_end(area_id)
+                found = []
+                for point_lat, point_lon, suggestion in area.points:
+                    distance = _distance(lat, lon, point_lat, point_lon)
+                    if distance <= radius_meters:
+                        found.append((distance, suggestion))
+                found.sort(key=lambda item: item[0])
+                return [suggestion for _, suggestion in found[:count]]
+        return None
+
+    def put(
+        self,
+        name: str,
+        lat: float,
+        lon: float,
+        radius_meters: float,
+        kwargs: Dict,
+        suggestions: List[Dict],
+    ):
+        """Store API `suggestions` for the query."""
+        params = dict(kwargs)
+        count = params.pop("count", settings.SUGGESTION_COUNT)
+        if len(suggestions) >= min(count, settings.SUGGESTION_MAX_COUNT):
+            # truncated result says nothing about the rest of the area
+            return
+        points = []
+        for suggestion in suggestions:
+            coordinates = _coordinates(suggestion)
+            if coordinates is None:
+                return
+            points.append((coordinates[0], coordinates[1], suggestion))
+        area = _Area(
+            scope=_scope(name, params),
+            lat=lat,
+            lon=lon,
+            radius=radius_meters,
+            points=points,
+            expires=time.monotonic() + self.ttl,
+        )
+        with self._lock:
+            area_id = next(self._ids)
+            self._areas[area_id] = area
+            self._grid.setdefault(self._cell(lat, lon), set()).add(area_id)
+            self._max_radius = max(self._max_radius, radius_meters)
+            while len(self._areas) > self.maxsize:
+                self._remove(next(iter(self._areas)))
+
+    def clear(self):
+        """Remove all cached results."""
+        with self._lock:
+            self._areas.clear()
+            self._grid.clear()
+            self._max_radius = 0.0
+
+    def invalidate(self, service: str, directories: Optional[Collection[str]] = None):
+        """Remove results from updated `directories` of `service` (all if None)."""
+        if service != "suggestions":
+            return
+        with self._lock:
+            for area_id, area in list(self._areas.items()):
+                if _affected(area.scope, directories):
+                    self._remove(area_id)
+
+    @staticmethod
+    def _cell(lat: float, lon: float) -> Tuple[int, int]:
+        return math.floor(lat / _GRID_DEGREES), math.floor(lon / _GRID_DEGREES)
+
+    def _nearby(self, lat: float, lon: float, radius_meters: float) -> Iterator[int]:
+        """Areas centered within `radius_meters` of the point (and some more)."""
+        dlat = radius_meters / _METERS_PER_DEGREE
+        dlon = dlat / max(math.cos(math.radians(lat)), 0.01)
+        lat_min, lon_min = self._cell(lat - dlat, lon - dlon)
+        lat_max, lon_max = self._cell(lat + dlat, lon + dlon)
+        for cell_lat in range(lat_min, lat_max + 1):
+            for cell_lon in range(lon_min, lon_max + 1):
+                yield from list(self._grid.get((cell_lat, cell_lon), ()))
+
+    def _remove(self, area_id: int):
+        area = self._areas.pop(area_id)
+        cell = self._cell(area.lat, area.lon)
+        self._grid[cell].discard(area_id)
+        if not self._grid[cell]:
+            del self._grid[cell]
+
+
+class _Location(NamedTuple):
+    location: Optional[Dict]
+    expires: float
+
+
+class IPCache:
+    """Subnet-keyed cache of `iplocate` results.
+
+    An answer learned for one address is reused for its neighbors within a subnet
+    (/24 for IPv4 and /48 for IPv6 by default). Subnets live in binary tries,
+    one per address family, and lookups pick the longest matching prefix.
+    """
+
+    def __init__(
+        self,
+        ipv4_prefix: int = settings.IPV4_PREFIX,
+        ipv6_prefix: int = settings.IPV6_PREFIX,
+        maxsize: int = settings.CACHE_SIZE,
+        ttl: float = settings.CACHE_TTL_SEC,
+    ):
+        self.prefixes = {4: ipv4_prefix, 6: ipv6_prefix}
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._roots: Dict[Tuple[str, int], List[Any]] = {}
+        self._entries: "OrderedDict[Tuple[str, int, int, int], _Location]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, ip: str, kwargs: Dict) -> Tuple[bool, Optional[Dict]]:
+        """Look `ip` up in cache. Return (True, location) on hit and (False, None) on miss."""
+        try:
+            address = ipaddress.ip_address(ip)
+        except ValueError:
+            return False, None
+        value, bits = int(address), address.max_prefixlen
+        now = time.monotonic()
+        with self._lock:
+            node = self._roots.get((_scope("iplocate", kwargs), address.version))
+            found = None
+            for depth in range(bits + 1):
+                if node is None:
+                    break
+                if node[2] is not None and self._entries[node[2]].expires > now:
+                    found = node[2]
+                if depth == bits:
+                    break
+                node = node[(value >> (bits - depth - 1)) & 1]
+            if found is None:
+                return False, None
+            self._entries.move_to_end(found)
+            return True, self._entries[found].location
+
+    def put(self, ip: str, kwargs: Dict, location: Optional[Dict], prefix: Optional[int] = None):
+        """Store `location` for the subnet of `ip` (default prefix length if not given)."""
+        try:
+            address = ipaddress.ip_address(ip)
+        except ValueError:
+            return
+        prefix = self.prefixes[address.version] if prefix is None else prefix
+        network = ipaddress.ip_network(f"{address}/{prefix}", strict=False)
+        scope = _scope("iplocate", kwargs)
+        bits = address.max_prefixlen
+        value = int(network.network_address)
+        key = (scope, address.version, value, prefix)
+        with self._lock:
+            node = self._roots.setdefault((scope, address.version), [None, None, None])
+            for depth in range(prefix):
+                bit = (value >> (bits - depth - 1)) & 1
+                if node[bit] is None:
+                    node[bit] = [None, None, None]
+                node = node[bit]
+            node[2] = key
+            self._entries[key] = _Location(location=location, expires=time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+
+    def clear(self):
+        """Remove all cached results."""
+        with self._lock:
+            self._roots.clear()
+            self._entries.clear()
+
+    def invalidate(self, service: str, directories: Optional[Collection[str]] = None):
+        """Remove results from updated `directories` of `service` (all if None)."""
+        if service != "suggestions":
+            return
+        with self._lock:
+            for key in [key for key in self._entries if _affected(key[0], directories)]:
+                self._remove(key)
+
+    def _remove(self, key: Tuple[str, int, int, int]):
+        """Remove entry and prune trie nodes left empty."""
+        del self._entries[key]
+        scope, version, value, prefix = key
+        bits = 32 if version == 4 else 128
+        path = [self._roots[(scope, version)]]
+        for depth in range(prefix):
+            path.append(path[-1][(value >> (bits - depth - 1)) & 1])
+        path[-1][2] = None
+        for depth in range(prefix, 0, -1):
+            node = path[depth]
+            if node[0] is not None or node[1] is not None or node[2] is not None:
+                break
+            path[depth - 1][(value >> (bits - depth)) & 1] = None
+
+
+class ResponseCache:
+    """Cache of API responses to repeated requests, like `find_by_id` or `clean`.
+
+    Only the very same request (endpoint and parameters) is answered from cache.
+    Responses are kept in process memory by default. Pass a shared `backend`
+    (see `dadata.backends`) to share them between worker processes.
+    Backend failures are logged and never fail the request: lookups
+    turn into misses and stores are skipped.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = settings.CACHE_SIZE,
+        ttl: float = settings.CACHE_TTL_SEC,
+        backend: Optional[CacheBackend] = None,
+    ):
+        self.ttl = ttl
+        self.backend = MemoryBackend(maxsize) if backend is None else backend
+
+    def get(self, service: str, url: str, data: Any) -> Tuple[bool, Any]:
+        """Look request up in cache. Return (True, response) on hit and (False, None) on miss."""
+        return self.get_many(service, url, [data])[0]
+
+    def get_many(self, service: str, url: str, items: Sequence[Any]) -> List[Tuple[bool, Any]]:
+        """Look requests with given data up in cache, in a single round trip."""
+        try:
+            values = self.backend.get_many([_response_key(service, url, data) for data in items])
+            return [
+                (False, None) if value is None else (True, json.loads(value)) for value in values
+            ]
+        except (*BACKEND_ERRORS, ValueError):
+            logger.warning("Response cache lookup failed", exc_info=True)
+            return [(False, None)] * len(items)
+
+    def put(self, service: str, url: str, data: Any, value: Any):
+        """Store API response to the request."""
+        self.put_many(service, url, [(data, value)])
+
+    def put_many(self, service: str, url: str, items: Sequence[Tuple[Any, Any]]):
+        """Store API responses to requests with given data, in a single round trip."""
+        encoded = {
+            _response_key(service, url, data): json.dumps(value, ensure_ascii=False).encode()
+            for data, value in items
+        }
+        try:
+            self.backend.set_many(encoded, self.ttl)
+        except BACKEND_ERRORS:
+            logger.warning("Response cache store failed", exc_info=True)
+
+    async def aget(self, service: str, url: str, data: Any) -> Tuple[bool, Any]:
+        """Like `get`, without blocking the event loop on backend I/O."""
+        return (await self.aget_many(service, url, [data]))[0]
+
+    async def aget_many(
+        self, service: str, url: str, items: Sequence[Any]
+    ) -> List[Tuple[bool, Any]]:
+        """Like `get_many`, without blocking the event loop on backend I/O."""
+        return await self._offload(self.get_many, service, url, items)
+
+    async def aput(self, service: str, url: str, data: Any, value: Any):
+        """Like `put`, without blocking the event loop on backend I/O."""
+        await self.aput_many(service, url, [(data, value)])
+
+    async def aput_many(self, service: str, url: str, items: Sequence[Tuple[Any, Any]]):
+        """Like `put_many`, without blocking the event loop on backend I/O."""
+        await self._offload(self.put_many, service, url, items)
+
+    async def _offload(self, call, *args):
+        """Run backend call in a worker thread, unless backend answers right away."""
+        if not self.backend.blocking:
+            return call(*args)
+        return await asyncio.get_running_loop().run_in_executor(None, call, *args)
+
+    def clear(self):
+        """Remove all cached responses."""
+        self.backend.clear()
+
+    def invalidate(self, service: str, directories: Optional[Collection[str]] = None):
+        """Remove responses from updated `directories` of `service` (all if None)."""
+        if directories is None:
+            self.backend.delete_prefix(f"{service}:")
+            return
+        for directory in directories:
+            self.backend.delete_prefix(f"{service}:{directory}:")
+
+
+def _response_key(service: str, url: str, data: Any) -> str:
+    """Cache key for request, starting with service and directory to invalidate by prefix."""
+    payload = json.dumps(data, sort_keys=True, ensure_ascii=False).encode()
+    # url ends with directory name, like findById/party
+    directory = url.rpartition("/")[2]
+    return f"{service}:{directory}:{url}:{hashlib.sha1(payload).hexdigest()}"
@@ -0,0 +1,210 @@
+"""
+Columnar input and output for pandas and Arrow.
+"""
+
+import math
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+from dadata import bulk, settings
+from dadata.normalize import DEFAULT_NORMALIZER, Normalizer
+
+Columns = Dict[str, List[Any]]
+
+# suggestion fields with numbers, often given as strings
+NUMERIC_FIELDS: Dict[str, Callable[[Any], Any]] = {
+    "data.geo_lat": float,
+    "data.geo_lon": float,
+    "data.capital.value": float,
+    "data.employee_count": int,
+    "data.finance.year": int,
+    "data.finance.income": float,
+    "data.finance.revenue": float,
+    "data.finance.expense": float,
+    "data.finance.debt": float,
+    "data.finance.penalty": float,
+}
+
+
+def clean_column(
+    client,
+    name: str,
+    column,
+    fields: Optional[Sequence[str]] = None,
+    concurrency: int = settings.BULK_CONCURRENCY,
+    normalizer: Optional[Normalizer] = DEFAULT_NORMALIZER,
+):
+    """Cleanse a column of values as `name` data type.
+
+    `column` is a pandas Series, an Arrow array, a NumPy array or any sequence.
+    Returns selected result `fields` (all by default) as a pandas DataFrame, an Arrow table
+    or a dict of lists, according to the input type. Missing values stay empty.
+    """
+    values = _values(column)
+    keys, unique = bulk.dedupe([value for value in values if value is not None], normalizer)
+    results = client.clean_many(name, list(unique.values()), concurrency, normalizer=None)
+    return _table(_assemble(values, keys, list(unique), results, fields), column)
+
+
+async def aclean_column(
+    client,
+    name: str,
+    column,
+    fields: Optional[Sequence[str]] = None,
+    concurrency: int = settings.BULK_CONCURRENCY,
+    normalizer: Optional[Normalizer] = DEFAULT_NORMALIZER,
+):
+    """Cleanse a column of values as `name` data type with async client."""
+    values = _values(column)
+    keys, unique = bulk.dedupe([value for value in values if value is not None], normalizer)
+    results = await client.clean_many(name, list(unique.values()), concurrency, normalizer=None)
+    return _table(_assemble(values, keys, list(unique), results, fields), column)
+
+
+def flatten(
+    suggestions: Iterable[Dict],
+    fields: Optional[Sequence[str]] = None,
+    types: Optional[Dict[str, Callable[[Any], Any]]] = None,
+    arrow: bool = False,
+) -> Dict[str, Any]:
+    """Turn suggestions (as returned by suggest, find_by_id or geolocate) into columns.
+
+    Nested fields are named by dotted paths ("data.address.value"). Returns selected
+    `fields` (all by default) as lists, or as Arrow arrays with `arrow`.
+    Fields listed in `types` (NUMERIC_FIELDS by default) are converted to numbers.
+    """
+    types = NUMERIC_FIELDS if types is None else types
+    if fields is None:
+        columns, count = _flatten_all(suggestions)
+    else:
+        columns, count = _flatten_fields(suggestions, fields)
+    for name, values in columns.items():
+        if len(values) < count:
+            values.extend([None] * (count - len(values)))
+        if name in types:
+            columns[name] = _convert(values, types[name])
+    if not arrow:
+        return columns
+    import pyarrow  # type: ignore
+
+    arrow_types = {float: pyarrow.float64(), int: pyarrow.int64()}
+    return {
+        name: pyarrow.array(values, type=arrow_types.get(types.get(name)))  # type: ignore
+        for name, values in columns.items()
+    }
+
+
+def _flatten_all(suggestions: Iterable[Dict]):
+    """Columns for every leaf field met in suggestions."""
+    columns: Columns = {}
+    count = 0
+    for suggestion in suggestions:
+        _collect(suggestion, "", columns, count)
+        count += 1
+    return columns, count
+
+
+def _collect(record: Dict, prefix: str, columns: Columns, row: int):
+    """Append leaf fields of `record` to columns, padding rows that lacked them."""
+    for key, value in record.items():
+        name = prefix + key
+        if isinstance(value, dict):
+            _collect(value, name + ".", columns, row)
+            continue
+        values = columns.get(name)
+        if values is None:
+            values = columns[name] = [None] * row
+        elif len(values) < row:
+            values.extend([None] * (row - len(values)))
+        values.append(value)
+
+
+def _flatten_fields(suggestions: Iterable[Dict], fields: Sequence[str]):
+    """Columns for given fields only."""
+    paths = [(field, field.split(".")) for field in fields]
+    columns: Columns = {field: [] for field in fields}
+    count = 0
+    for suggestion in suggestions:
+        for field, path in paths:
+            value: Any = suggestion
+            for key in path:
+                value = value.get(key) if isinstance(value, dict) else None
+            columns[field].append(value)
+        count += 1
+    return columns, count
+
+
+def _convert(values: List[Any], to_type: Callable[[Any], Any]) -> List[Any]:
+    """Convert values to numbers, None where impossible."""
+    converted = []
+    for value in values:
+        try:
+            converted.append(None if value is None or value == "" else to_type(value))
+        except (TypeError, ValueError):
+            converted.append(None)
+    return converted
+
+
+def _values(column) -> List[Optional[str]]:
+    """Column values as strings, None for missing ones."""
+    isna: Optional[Callable[[Any], Any]] = None
+    if hasattr(column, "to_pylist"):
+        # Arrow array
+        values = column.to_pylist()
+    elif hasattr(column, "tolist"):
+        # pandas Series or NumPy array
+        values = column.tolist()
+        if type(column).__module__.startswith("pandas"):
+            import pandas  # type: ignore
+
+            # pd.NA and NaT, which cannot be compared
+            isna = pandas.isna
+    else:
+        values = list(column)
+    return [None if _missing(value, isna) else str(value) for value in values]
+
+
+def _missing(value: Any, isna: Optional[Callable[[Any], Any]]) -> bool:
+    """Whether a column value is missing: None, NaN or a pandas missing value."""
+    if value is None:
+        return True
+    if isinstance(value, float):
+        return math.isnan(value)
+    return isna is not None and isna(value) is True
+
+
+def _assemble(
+    values: List[Optional[str]],
+    keys: List[str],
+    unique: List[str],
+    results: List[Optional[Dict]],
+    fields: Optional[Sequence[str]],
+) -> Columns:
+    """Build result columns for every row from results for unique values."""
+    if fields is None:
+        fields = list(dict.fromkeys(field for result in results if result for field in result))
+    position = {key: index for index, key in enumerate(unique)}
+    remaining = iter(keys)
+    # missing values point past the end of unique results
+    rows = [-1 if value is None else position[next(remaining)] for value in values]
+    columns: Columns = {}
+    for field in fields:
+        if field == "source":
+            columns[field] = list(values)
+            continue
+        cleaned = [result.get(field) if result else None for result in results]
+        cleaned.append(None)
+        columns[field] = [cleaned[row] for row in rows]
+    return columns
+
+
+def _table(columns: Columns, like):
+    """Convert columns to a table of the same kind as `like` column."""
+    library = type(like).__module__.split(".")[0]
+    if library == "pandas":
+        import pandas  # type: ignore
+
+        return pandas.DataFrame(columns, index=like.index)
+    if library == "pyarrow":
+        import pyarrow  # type: ignore
+
+        return pyarrow.table(columns)
+    return columns
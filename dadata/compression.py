@@ -0,0 +1,90 @@
+"""
+Compression of request and response bodies.
+"""
+
+import gzip
+import json
+import zlib
+from typing import Any, Callable, Dict, Tuple
+
+try:
+    # private httpx module, may move in later versions
+    from httpx import _decoders as httpx_decoders
+except ImportError:  # pragma: no cover
+    httpx_decoders = None  # type: ignore[assignment]
+
+try:
+    import brotli  # type: ignore
+except ImportError:  # pragma: no cover
+    brotli = None
+
+try:
+    import zstandard  # type: ignore
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+
+def _encoders() -> Dict[str, Callable[[bytes], bytes]]:
+    encoders: Dict[str, Callable[[bytes], bytes]] = {}
+    if zstandard is not None:
+        # zstandard compressors are not thread-safe, so each call gets its own
+        encoders["zstd"] = lambda body: zstandard.ZstdCompressor().compress(body)
+    if brotli is not None:
+        encoders["br"] = brotli.compress
+    encoders["gzip"] = lambda body: gzip.compress(body, compresslevel=6)
+    return encoders
+
+
+# available codecs, best first
+ENCODERS = _encoders()
+
+
+def _decoders() -> Dict[str, Callable[[bytes], bytes]]:
+    decoders: Dict[str, Callable[[bytes], bytes]] = {}
+    if zstandard is not None:
+        decoders["zstd"] = lambda body: zstandard.ZstdDecompressor().decompress(body)
+    if brotli is not None:
+        decoders["br"] = brotli.decompress
+    decoders["gzip"] = gzip.decompress
+    decoders["deflate"] = zlib.decompress
+    return decoders
+
+
+DECODERS = _decoders()
+
+
+def accept_encoding() -> str:
+    """Accept-Encoding header value listing codecs httpx can decode responses with.
+
+    httpx decodes responses itself, and its codecs may differ from the ones found here.
+    """
+    supported = getattr(httpx_decoders, "SUPPORTED_DECODERS", {"gzip": None, "deflate": None})
+    return ", ".join(name for name in ("zstd", "br", "gzip", "deflate") if name in supported)
+
+
+def encode_json(data: Any) -> bytes:
+    """Encode request body the same way httpx does."""
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), allow_nan=False).encode()
+
+
+def compress(data: Any, encoding: str, min_size: int) -> Tuple[bytes, Dict[str, str]]:
+    """Encode request body, compressing it if it is at least `min_size` bytes.
+    Return body and extra headers."""
+    if encoding not in ENCODERS:
+        raise ValueError(f"Unsupported compression: {encoding}")
+    body = encode_json(data)
+    if len(body) < min_size:
+        return body, {}
+    return ENCODERS[encoding](body), {"Content-Encoding": encoding}
+
+
+def decompress(body: bytes, encoding: str) -> bytes:
+    """Decode request body compressed with given Content-Encoding."""
+    if not encoding or encoding == "identity":
+        return body
+    if encoding not in DECODERS:
+        raise ValueError(f"Unsupported compression: {encoding}")
+    try:
+        return DECODERS[encoding](body)
+    except Exception as exc:
+        raise ValueError(f"Invalid {encoding} body") from exc
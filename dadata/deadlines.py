@@ -0,0 +1,73 @@
+"""
+Per-call deadlines.
+"""
+
+import contextlib
+import contextvars
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Iterator, Optional
+import httpx
+
+
+class DeadlineExceeded(httpx.TimeoutException):
+    """Call deadline has passed before the request could complete"""
+
+
+_deadline: ContextVar[Optional[float]] = ContextVar("dadata_deadline", default=None)
+
+
+@contextlib.contextmanager
+def deadline(seconds: float) -> Iterator[None]:
+    """Give calls made within the block `seconds` to complete, including time in queues.
+
+    Nested deadlines can only shorten the outer one.
+    """
+    until = time.monotonic() + seconds
+    outer = _deadline.get()
+    token = _deadline.set(until if outer is None else min(outer, until))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left until the deadline of the current context, None if there is no deadline."""
+    until = _deadline.get()
+    return None if until is None else until - time.monotonic()
+
+
+def check(wait: float = 0.0):
+    """Raise DeadlineExceeded if the deadline passes within `wait` seconds from now."""
+    left = remaining()
+    if left is not None and left <= wait:
+        raise DeadlineExceeded("Deadline exceeded before the request was sent")
+
+
+def timeout(default: httpx.Timeout) -> httpx.Timeout:
+    """Request timeout cut to fit the time remaining until the deadline."""
+    left = remaining()
+    if left is None:
+        return default
+
+    def cut(value: Optional[float]) -> float:
+        return left if value is None else min(value, left)
+
+    return httpx.Timeout(
+        connect=cut(default.connect),
+        read=cut(default.read),
+        write=cut(default.write),
+        pool=cut(default.pool),
+    )
+
+
+def bind(call: Callable) -> Callable:
+    """Wrap `call` to run with context (deadline, tracing) of the caller, e.g. on a worker."""
+    context = contextvars.copy_context()
+
+    def run(*args: Any) -> Any:
+        # a context can be entered by one thread at a time
+        return context.copy().run(call, *args)
+
+    return run
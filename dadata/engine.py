@@ -0,0 +1,248 @@
+"""
+Multi-process bulk engine for very large datasets.
+"""
+
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from multiprocessing.util import Finalize
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from dadata import settings
+from dadata.asynchr import DadataClient
+
+Sink = Callable[[int, List[Any]], None]
+Shard = Tuple[str, int, List[str], Dict]
+
+# state of the current worker process
+_worker: Dict[str, Any] = {}
+
+
+class SharedRateLimiter:
+    """Rate limit shared by worker processes"""
+
+    def __init__(self, rate: float, context=None):
+        context = context or multiprocessing.get_context()
+        self.rate = rate
+        self._next = context.Value("d", 0.0)
+
+    def acquire(self) -> float:
+        """Reserve the next request slot. Return seconds to wait for it."""
+        with self._next.get_lock():
+            now = time.time()
+            start = max(now, self._next.value)
+            self._next.value = start + 1 / self.rate
+        return start - now
+
+
+def _init_worker(
+    token: str,
+    secret: Optional[str],
+    timeout: int,
+    concurrency: int,
+    limiter: Optional[SharedRateLimiter],
+):
+    """Start an event loop and an async client for the worker process."""
+    loop = asyncio.new_event_loop()
+    client = DadataClient(token=token, secret=secret, timeout=timeout)
+    client._cleaner.limiter = limiter
+    client._suggestions.limiter = limiter
+    _worker.update(loop=loop, client=client, concurrency=concurrency)
+
+
+def _init_process(*args):
+    """Set up a worker process and close its client on exit."""
+    _init_worker(*args)
+    Finalize(None, _close_worker, exitpriority=10)
+
+
+def _close_worker():
+    if not _worker:
+        return
+    loop, client = _worker.pop("loop"), _worker.pop("client")
+    loop.run_until_complete(client.close())
+    loop.close()
+
+
+def _shard_key(method: str, items: List[str], kwargs: Dict) -> str:
+    """Digest of a shard job, so that checkpoints of other jobs are not reused."""
+    job = json.dumps([method, kwargs, items], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(job.encode("utf-8")).hexdigest()
+
+
+def _run_shard(shard: Shard) -> Tuple[int, List[Any], Dict[str, str]]:
+    """Process a shard of input in the worker process. Return results and failed IDs."""
+    method, offset, items, kwargs = shard
+    loop, client, concurrency = _worker["loop"], _worker["client"], _worker["concurrency"]
+    if method == "clean":
+        job = client.clean_many(sources=items, concurrency=concurrency, **kwargs)
+        return offset, loop.run_until_complete(job), {}
+    job = client.find_by_ids(queries=items, concurrency=concurrency, **kwargs)
+    result = loop.run_until_complete(job)
+    # errors as text, as they go back from worker processes
+    return offset, result.results, {query: repr(exc) for query, exc in result.errors.items()}
+
+
+class BulkEngine:
+    """Runs bulk jobs on a pool of processes.
+
+    Input is split into shards of `shard_size` items. Each worker process runs its own
+    async client with up to `concurrency` requests in flight, and all workers share
+    the `rate` limit (requests per second). Results are returned in input order, or passed
+    to a `sink(offset, results)` shard by shard. Completed shards are appended
+    to the `checkpoint` file, so a restarted job skips them. Saved shards are reused
+    only for the same method, parameters and input items. Shards with failed lookups
+    are not saved, so a restarted job retries them; errors of the last job are in `errors`.
+    With `processes=0`, shards run in the calling process.
+    """
+
+    def __init__(
+        self,
+        token: str,
+        secret: Optional[str] = None,
+        timeout: int = settings.TIMEOUT_SEC,
+        processes: Optional[int] = None,
+        concurrency: int = settings.BULK_CONCURRENCY,
+        shard_size: int = settings.SHARD_SIZE,
+        rate: Optional[float] = None,
+        checkpoint: Optional[str] = None,
+    ):
+        self.token = token
+        self.secret = secret
+        self.timeout = timeout
+        self.processes = (os.cpu_count() or 1) if processes is None else processes
+        self.concurrency = concurrency
+        self.shard_size = shard_size
+        self.rate = rate
+        self.checkpoint = checkpoint
+        # failed IDs of the last job, with errors
+        self.errors: Dict[str, str] = {}
+
+    def clean(
+        self, name: str, sources: Sequence[str], sink: Optional[Sink] = None, ordered: bool = True
+    ) -> Optional[List[Optional[Dict]]]:
+        """Cleanse `sources` as `name` data type."""
+        return self._run("clean", sources, {"name": name}, sink, ordered)
+
+    def find_by_id(
+        self,
+        name: str,
+        queries: Sequence[str],
+        sink: Optional[Sink] = None,
+        ordered: bool = True,
+        **kwargs,
+    ) -> Optional[List[Optional[List[Dict]]]]:
+        """Find records in `name` directory by their IDs."""
+        kwargs["name"] = name
+        return self._run("find_by_id", queries, kwargs, sink, ordered)
+
+    def _run(
+        self, method: str, items: Sequence[str], kwargs: Dict, sink: Optional[Sink], ordered: bool
+    ) -> Optional[List[Any]]:
+        results: List[Any] = []
+        self.errors = {}
+        for offset, shard_results in self._shards(method, items, kwargs, ordered):
+            if sink is None:
+                results.extend(shard_results)
+            else:
+                sink(offset, shard_results)
+        return results if sink is None else None
+
+    def _shards(
+        self, method: str, items: Sequence[str], kwargs: Dict, ordered: bool
+    ) -> Iterator[Tuple[int, List[Any]]]:
+        """Yield results shard by shard, from checkpoint or from workers."""
+        saved = self._load_checkpoint()
+        done: Dict[int, List[Any]] = {}
+        pending: List[Shard] = []
+        keys: Dict[int, str] = {}
+        for offset in range(0, len(items), self.shard_size):
+            chunk = list(items[offset : offset + self.shard_size])
+            keys[offset] = _shard_key(method, chunk, kwargs)
+            results = saved.get((offset, keys[offset]))
+            if results is not None and len(results) == len(chunk):
+                done[offset] = results
+            else:
+                pending.append((method, offset, chunk, kwargs))
+        computed = self._compute(pending, ordered)
+        if not ordered:
+            yield from done.items()
+            for offset, shard_results, errors in computed:
+                self._finish(offset, keys[offset], shard_results, errors)
+                yield offset, shard_results
+            return
+        for offset in range(0, len(items), self.shard_size):
+            if offset in done:
+                yield offset, done[offset]
+                continue
+            _, shard_results, errors = next(computed)
+            self._finish(offset, keys[offset], shard_results, errors)
+            yield offset, shard_results
+        # let the pool shut down
+        next(computed, None)
+
+    def _finish(self, offset: int, key: str, results: List[Any], errors: Dict[str, str]):
+        """Save a computed shard to checkpoint, unless some of its lookups failed."""
+        if errors:
+            self.errors.update(errors)
+            return
+        self._save_checkpoint(offset, key, results)
+
+    def _compute(
+        self, shards: List[Shard], ordered: bool
+    ) -> Iterator[Tuple[int, List[Any], Dict[str, str]]]:
+        """Run shards on worker processes."""
+        if not shards:
+            return
+        limiter = SharedRateLimiter(self.rate) if self.rate else None
+        args = (self.token, self.secret, self.timeout, self.concurrency, limiter)
+        if self.processes == 0:
+            _init_worker(*args)
+            try:
+                yield from map(_run_shard, shards)
+            finally:
+                _close_worker()
+            return
+        pool = multiprocessing.Pool(self.processes, initializer=_init_process, initargs=args)
+        try:
+            mapper = pool.imap if ordered else pool.imap_unordered
+            yield from mapper(_run_shard, shards)
+        except BaseException:
+            pool.terminate()
+            raise
+        else:
+            pool.close()
+        finally:
+            pool.join()
+
+    def _load_checkpoint(self) -> Dict[Tuple[int, str], List[Any]]:
+        """Saved shard results by offset and shard key."""
+        done: Dict[Tuple[int, str], List[Any]] = {}
+        if not self.checkpoint or not os.path.exists(self.checkpoint):
+            return done
+        line = ""
+        with open(self.checkpoint, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # a line cut short by a crash
+                    continue
+                if "shard" not in record:
+                    # written before shard keys, may belong to another job
+                    continue
+                done[(record["offset"], record["shard"])] = record["results"]
+        if line and not line.endswith("\n"):
+            with open(self.checkpoint, "a", encoding="utf-8") as file:
+                file.write("\n")
+        return done
+
+    def _save_checkpoint(self, offset: int, key: str, results: List[Any]):
+        if not self.checkpoint:
+            return
+        record = {"offset": offset, "shard": key, "results": results}
+        with open(self.checkpoint, "a", encoding="utf-8") as file:
+            file.write(json.dumps(record, ensure_ascii=False))
+            file.write("\n")
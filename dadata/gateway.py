@@ -0,0 +1,200 @@
+"""
+Local gateway that serves Dadata API to many client processes over one upstream path.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple, Union
+from urllib.parse import parse_qsl, urlsplit
+import httpx
+from dadata import settings
+from dadata import compression as codecs
+from dadata.asynchr import ClientBase, CleanClient, ProfileClient, SuggestClient
+from dadata.cache import ResponseCache
+from dadata.engine import SharedRateLimiter
+from dadata.keys import KeyPool
+from dadata.scheduling import Scheduler, SchedulerFull
+from dadata.server import Server
+
+# services whose POST responses depend only on the request, so they can be cached
+CACHED_SERVICES = {CleanClient.SERVICE, SuggestClient.SERVICE}
+
+Batch = List[Tuple[str, "asyncio.Future[Any]"]]
+
+
+class Gateway(Server):
+    """HTTP server that proxies Dadata API for clients on the same host.
+
+    Serves Cleaner, Suggestions and Profile API under `/clean/`, `/suggestions/` and
+    `/profile/` paths, so a client made with `base_url=gateway.url` works unchanged.
+    All calls share one set of API keys, connection pool, rate limit and `response_cache`.
+    Identical requests in flight are sent upstream once, and single-source `clean`
+    requests arriving within `batch_window` seconds are sent together.
+    """
+
+    def __init__(
+        self,
+        token: Union[str, KeyPool],
+        secret: Optional[str] = None,
+        host: str = "127.0.0.1",
+        port: int = settings.GATEWAY_PORT,
+        timeout: int = settings.TIMEOUT_SEC,
+        rate: Optional[float] = None,
+        scheduler: Optional[Scheduler] = None,
+        response_cache: Optional[ResponseCache] = None,
+        batch_window: float = settings.GATEWAY_BATCH_WINDOW_SEC,
+        max_batch: int = settings.GATEWAY_MAX_BATCH,
+    ):
+        super().__init__(host=host, port=port)
+        self.response_cache = response_cache
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        limiter = SharedRateLimiter(rate) if rate else None
+        self._clients: Dict[str, ClientBase] = {
+            CleanClient.SERVICE: CleanClient(
+                token=token, secret=secret, timeout=timeout, scheduler=scheduler
+            ),
+            SuggestClient.SERVICE: SuggestClient(
+                token=token, secret=secret, timeout=timeout, scheduler=scheduler
+            ),
+            ProfileClient.SERVICE: ProfileClient(
+                token=token, secret=secret, timeout=timeout, scheduler=scheduler
+            ),
+        }
+        for client in self._clients.values():
+            client.limiter = limiter
+        self._inflight: Dict[Tuple, "asyncio.Future[Any]"] = {}
+        self._batches: Dict[str, Tuple[Batch, asyncio.TimerHandle]] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def close(self):
+        """Stop the server and close upstream connections"""
+        await super().close()
+        for client in self._clients.values():
+            await client.close()
+
+    async def _respond(
+        self, method: str, target: str, headers: Dict[str, str], body: bytes
+    ) -> Tuple[int, bytes]:
+        """Answer a request with status code and JSON body."""
+        parts = urlsplit(target)
+        service, _, url = parts.path.lstrip("/").partition("/")
+        client = self._clients.get(service)
+        if client is None or not url or method not in ("GET", "POST"):
+            return 404, b'{"detail":"Not found"}'
+        try:
+            if method == "GET":
+                params = dict(parse_qsl(parts.query))
+                key = (method, service, url, parts.query)
+                result = await self._single_flight(key, lambda: client._get(url, params))
+            else:
+                raw = codecs.decompress(body, headers.get("content-encoding", ""))
+                result = await self._post(client, service, url, json.loads(raw))
+        except ValueError:
+            return 400, b'{"detail":"Invalid request body"}'
+        except httpx.HTTPStatusError as exc:
+            return exc.response.status_code, exc.response.content
+        except SchedulerFull:
+            return 503, b'{"detail":"Too many requests queued"}'
+        except httpx.TimeoutException:
+            return 504, b'{"detail":"Upstream timeout"}'
+        except httpx.HTTPError:
+            return 502, b'{"detail":"Upstream unavailable"}'
+        return 200, codecs.encode_json(result)
+
+    async def _post(self, client: ClientBase, service: str, url: str, data: Any) -> Any:
+        """POST request answered from cache, by a request in flight or upstream"""
+        cache = self.response_cache if service in CACHED_SERVICES else None
+        if cache is not None:
+            hit, cached = await cache.aget(service, url, data)
+            if hit:
+                return cached
+        key = ("POST", service, url, json.dumps(data, sort_keys=True, ensure_ascii=False))
+        if service == CleanClient.SERVICE and _is_single(data) and self.max_batch > 1:
+            result = await self._single_flight(key, lambda: self._batched(url, data[0]))
+        else:
+            result = await self._single_flight(key, lambda: client._post(url, data))
+        if cache is not None:
+            await cache.aput(service, url, data, result)
+        return result
+
+    async def _single_flight(self, key: Tuple, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Share the result of `fetch()` between identical requests in flight."""
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(fetch())
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # a client that disconnects must not cancel the request for the others
+        return await asyncio.shield(future)
+
+    async def _batched(self, url: str, source: str) -> List[Any]:
+        """Clean `source` along with other sources sent to `url` at about the same time."""
+        loop = asyncio.get_running_loop()
+        future: "asyncio.Future[Any]" = loop.create_future()
+        if url not in self._batches:
+            timer = loop.call_later(self.batch_window, self._flush, url)
+            self._batches[url] = ([], timer)
+        batch = self._batches[url][0]
+        batch.append((source, future))
+        if len(batch) >= self.max_batch:
+            self._flush(url)
+        return await future
+
+    def _flush(self, url: str):
+        """Send the pending batch for `url` upstream."""
+        batch, timer = self._batches.pop(url)
+        timer.cancel()
+        task = asyncio.ensure_future(self._send_batch(url, batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send_batch(self, url: str, batch: Batch):
+        client = self._clients[CleanClient.SERVICE]
+        try:
+            records = await client._post(url, [source for source, _ in batch])
+            if len(records) != len(batch):
+                raise httpx.DecodingError(f"Expected {len(batch)} records, got {len(records)}")
+        except Exception as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for (_, future), record in zip(batch, records):
+            if not future.done():
+                future.set_result([record])
+
+
+def _is_single(data: Any) -> bool:
+    return isinstance(data, list) and len(data) == 1 and isinstance(data[0], str)
+
+
+def main(args: Optional[List[str]] = None):
+    """Run gateway from command line: python -m dadata.gateway --port 8080"""
+    parser = argparse.ArgumentParser(description="Local Dadata API gateway")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=settings.GATEWAY_PORT)
+    parser.add_argument("--rate", type=float, help="upstream requests per second")
+    parser.add_argument("--cache-size", type=int, default=settings.CACHE_SIZE)
+    parser.add_argument("--cache-ttl", type=float, default=settings.CACHE_TTL_SEC)
+    options = parser.parse_args(args)
+    token = os.environ.get("DADATA_API_KEY")
+    if not token:
+        parser.error("DADATA_API_KEY environment variable is required")
+    gateway = Gateway(
+        token=token,
+        secret=os.environ.get("DADATA_SECRET_KEY"),
+        host=options.host,
+        port=options.port,
+        rate=options.rate,
+        response_cache=ResponseCache(maxsize=options.cache_size, ttl=options.cache_ttl),
+    )
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(gateway.serve_forever())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Pool of Dadata API keys.
+"""
+
+import threading
+import time
+from typing import Callable, List, Optional, Sequence, Tuple, Union
+from dadata import settings
+
+# responses that say the key is unusable, at least for a while
+KEY_ERRORS = {401, 402, 403, 429}
+
+
+class KeyPoolExhausted(Exception):
+    """No API key in the pool can make a request: all revoked or cooling down for too long"""
+
+
+class _Key:
+    def __init__(self, token: str, secret: Optional[str], rate: Optional[float], now: float):
+        self.token = token
+        self.secret = secret
+        self.rate = rate
+        self.tokens = max(1.0, rate or 1.0)
+        self.updated = now
+        self.revoked = False
+        self.failures = 0
+        self.cooldown_until = 0.0
+
+    def ready_at(self, now: float) -> float:
+        """Time when the key can make the next request."""
+        ready = max(now, self.cooldown_until)
+        if self.rate:
+            tokens = min(max(1.0, self.rate), self.tokens + (now - self.updated) * self.rate)
+            if tokens < 1:
+                ready = max(ready, now + (1 - tokens) / self.rate)
+        return ready
+
+    def take(self, now: float):
+        if not self.rate:
+            return
+        capacity = max(1.0, self.rate)
+        self.tokens = min(capacity, self.tokens + (now - self.updated) * self.rate) - 1
+        self.updated = now
+
+
+class KeyPool:
+    """Several API keys that share the load.
+
+    Requests go to keys in turn, each key limited to `rate` requests per second.
+    A key that gets 401 is revoked for good. A key that gets 402, 403 (quota exhausted)
+    or 429 rests for `cooldown` seconds, twice as long after each consecutive failure.
+    """
+
+    def __init__(
+        self,
+        keys: Sequence[Union[str, Tuple[str, Optional[str]]]],
+        rate: Optional[float] = None,
+        cooldown: float = settings.KEY_COOLDOWN_SEC,
+        max_cooldown: float = settings.KEY_MAX_COOLDOWN_SEC,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if not keys:
+            raise ValueError("At least one API key is required")
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self._clock = clock
+        now = clock()
+        self._keys = []
+        for key in keys:
+            token, secret = (key, None) if isinstance(key, str) else key
+            self._keys.append(_Key(token, secret, rate, now))
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def credentials(self) -> List[Tuple[str, Optional[str]]]:
+        """Token and secret of each key."""
+        return [(key.token, key.secret) for key in self._keys]
+
+    def available(self) -> int:
+        """Number of keys ready to make a request right now."""
+        with self._lock:
+            now = self._clock()
+            return sum(1 for key in self._keys if not key.revoked and key.ready_at(now) <= now)
+
+    def acquire(self, max_wait: Optional[float] = None) -> Tuple[int, float]:
+        """Pick a key for the next request. Return its index and seconds to wait before using it.
+
+        Raise KeyPoolExhausted if no key is ready within `max_wait` seconds.
+        """
+        with self._lock:
+            now = self._clock()
+            best, best_ready = -1, 0.0
+            for step in range(len(self._keys)):
+                index = (self._next + step) % len(self._keys)
+                key = self._keys[index]
+                if key.revoked:
+                    continue
+                ready = key.ready_at(now)
+                if best < 0 or ready < best_ready:
+                    best, best_ready = index, ready
+                if ready <= now:
+                    break
+            if best < 0:
+                raise KeyPoolExhausted("All API keys are revoked")
+            if max_wait is not None and best_ready - now > max_wait:
+                raise KeyPoolExhausted(
+                    f"No API key is ready within {max_wait:g} seconds, "
+                    f"the first one is in {best_ready - now:.0f} seconds"
+                )
+            self._next = best + 1
+            self._keys[best].take(best_ready)
+            return best, best_ready - now
+
+    def report(self, index: int, status_code: int, retry_after: Optional[float] = None):
+        """Update key health after a response."""
+        with self._lock:
+            key = self._keys[index]
+            if status_code == 401:
+                key.revoked = True
+            elif status_code in KEY_ERRORS:
+                cooldown = min(self.cooldown * 2**key.failures, self.max_cooldown)
+                key.failures += 1
+                key.cooldown_until = self._clock() + max(cooldown, retry_after or 0)
+            else:
+                key.failures = 0
+
+
+def retry_after(headers) -> Optional[float]:
+    """Parse Retry-After header given in seconds."""
+    try:
+        return float(headers["Retry-After"])
+    except (KeyError, ValueError):
+        return None
@@ -0,0 +1,42 @@
+"""
+Input normalization before cleaning.
+"""
+
+import re
+
+_SPACE_RE = re.compile(r"\s+")
+_PUNCTUATION_RE = re.compile(r"[^\w\s]+")
+
+
+class Normalizer:
+    """Canonical form of raw values, so that their variants are cleaned once.
+
+    Default rules (case and whitespace) are safe for any data type.
+    Punctuation and `ё` rules suit addresses and names, but not emails or passports.
+    """
+
+    def __init__(
+        self,
+        case: bool = True,
+        whitespace: bool = True,
+        punctuation: bool = False,
+        yo: bool = False,
+    ):
+        self.case = case
+        self.whitespace = whitespace
+        self.punctuation = punctuation
+        self.yo = yo
+
+    def __call__(self, value: str) -> str:
+        if self.case:
+            value = value.casefold()
+        if self.yo:
+            value = value.replace("ё", "е").replace("Ё", "Е")
+        if self.punctuation:
+            value = _PUNCTUATION_RE.sub(" ", value)
+        if self.whitespace or self.punctuation:
+            value = _SPACE_RE.sub(" ", value).strip()
+        return value
+
+
+DEFAULT_NORMALIZER = Normalizer()
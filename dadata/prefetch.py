@@ -0,0 +1,74 @@
+"""
+Speculative prefetch of suggestion details.
+"""
+
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+from dadata import settings
+from dadata.budget import Budget
+
+# field of suggestion data that find_by_id looks records up by, by directory
+ID_FIELDS = {"party": "inn", "bank": "bic", "address": "fias_id", "fias": "fias_id"}
+
+
+class Prefetch:
+    """Policy of fetching details of top suggestions before the user picks one.
+
+    After `suggest()` in one of `directories`, records for the `top` suggestions are looked up
+    with `find_by_id` (and `find_affiliated` for parties, with `affiliated`) in the background
+    as batch calls, and put into the response cache, so the follow-up call is answered locally.
+    Prefetches are spent from a budget of `rate` calls per second and skipped once it is empty
+    or the client bulk budget starts slowing down.
+    """
+
+    def __init__(
+        self,
+        top: int = settings.PREFETCH_TOP,
+        directories: Sequence[str] = ("party", "bank"),
+        affiliated: bool = False,
+        rate: float = settings.PREFETCH_RATE,
+        concurrency: int = settings.PREFETCH_CONCURRENCY,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        unknown = set(directories) - ID_FIELDS.keys()
+        if unknown:
+            raise ValueError(f"Prefetch is not supported for: {', '.join(sorted(unknown))}")
+        self.top = top
+        self.directories = set(directories)
+        self.affiliated = affiliated
+        self.rate = rate
+        self.concurrency = concurrency
+        self._clock = clock
+        self._tokens = max(1.0, rate)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def targets(self, name: str, suggestions: List[Dict]) -> List[str]:
+        """IDs of top suggestions to prefetch details for."""
+        if name not in self.directories:
+            return []
+        field = ID_FIELDS[name]
+        ids: List[str] = []
+        for suggestion in suggestions[: self.top]:
+            value = (suggestion.get("data") or {}).get(field)
+            if value and value not in ids:
+                ids.append(value)
+        return ids
+
+    def claim(self, budget: Optional[Budget], service: str) -> bool:
+        """Take one prefetch from the budget. Return False if there is none to spare."""
+        if budget is not None and budget.delay(service) != 0:
+            return False
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(
+                max(1.0, self.rate), self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+        if budget is not None:
+            budget.record(service)
+        return True
@@ -0,0 +1,297 @@
+"""
+Recording of API traffic and its replay for load testing.
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import (
+    IO,
+    Any,
+    Deque,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+from urllib.parse import parse_qsl, urlsplit
+import httpx
+from dadata import asynchr, background, sync
+from dadata import compression as codecs
+from dadata.scheduling import SchedulerFull
+from dadata.server import Server
+
+REDACTED = "***"
+
+
+class Recorder:
+    """Writes API calls to a JSON Lines file, gzip-compressed if its name ends with `.gz`.
+
+    Each line holds the call start (seconds since recording started), service, method, URL,
+    request data, response status and body, and latency. Headers are not recorded,
+    and API keys of attached clients are replaced with `***` wherever they appear.
+    """
+
+    def __init__(self, path: Union[str, "os.PathLike[str]"], redact: Sequence[str] = ()):
+        self.path = os.fspath(path)
+        self._file: IO[str] = _open(self.path, "wt")
+        self._secrets = {secret for secret in redact if secret}
+        self._start = time.monotonic()
+        self._lock = threading.Lock()
+
+    def attach(self, *clients: Any):
+        """Record calls made by `clients`: Dadata clients of any kind or single API clients."""
+        for client in clients:
+            for part in _parts(client):
+                part.recorder = self
+                self._secrets.update(_credentials(part))
+
+    def record(
+        self,
+        service: str,
+        method: str,
+        url: str,
+        kwargs: Dict[str, Any],
+        status_code: int,
+        response: Any,
+        elapsed: float,
+    ):
+        """Write a single call."""
+        entry = {
+            "t": round(time.monotonic() - elapsed - self._start, 6),
+            "service": service,
+            "method": method,
+            "url": url,
+            "data": kwargs.get("json", kwargs.get("params")),
+            "status": status_code,
+            "response": response,
+            "elapsed": round(elapsed, 6),
+        }
+        line = json.dumps(entry, ensure_ascii=False)
+        for secret in self._secrets:
+            line = line.replace(secret, REDACTED)
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def close(self):
+        """Flush and close the file"""
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self) -> "Recorder":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def load(path: Union[str, "os.PathLike[str]"]) -> List[Dict]:
+    """Read calls recorded by `Recorder`."""
+    with _open(os.fspath(path), "rt") as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+class StandIn(Server):
+    """Local server that answers recorded requests with recorded responses.
+
+    Each answer is delayed by its recorded latency times `latency`. Requests recorded
+    several times get their responses in turn, requests never recorded get 404.
+    """
+
+    def __init__(
+        self, records: Iterable[Dict], latency: float = 1.0, host: str = "127.0.0.1", port: int = 0
+    ):
+        super().__init__(host=host, port=port)
+        self.latency = latency
+        self._answers: Dict[Tuple[str, ...], Deque[Dict]] = {}
+        for record in records:
+            key = _key(record["service"], record["method"], record["url"], record["data"])
+            self._answers.setdefault(key, deque()).append(record)
+
+    async def _respond(
+        self, method: str, target: str, headers: Dict[str, str], body: bytes
+    ) -> Tuple[int, bytes]:
+        parts = urlsplit(target)
+        service, _, url = parts.path.lstrip("/").partition("/")
+        try:
+            if method == "GET":
+                data: Any = dict(parse_qsl(parts.query))
+            else:
+                data = json.loads(codecs.decompress(body, headers.get("content-encoding", "")))
+        except ValueError:
+            return 400, b'{"detail":"Invalid request body"}'
+        answers = self._answers.get(_key(service, method, url, data))
+        if not answers:
+            return 404, b'{"detail":"Not recorded"}'
+        record = answers[0]
+        answers.rotate(-1)
+        if self.latency:
+            await asyncio.sleep(record["elapsed"] * self.latency)
+        if record["status"] != 200:
+            return record["status"], b'{"detail":"Recorded error"}'
+        return 200, codecs.encode_json(record["response"])
+
+
+class Report(NamedTuple):
+    """Replay outcome"""
+
+    # calls issued
+    requests: int
+    # calls that failed
+    errors: int
+    # seconds from the first call to the last response
+    duration: float
+    # calls per second
+    throughput: float
+    # latency percentiles in seconds: p50, p90, p99 and max
+    latency: Dict[str, float]
+
+
+async def replay(
+    records: Sequence[Dict], client: asynchr.DadataClient, speed: float = 1.0
+) -> Report:
+    """Re-issue recorded calls through `client`, `speed` times faster than they were made.
+
+    Calls go through client methods where possible, so client caches take part.
+    """
+    loop = asyncio.get_running_loop()
+    # skip budget polls, they go to absolute URLs
+    calls = [record for record in records if "://" not in record["url"]]
+    latencies: List[float] = []
+    errors = 0
+
+    async def issue(record: Dict):
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            await _call(client, record)
+        except (httpx.HTTPError, SchedulerFull):
+            errors += 1
+        finally:
+            latencies.append(time.perf_counter() - start)
+
+    started = loop.time()
+    tasks = []
+    for record in calls:
+        delay = started + record["t"] / speed - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.ensure_future(issue(record)))
+    await asyncio.gather(*tasks)
+    duration = loop.time() - started
+    return Report(
+        requests=len(calls),
+        errors=errors,
+        duration=duration,
+        throughput=len(calls) / duration if duration else 0.0,
+        latency=_percentiles(latencies),
+    )
+
+
+async def _call(client: asynchr.DadataClient, record: Dict) -> Any:
+    """Make recorded call with a client method, or as a raw request if there is none."""
+    service, method, url = record["service"], record["method"], record["url"]
+    data = record["data"]
+    kind, _, name = url.partition("/")
+    params = dict(data) if isinstance(data, dict) else {}
+    if kind == "clean" and name and isinstance(data, list) and len(data) == 1:
+        return await client.clean(name, data[0])
+    if kind in ("suggest", "findById", "findByEmail") and "query" in params:
+        call = {
+            "suggest": client.suggest,
+            "findById": client.find_by_id,
+            "findByEmail": client.find_by_email,
+        }[kind]
+        return await call(name, params.pop("query"), **params)
+    if kind == "findAffiliated" and "query" in params:
+        return await client.find_affiliated(params.pop("query"), **params)
+    if kind == "geolocate" and {"lat", "lon"} <= params.keys():
+        return await client.geolocate(name, **params)
+    if url == "iplocate/address" and "ip" in params:
+        return await client.iplocate(params.pop("ip"), **params)
+    part = {
+        asynchr.CleanClient.SERVICE: client._cleaner,
+        asynchr.SuggestClient.SERVICE: client._suggestions,
+        asynchr.ProfileClient.SERVICE: client._profile,
+    }[service]
+    if method == "GET":
+        return await part._request(method, url, params=data)
+    return await part._request(method, url, json=data)
+
+
+def _key(service: str, method: str, url: str, data: Any) -> Tuple[str, ...]:
+    if method == "GET":
+        # query string values arrive as strings
+        data = {name: str(value) for name, value in (data or {}).items()}
+    return (service, method, url, json.dumps(data, sort_keys=True, ensure_ascii=False))
+
+
+def _percentiles(latencies: List[float]) -> Dict[str, float]:
+    if not latencies:
+        return {}
+    values = sorted(latencies)
+
+    def rank(share: float) -> float:
+        return values[max(0, math.ceil(share * len(values)) - 1)]
+
+    return {"p50": rank(0.5), "p90": rank(0.9), "p99": rank(0.99), "max": values[-1]}
+
+
+def _open(path: str, mode: str) -> IO[str]:
+    if path.endswith(".gz"):
+        return gzip.open(path, mode, encoding="utf-8")  # type: ignore[return-value]
+    return open(path, mode, encoding="utf-8")
+
+
+def _parts(client: Any) -> List[Any]:
+    """API clients that make requests for `client`"""
+    if isinstance(client, background.DadataClient):
+        client = client._client
+    if isinstance(client, (sync.DadataClient, asynchr.DadataClient)):
+        return [client._cleaner, client._suggestions, client._profile]
+    return [client]
+
+
+def _credentials(client: Any) -> List[str]:
+    """API keys of API client"""
+    secrets = []
+    for http in client._clients:
+        secrets.append(http.headers.get("Authorization", "").partition(" ")[2])
+        secrets.append(http.headers.get("X-Secret", ""))
+    return [secret for secret in secrets if secret]
+
+
+async def _run(path: str, speed: float, latency: float) -> Report:
+    records = load(path)
+    async with StandIn(records, latency=latency) as server:
+        async with asynchr.DadataClient(token="replay", base_url=server.url) as client:
+            return await replay(records, client, speed=speed)
+
+
+def main(args: Optional[List[str]] = None):
+    """Replay from command line: python -m dadata.replay traffic.jsonl.gz --speed 10"""
+    parser = argparse.ArgumentParser(description="Replay recorded Dadata API traffic")
+    parser.add_argument("path", help="file written by dadata.replay.Recorder")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed-up")
+    parser.add_argument("--latency", type=float, default=1.0, help="share of recorded latency")
+    options = parser.parse_args(args)
+    report = asyncio.run(_run(options.path, options.speed, options.latency))
+    print(f"requests:   {report.requests} ({report.errors} failed)")
+    print(f"duration:   {report.duration:.2f} s")
+    print(f"throughput: {report.throughput:.1f} req/s")
+    for name, seconds in report.latency.items():
+        print(f"{name + ':':<11} {seconds * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
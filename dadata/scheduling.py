@@ -0,0 +1,143 @@
+"""
+Priority scheduling between interactive and batch requests.
+"""
+
+import asyncio
+import contextlib
+from collections import deque
+from contextvars import ContextVar
+from typing import AsyncIterator, Deque, Iterator, List, Optional
+from dadata import deadlines, settings
+
+INTERACTIVE = 0
+BATCH = 1
+
+_priority: ContextVar[int] = ContextVar("dadata_priority", default=INTERACTIVE)
+
+
+class SchedulerFull(Exception):
+    """Too many calls are waiting for a request slot"""
+
+
+@contextlib.contextmanager
+def priority(value: int) -> Iterator[None]:
+    """Run calls made within the block with given priority (INTERACTIVE or BATCH)."""
+    token = _priority.set(value)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> int:
+    """Priority of calls made in the current context."""
+    return _priority.get()
+
+
+class Scheduler:
+    """Shares request slots between interactive and batch calls.
+
+    At most `slots` requests are in flight, and batch calls never take the last `reserved`
+    slots. Queued interactive calls go first, but when both kinds are waiting,
+    batch calls get at least `batch_share` of the freed slots, so they are not starved.
+    Calls are batch within `priority(BATCH)` blocks and in bulk methods.
+
+    With `max_queued`, a call that would wait behind that many others fails
+    with SchedulerFull right away. A call stops waiting when its deadline passes.
+    """
+
+    def __init__(
+        self,
+        slots: int = settings.SCHEDULER_SLOTS,
+        reserved: Optional[int] = None,
+        batch_share: float = settings.SCHEDULER_BATCH_SHARE,
+        max_queued: Optional[int] = None,
+    ):
+        self.slots = slots
+        self.reserved = slots // 5 if reserved is None else reserved
+        self.batch_share = batch_share
+        self.max_queued = max_queued
+        self._active = [0, 0]
+        self._waiters: List[Deque[asyncio.Future]] = [deque(), deque()]
+        self._credit = 0.0
+
+    @property
+    def active(self) -> int:
+        """Number of requests in flight."""
+        return sum(self._active)
+
+    @property
+    def queued(self) -> int:
+        """Number of requests waiting for a slot."""
+        return len(self._waiters[INTERACTIVE]) + len(self._waiters[BATCH])
+
+    @contextlib.asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold a request slot for the duration of the block."""
+        level = current_priority()
+        await self._acquire(level)
+        try:
+            yield
+        finally:
+            self._release(level)
+
+    async def _acquire(self, level: int):
+        if (
+            self.max_queued is not None
+            and self.queued >= self.max_queued
+            and not self._can_run(level)
+        ):
+            raise SchedulerFull(f"{self.queued} calls are already waiting for a request slot")
+        deadlines.check()
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[level].append(future)
+        self._dispatch()
+        try:
+            await asyncio.wait_for(future, deadlines.remaining())
+        except (asyncio.CancelledError, asyncio.TimeoutError) as exc:
+            if future.cancelled():
+                with contextlib.suppress(ValueError):
+                    self._waiters[level].remove(future)
+            else:
+                # slot was granted right before cancellation
+                self._release(level)
+            if isinstance(exc, asyncio.TimeoutError):
+                raise deadlines.DeadlineExceeded(
+                    "Deadline exceeded while waiting for a request slot"
+                ) from None
+            raise
+
+    def _release(self, level: int):
+        self._active[level] -= 1
+        self._dispatch()
+
+    def _can_run(self, level: int) -> bool:
+        if self.active >= self.slots:
+            return False
+        return level == INTERACTIVE or self._active[BATCH] < self.slots - self.reserved
+
+    def _pick(self) -> Optional[int]:
+        interactive = bool(self._waiters[INTERACTIVE]) and self._can_run(INTERACTIVE)
+        batch = bool(self._waiters[BATCH]) and self._can_run(BATCH)
+        if interactive and batch:
+            self._credit = min(1.0, self._credit + self.batch_share)
+            if self._credit >= 1:
+                self._credit -= 1
+                return BATCH
+            return INTERACTIVE
+        if interactive:
+            return INTERACTIVE
+        if batch:
+            return BATCH
+        return None
+
+    def _dispatch(self):
+        while True:
+            level = self._pick()
+            if level is None:
+                return
+            future = self._waiters[level].popleft()
+            if future.done():
+                continue
+            self._active[level] += 1
+            future.set_result(None)
@@ -0,0 +1,112 @@
+"""
+Minimal asyncio HTTP/1.1 server for JSON APIs.
+"""
+
+import asyncio
+from http import HTTPStatus
+from typing import Dict, Optional, Tuple
+
+
+class Server:
+    """HTTP server answering each request with `_respond()`, keeping connections alive."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.host = host
+        self.port = port
+        # open connections and tasks serving them
+        self._connections: Dict[asyncio.StreamWriter, "asyncio.Task[None]"] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def url(self) -> str:
+        """Base URL to pass to clients."""
+        return f"http://{self.host}:{self.port}/"
+
+    async def start(self):
+        """Start accepting connections."""
+        # room for bursts of new connections, so clients do not wait out SYN retries
+        self._server = await asyncio.start_server(self._handle, self.host, self.port, backlog=1024)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        """Serve requests until cancelled."""
+        if self._server is None:
+            await self.start()
+        assert self._server is not None
+        await self._server.serve_forever()
+
+    async def close(self):
+        """Stop the server"""
+        if self._server is not None:
+            self._server.close()
+            handlers = list(self._connections.values())
+            for writer in list(self._connections):
+                writer.close()
+            # let handlers see the connections closed and finish
+            await asyncio.gather(*handlers, return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self) -> "Server":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve requests of a single client connection."""
+        task = asyncio.current_task()
+        assert task is not None
+        self._connections[writer] = task
+        try:
+            while True:
+                request = await _read_request(reader)
+                if request is None:
+                    return
+                method, target, headers, body = request
+                status, content = await self._respond(method, target, headers, body)
+                writer.write(_response(status, content, head=method == "HEAD"))
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            return
+        finally:
+            self._connections.pop(writer, None)
+            writer.close()
+
+    async def _respond(
+        self, method: str, target: str, headers: Dict[str, str], body: bytes
+    ) -> Tuple[int, bytes]:
+        """Answer a request with status code and JSON body."""
+        raise NotImplementedError
+
+
+async def _read_request(
+    reader: asyncio.StreamReader,
+) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+    """Read HTTP/1.1 request. Return None when the client closes the connection."""
+    line = await reader.readline()
+    if not line:
+        return None
+    method, target, _ = line.decode("latin-1").split(" ", 2)
+    headers: Dict[str, str] = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers.get("content-length", 0)))
+    return method, target, headers, body
+
+
+def _response(status: int, content: bytes, head: bool = False) -> bytes:
+    """HTTP/1.1 response. Answers to HEAD keep Content-Length but carry no body."""
+    lines = (
+        f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(content)}\r\n\r\n"
+    )
+    return lines.encode() if head else lines.encode() + content
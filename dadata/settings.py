@@ -2,3 +2,28 @@
 
 TIMEOUT_SEC = 3
 SUGGESTION_COUNT = 10
+# the API returns at most this many suggestions, whatever count is asked for
+SUGGESTION_MAX_COUNT = 20
+CACHE_SIZE = 10000
+CACHE_TTL_SEC = 3600
+GEOLOCATE_MAX_RADIUS = 1000
+IPV4_PREFIX = 24
+IPV6_PREFIX = 48
+BULK_CONCURRENCY = 10
+BUDGET_POLL_SEC = 60
+KEY_COOLDOWN_SEC = 60
+KEY_MAX_COOLDOWN_SEC = 3600
+SHARD_SIZE = 1000
+SCHEDULER_SLOTS = 20
+SCHEDULER_BATCH_SHARE = 0.2
+COMPRESS_MIN_BYTES = 1024
+KEEPALIVE_SEC = 30
+KEEPALIVE_EXPIRY_SEC = 60
+VERSIONS_POLL_SEC = 600
+GATEWAY_PORT = 8080
+GATEWAY_BATCH_WINDOW_SEC = 0.002
+GATEWAY_MAX_BATCH = 50
+PREFETCH_TOP = 3
+PREFETCH_RATE = 5
+PREFETCH_CONCURRENCY = 2
+ADAPTIVE_MAX_CONCURRENCY = 100
@@ -0,0 +1,125 @@
+"""
+Incremental decoding of large JSON responses.
+"""
+
+import json
+import re
+from typing import Any, List, Optional
+
+_STRUCTURAL_RE = re.compile(rb'["\[\]{},]')
+_STRING_END_RE = re.compile(rb'["\\]')
+_VALUE_RE = re.compile(rb"[^\s,]")
+
+_QUOTE, _BACKSLASH = ord('"'), ord("\\")
+_OPEN = {ord("{"), ord("[")}
+_CLOSE = {ord("}"), ord("]")}
+_ARRAY_OPEN, _ARRAY_CLOSE, _COMMA = ord("["), ord("]"), ord(",")
+
+
+class ItemStream:
+    """Parses items of a JSON array from a response body as its bytes arrive.
+
+    `key` names the array in a top-level object (e.g. "suggestions"),
+    None means the body itself is an array. Only the current item is kept in memory.
+    """
+
+    def __init__(self, key: Optional[str] = None):
+        self.key = key
+        self._buffer = bytearray()
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._string_start = 0
+        self._last_string = b""
+        self._target: Optional[int] = None
+        self._item = -1
+        self.done = False
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        """Consume next chunk of the body. Return items completed by it."""
+        buffer = self._buffer
+        buffer += chunk
+        items: List[Any] = []
+        pos = self._pos
+        while not self.done:
+            if self._in_string:
+                match = _STRING_END_RE.search(buffer, pos)
+                if match is None:
+                    pos = len(buffer)
+                    break
+                if buffer[match.start()] == _BACKSLASH:
+                    if match.end() >= len(buffer):
+                        # escaped character is in the next chunk
+                        pos = match.start()
+                        break
+                    pos = match.end() + 1
+                    continue
+                pos = match.end()
+                self._in_string = False
+                if self._depth == 1:
+                    self._last_string = bytes(buffer[self._string_start : pos])
+                continue
+            if self._target == self._depth and self._item < 0:
+                match = _VALUE_RE.search(buffer, pos)
+                if match is None:
+                    pos = len(buffer)
+                    break
+                pos = match.start()
+                if buffer[pos] != _ARRAY_CLOSE:
+                    self._item = pos
+            match = _STRUCTURAL_RE.search(buffer, pos)
+            if match is None:
+                pos = len(buffer)
+                break
+            index = match.start()
+            char = buffer[index]
+            pos = index + 1
+            if char == _QUOTE:
+                self._in_string = True
+                self._string_start = index
+            elif char in _OPEN:
+                if char == _ARRAY_OPEN and self._target is None and self._is_target():
+                    self._target = self._depth + 1
+                self._depth += 1
+            elif char in _CLOSE:
+                self._depth -= 1
+                if self._target is None:
+                    continue
+                if self._depth == self._target and self._item >= 0:
+                    items.append(json.loads(buffer[self._item : pos]))
+                    self._item = -1
+                elif self._depth < self._target:
+                    if self._item >= 0:
+                        items.append(json.loads(buffer[self._item : index]))
+                        self._item = -1
+                    self.done = True
+            elif char == _COMMA and self._depth == self._target and self._item >= 0:
+                items.append(json.loads(buffer[self._item : index]))
+                self._item = -1
+        self._trim(pos)
+        return items
+
+    def close(self):
+        """Check that the body did not end in the middle of the array."""
+        if self._target is not None and not self.done:
+            raise ValueError("Response body ended before the end of the array")
+
+    def _is_target(self) -> bool:
+        """Check if the array being opened is the one to parse."""
+        if self.key is None:
+            return self._depth == 0
+        return self._depth == 1 and json.loads(self._last_string) == self.key
+
+    def _trim(self, pos: int):
+        """Drop consumed bytes."""
+        keep = pos
+        if self._item >= 0:
+            keep = min(keep, self._item)
+        if self._in_string:
+            keep = min(keep, self._string_start)
+        del self._buffer[:keep]
+        self._pos = pos - keep
+        if self._item >= 0:
+            self._item -= keep
+        if self._in_string:
+            self._string_start -= keep
@@ -3,29 +3,75 @@ Synchronous Dadata API client.
 """
 
 import datetime as dt
-from typing import Dict, List, Optional
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
 import httpx
-from dadata import settings
+from dadata import bulk, deadlines, settings, tracing
+from dadata.adaptive import OVERLOAD_STATUSES, AdaptiveConcurrency, bulk_calls, in_bulk_call
+from dadata.budget import Budget, BudgetExhausted
+from dadata import compression as codecs
+from dadata.cache import GeoCache, IPCache, ResponseCache, SuggestionCache, nearest
+from dadata.keys import KEY_ERRORS, KeyPool, retry_after
+from dadata.normalize import DEFAULT_NORMALIZER, Normalizer
+from dadata.prefetch import Prefetch
+from dadata.stream import ItemStream
+from dadata.versions import VersionTracker
+
+# keep idle connections longer than httpx does by default
+LIMITS = httpx.Limits(
+    max_connections=100,
+    max_keepalive_connections=20,
+    keepalive_expiry=settings.KEEPALIVE_EXPIRY_SEC,
+)
 
 
 class ClientBase:
     """Base class for API client"""
 
+    SERVICE = ""
+
     def __init__(
         self,
         base_url: str,
-        token: str,
+        token: Union[str, KeyPool],
         secret: Optional[str] = None,
         timeout: int = settings.TIMEOUT_SEC,
+        budget: Optional[Budget] = None,
+        compression: Optional[str] = None,
+        adaptive: Optional[AdaptiveConcurrency] = None,
+        profile_url: Optional[str] = None,
     ):
-        headers = {
-            "Content-type": "application/json",
-            "Accept": "application/json",
-            "Authorization": f"Token {token}",
-        }
-        if secret:
-            headers["X-Secret"] = secret
-        self._client = httpx.Client(base_url=base_url, headers=headers, timeout=timeout)
+        if compression and compression not in codecs.ENCODERS:
+            raise ValueError(f"Unsupported compression: {compression}")
+        self.budget = budget
+        self.adaptive = adaptive
+        # Profile API base URL for budget polls, e.g. behind a gateway
+        self.profile_url = profile_url
+        self.compression = compression
+        self.compress_above = settings.COMPRESS_MIN_BYTES
+        self.keys = token if isinstance(token, KeyPool) else None
+        # shared rate limit: any object with acquire() returning seconds to wait
+        self.limiter: Any = None
+        # traffic recorder: any object with record() (see `dadata.replay.Recorder`)
+        self.recorder: Any = None
+        self._keepalive: Optional[threading.Event] = None
+        credentials = self.keys.credentials() if self.keys else [(token, secret)]
+        self._clients = []
+        for key_token, key_secret in credentials:
+            headers = {
+                "Content-type": "application/json",
+                "Accept": "application/json",
+                "Accept-Encoding": codecs.accept_encoding(),
+                "Authorization": f"Token {key_token}",
+            }
+            if key_secret:
+                headers["X-Secret"] = key_secret
+            self._clients.append(
+                httpx.Client(base_url=base_url, headers=headers, timeout=timeout, limits=LIMITS)
+            )
+        self._client = self._clients[0]
 
     def __enter__(self) -> "ClientBase":
         return self
@@ -35,40 +81,302 @@ class ClientBase:
 
     def close(self):
         """Close network connections"""
-        self._client.close()
+        if self._keepalive is not None:
+            self._keepalive.set()
+            self._keepalive = None
+        for client in self._clients:
+            client.close()
+
+    def warmup(self, connections: int = 1):
+        """Open `connections` connections to the API host ahead of time."""
+        with ThreadPoolExecutor(max_workers=connections) as executor:
+            for client in self._clients:
+                list(executor.map(self._ping, [client] * connections))
+
+    def keepalive(self, interval: float = settings.KEEPALIVE_SEC, connections: int = 1):
+        """Keep `connections` connections open, refreshing them every `interval` seconds."""
+        if self._keepalive is not None:
+            self._keepalive.set()
+        stop = self._keepalive = threading.Event()
+
+        def run():
+            while not stop.wait(interval):
+                try:
+                    self.warmup(connections)
+                except RuntimeError:
+                    # client closed during warmup
+                    return
+
+        threading.Thread(target=run, name="dadata-keepalive", daemon=True).start()
+
+    def _ping(self, client):
+        """Lightweight request that sets up or refreshes a connection"""
+        try:
+            client.head("")
+        except httpx.HTTPError:
+            pass
 
     def _get(self, url, data):
         """GET request to Dadata API"""
-        response = self._client.get(url, params=data)
-        response.raise_for_status()
-        return response.json()
+        return self._request("GET", url, params=data)
+
+    def _workers(self, concurrency: int) -> int:
+        """Bulk workers: `concurrency`, or enough for the highest adaptive limit"""
+        return concurrency if self.adaptive is None else self.adaptive.max_limit
+
+    def _poll(self, budget: Budget):
+        """Update budget with balance and daily stats, keeping last known values on errors"""
+        profile_url = self.profile_url or ProfileClient.BASE_URL
+        try:
+            balance = self._get(profile_url + "profile/balance", data={})
+            stats = self._get(profile_url + "stat/daily", data={})
+        except httpx.HTTPError:
+            # a transient Profile API error should not stop a bulk job, poll again later
+            return
+        budget.update(balance["balance"], stats)
+
+    def _throttle(self):
+        """Wait until the bulk budget allows another call"""
+        budget = self.budget
+        if budget is None:
+            return
+        while True:
+            if budget.claim_poll():
+                self._poll(budget)
+            delay = budget.delay(self.SERVICE)
+            if delay is None:
+                if not budget.wait:
+                    raise BudgetExhausted(f"{self.SERVICE} budget is exhausted")
+                deadlines.check(budget.poll_interval)
+                time.sleep(budget.poll_interval)
+                continue
+            if delay:
+                deadlines.check(delay)
+                time.sleep(delay)
+            budget.record(self.SERVICE)
+            return
 
     def _post(self, url, data):
         """POST request to Dadata API"""
-        response = self._client.post(url, json=data)
+        return self._request("POST", url, json=data)
+
+    def _post_stream(self, url, data, key: Optional[str] = None) -> Iterator[Any]:
+        """POST request to Dadata API, yielding items of the `key` array as they arrive"""
+        response = self._call("POST", url, stream=True, **self._encode({"json": data}))
+        try:
+            parser = ItemStream(key)
+            for chunk in response.iter_bytes():
+                yield from parser.feed(chunk)
+            parser.close()
+        finally:
+            response.close()
+
+    def _encode(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """Encode JSON body of request arguments, compressed if enabled"""
+        if "json" not in kwargs:
+            return kwargs
+        kwargs = dict(kwargs)
+        data = kwargs.pop("json")
+        if not self.compression:
+            kwargs["content"] = codecs.encode_json(data)
+            return kwargs
+        kwargs["content"], kwargs["headers"] = codecs.compress(
+            data, self.compression, self.compress_above
+        )
+        return kwargs
+
+    def _request(self, method, url, **kwargs):
+        """Request to Dadata API, recording it if a recorder is attached"""
+        recorder = self.recorder
+        if recorder is None:
+            return self._traced(method, url, **kwargs)
+        start = time.perf_counter()
+        try:
+            result = self._traced(method, url, **kwargs)
+        except httpx.HTTPStatusError as exc:
+            elapsed = time.perf_counter() - start
+            recorder.record(
+                self.SERVICE, method, url, kwargs, exc.response.status_code, None, elapsed
+            )
+            raise
+        recorder.record(self.SERVICE, method, url, kwargs, 200, result, time.perf_counter() - start)
+        return result
+
+    def _traced(self, method, url, **kwargs):
+        """Request to Dadata API, timing its phases if tracing is on"""
+        timing = tracing.start(method, url)
+        if timing is None:
+            return self._call(method, url, **self._encode(kwargs)).json()
+        status_code = None
+        try:
+            with timing.phase("encode"):
+                kwargs = self._encode(kwargs)
+            response = self._call(method, url, trace=timing.trace, **kwargs)
+            status_code = response.status_code
+            with timing.phase("decode"):
+                return response.json()
+        except httpx.HTTPStatusError as exc:
+            status_code = exc.response.status_code
+            raise
+        finally:
+            timing.finish(status_code)
+
+    def _call(self, method, url, stream=False, **kwargs) -> httpx.Response:
+        """Request to Dadata API, switching to another key on key errors"""
+        if self.keys is None:
+            response = self._send(self._client, method, url, stream, **kwargs)
+        else:
+            for _ in range(len(self.keys)):
+                # fail fast instead of waiting out a cooldown longer than the request timeout
+                index, delay = self.keys.acquire(max_wait=self._client.timeout.read)
+                if delay > 0:
+                    deadlines.check(delay)
+                    time.sleep(delay)
+                response = self._send(self._clients[index], method, url, stream, **kwargs)
+                self.keys.report(index, response.status_code, retry_after(response.headers))
+                if response.status_code not in KEY_ERRORS:
+                    break
+                response.close()
+        if response.is_error:
+            response.close()
         response.raise_for_status()
-        return response.json()
+        return response
+
+    def _send(self, client, method, url, stream=False, trace=None, **kwargs):
+        """Send request once the rate limit allows"""
+        if self.limiter is not None:
+            delay = self.limiter.acquire()
+            if delay > 0:
+                deadlines.check(delay)
+                time.sleep(delay)
+        # drop the request if its caller has given up while it was queued
+        deadlines.check()
+        extensions = None if trace is None else {"trace": trace}
+        request = client.build_request(
+            method,
+            url,
+            timeout=deadlines.timeout(client.timeout),
+            extensions=extensions,
+            **kwargs,
+        )
+        if self.adaptive is None or not in_bulk_call():
+            return client.send(request, stream=stream)
+        return self._send_adaptive(client, request, stream)
+
+    def _send_adaptive(self, client, request, stream):
+        """Send bulk request within the adaptive in-flight limit of its host"""
+        limit = self.adaptive.host(request.url.host)
+        if not limit.acquire(deadlines.remaining()):
+            raise deadlines.DeadlineExceeded("Deadline exceeded while waiting for a bulk slot")
+        start = time.perf_counter()
+        overload = True
+        try:
+            response = client.send(request, stream=stream)
+            overload = response.status_code in OVERLOAD_STATUSES
+            return response
+        except httpx.TimeoutException:
+            # a timeout cut short by the deadline says nothing about the API
+            left = deadlines.remaining()
+            overload = left is None or left > 0
+            raise
+        finally:
+            limit.release(time.perf_counter() - start, overload)
 
 
 class CleanClient(ClientBase):
     """Dadata Cleaner API client"""
 
     BASE_URL = "https://cleaner.dadata.ru/api/v1/"
+    SERVICE = "clean"
 
     def __init__(
         self,
-        token: str,
+        token: Union[str, KeyPool],
         secret: Optional[str] = None,
         timeout: int = settings.TIMEOUT_SEC,
+        budget: Optional[Budget] = None,
+        compression: Optional[str] = None,
+        response_cache: Optional[ResponseCache] = None,
+        base_url: Optional[str] = None,
+        adaptive: Optional[AdaptiveConcurrency] = None,
+        profile_url: Optional[str] = None,
     ):
-        super().__init__(base_url=self.BASE_URL, token=token, secret=secret, timeout=timeout)
+        super().__init__(
+            base_url=base_url or self.BASE_URL,
+            token=token,
+            secret=secret,
+            timeout=timeout,
+            budget=budget,
+            compression=compression,
+            adaptive=adaptive,
+            profile_url=profile_url,
+        )
+        self.response_cache = response_cache
 
     def clean(self, name: str, source: str) -> Optional[Dict]:
         """Cleanse `source` as `name` data type."""
         url = f"clean/{name}"
         data = [source]
+        if self.response_cache:
+            hit, cached = self.response_cache.get(self.SERVICE, url, data)
+            if hit:
+                return cached
         response = self._post(url, data)
-        return response[0] if response else None
+        result = response[0] if response else None
+        if self.response_cache:
+            self.response_cache.put(self.SERVICE, url, data, result)
+        return result
+
+    def clean_many(
+        self,
+        name: str,
+        sources: Sequence[str],
+        concurrency: int = settings.BULK_CONCURRENCY,
+        normalizer: Optional[Normalizer] = DEFAULT_NORMALIZER,
+    ) -> List[Optional[Dict]]:
+        """Cleanse many `sources` as `name` data type.
+
+        Sources equal after normalization are cleaned once, `concurrency` requests at a time.
+        """
+        keys, unique = bulk.dedupe(sources, normalizer)
+        url = f"clean/{name}"
+        requests = {key: [source] for key, source in unique.items()}
+        found: Dict[str, Optional[Dict]] = bulk.cached(
+            self.response_cache, self.SERVICE, url, requests
+        )
+        missing = [key for key in unique if key not in found]
+        cleaned: Dict[str, Optional[Dict]] = {}
+        failed = threading.Event()
+
+        def clean(key):
+            # stop issuing paid requests once one has failed
+            if failed.is_set():
+                return
+            try:
+                self._throttle()
+                response = self._post(url, requests[key])
+            except Exception:
+                failed.set()
+                raise
+            cleaned[key] = response[0] if response else None
+
+        try:
+            with bulk_calls():
+                with ThreadPoolExecutor(max_workers=self._workers(concurrency)) as executor:
+                    list(executor.map(deadlines.bind(clean), missing))
+        finally:
+            # keep what has been paid for, even if the call fails
+            bulk.store(self.response_cache, self.SERVICE, url, requests, cleaned)
+        found.update(cleaned)
+        return bulk.fan_out(sources, keys, found)
+
+    def iter_clean(self, name: str, sources: Sequence[str]) -> Iterator[Dict]:
+        """Cleanse `sources` as `name` data type in a single request.
+
+        Cleaned records are yielded as soon as they arrive.
+        """
+        url = f"clean/{name}"
+        return self._post_stream(url, list(sources))
 
     def clean_record(self, structure: List[str], record: List[str]) -> List[Dict]:
         """Cleanse `record` of specified `structure`."""
@@ -77,24 +385,127 @@ class CleanClient(ClientBase):
         response = self._post(url, data)
         return response["data"][0] if response else None
 
+    def iter_clean_records(
+        self, structure: List[str], records: Sequence[List[str]]
+    ) -> Iterator[List[Dict]]:
+        """Cleanse `records` of specified `structure` in a single request.
+
+        Cleaned records are yielded as soon as they arrive.
+        """
+        url = "clean"
+        data = {"structure": structure, "data": list(records)}
+        return self._post_stream(url, data, key="data")
+
 
 class SuggestClient(ClientBase):
     """Dadata Suggestions API client"""
 
     BASE_URL = "https://suggestions.dadata.ru/suggestions/api/4_1/rs/"
+    SERVICE = "suggestions"
 
     def __init__(
         self,
-        token: str,
+        token: Union[str, KeyPool],
         secret: Optional[str] = None,
         timeout: int = settings.TIMEOUT_SEC,
+        suggestion_cache: Optional[SuggestionCache] = None,
+        geo_cache: Optional[GeoCache] = None,
+        ip_cache: Optional[IPCache] = None,
+        budget: Optional[Budget] = None,
+        compression: Optional[str] = None,
+        response_cache: Optional[ResponseCache] = None,
+        base_url: Optional[str] = None,
+        prefetch: Optional[Prefetch] = None,
+        adaptive: Optional[AdaptiveConcurrency] = None,
+        profile_url: Optional[str] = None,
     ):
-        super().__init__(base_url=self.BASE_URL, token=token, secret=secret, timeout=timeout)
+        super().__init__(
+            base_url=base_url or self.BASE_URL,
+            token=token,
+            secret=secret,
+            timeout=timeout,
+            budget=budget,
+            compression=compression,
+            adaptive=adaptive,
+            profile_url=profile_url,
+        )
+        self.suggestion_cache = suggestion_cache
+        self.geo_cache = geo_cache
+        self.ip_cache = ip_cache
+        self.response_cache = response_cache
+        if prefetch is not None and response_cache is None:
+            raise ValueError("Prefetch needs a response cache")
+        self.prefetch = prefetch
+        self._prefetcher = (
+            None
+            if prefetch is None
+            else ThreadPoolExecutor(
+                max_workers=prefetch.concurrency, thread_name_prefix="dadata-prefetch"
+            )
+        )
+
+    def close(self):
+        """Close network connections"""
+        if self._prefetcher is not None:
+            self._prefetcher.shutdown(wait=False, cancel_futures=True)
+        super().close()
 
     def geolocate(
         self, name: str, lat: float, lon: float, radius_meters: int = 100, **kwargs
     ) -> List[Dict]:
         """Find places near given coordinates in given radius."""
+        if self.geo_cache:
+            cached = self.geo_cache.get(name, lat, lon, radius_meters, kwargs)
+            if cached is not None:
+                return cached
+        suggestions = self._geolocate(name, lat, lon, radius_meters, kwargs)
+        if self.geo_cache:
+            self.geo_cache.put(name, lat, lon, radius_meters, kwargs, suggestions)
+        return suggestions
+
+    def geolocate_many(
+        self,
+        name: str,
+        points: Sequence[Tuple[float, float]],
+        radius_meters: int = 100,
+        spread_meters: int = 0,
+        **kwargs,
+    ) -> List[List[Dict]]:
+        """Find places near each of given coordinates in given radius.
+
+        Points covered by an earlier answer are resolved locally. With `spread_meters`,
+        each API call covers a wider area, so that nearby points need no calls of their own.
+        """
+        cache = self.geo_cache or GeoCache()
+        seen: Dict[Tuple[float, float], List[Dict]] = {}
+        results = []
+        for lat, lon in points:
+            found = seen.get((lat, lon))
+            if found is None:
+                found = cache.get(name, lat, lon, radius_meters, kwargs)
+            if found is None and spread_meters:
+                radius = min(radius_meters + spread_meters, settings.GEOLOCATE_MAX_RADIUS)
+                self._throttle()
+                suggestions = self._geolocate(name, lat, lon, radius, kwargs)
+                cache.put(name, lat, lon, radius, kwargs, suggestions)
+                found = cache.get(name, lat, lon, radius_meters, kwargs)
+                if found is None:
+                    # a truncated wide answer still holds the nearest places to its own center
+                    count = kwargs.get("count", settings.SUGGESTION_COUNT)
+                    found = nearest(suggestions, lat, lon, radius_meters, count)
+                    if found is not None:
+                        cache.put(name, lat, lon, radius_meters, kwargs, found)
+            if found is None:
+                self._throttle()
+                found = self._geolocate(name, lat, lon, radius_meters, kwargs)
+                cache.put(name, lat, lon, radius_meters, kwargs, found)
+            seen[(lat, lon)] = found
+            results.append(found)
+        return results
+
+    def _geolocate(
+        self, name: str, lat: float, lon: float, radius_meters: int, kwargs: Dict
+    ) -> List[Dict]:
         url = f"geolocate/{name}"
         data = {"lat": lat, "lon": lon, "radius_meters": radius_meters}
         data.update(kwargs)
@@ -103,21 +514,37 @@ class SuggestClient(ClientBase):
 
     def iplocate(self, query: str, **kwargs) -> Optional[Dict]:
         """Detect city by IPv4 or IPv6 address."""
+        if self.ip_cache:
+            hit, location = self.ip_cache.get(query, kwargs)
+            if hit:
+                return location
         url = "iplocate/address"
         data = {"ip": query}
         data.update(kwargs)
         response = self._get(url, data)
-        return response["location"] if "location" in response else None
+        location = response["location"] if "location" in response else None
+        if self.ip_cache:
+            self.ip_cache.put(query, kwargs, location)
+        return location
 
     def suggest(
         self, name: str, query: str, count: int = settings.SUGGESTION_COUNT, **kwargs
     ) -> List[Dict]:
         """Suggest from `name` directory according to given `query`."""
+        if self.suggestion_cache:
+            cached = self.suggestion_cache.get(name, query, count, kwargs)
+            if cached is not None:
+                self._prefetch(name, cached)
+                return cached
         url = f"suggest/{name}"
         data = {"query": query, "count": count}
         data.update(kwargs)
         response = self._post(url, data)
-        return response["suggestions"]
+        suggestions = response["suggestions"]
+        if self.suggestion_cache:
+            self.suggestion_cache.put(name, query, count, kwargs, suggestions)
+        self._prefetch(name, suggestions)
+        return suggestions
 
     def find_by_id(
         self, name: str, query: str, count: int = settings.SUGGESTION_COUNT, **kwargs
@@ -126,9 +553,78 @@ class SuggestClient(ClientBase):
         url = f"findById/{name}"
         data = {"query": query, "count": count}
         data.update(kwargs)
+        if self.response_cache:
+            hit, cached = self.response_cache.get(self.SERVICE, url, data)
+            if hit:
+                return cached
         response = self._post(url, data)
+        if self.response_cache:
+            self.response_cache.put(self.SERVICE, url, data, response["suggestions"])
         return response["suggestions"]
 
+    def find_by_ids(
+        self,
+        name: str,
+        queries: Sequence[str],
+        concurrency: int = settings.BULK_CONCURRENCY,
+        affiliated: bool = False,
+        **kwargs,
+    ) -> bulk.BulkResult:
+        """Find records in `name` directory by their IDs.
+
+        Each unique ID is requested once, `concurrency` requests at a time.
+        With `affiliated`, also finds affiliated parties for each party found.
+        """
+        if affiliated and name != "party":
+            raise ValueError("Affiliated parties can only be found in party directory")
+        url = f"findById/{name}"
+        params = dict(kwargs)
+        count = params.pop("count", settings.SUGGESTION_COUNT)
+        requests = {
+            query: dict({"query": query, "count": count}, **params)
+            for query in dict.fromkeys(queries)
+        }
+        hits = bulk.cached(self.response_cache, self.SERVICE, url, requests)
+        fetched: Dict[str, List[Dict]] = {}
+        found: Dict[str, List[Dict]] = {}
+        errors: Dict[str, Exception] = {}
+        related: Dict[str, List[Dict]] = {}
+        related_errors: Dict[str, Exception] = {}
+        failed = threading.Event()
+
+        def lookup(query):
+            # stop issuing paid requests once one has failed for good
+            if failed.is_set():
+                return
+            try:
+                if query in hits:
+                    suggestions = hits[query]
+                else:
+                    self._throttle()
+                    suggestions = self._post(url, requests[query])["suggestions"]
+                    fetched[query] = suggestions
+                found[query] = suggestions
+                if affiliated and suggestions:
+                    try:
+                        self._throttle()
+                        related[query] = self.find_affiliated(query)
+                    except httpx.HTTPError as exc:
+                        related_errors[query] = exc
+            except httpx.HTTPError as exc:
+                errors[query] = exc
+            except Exception:
+                failed.set()
+                raise
+
+        try:
+            with bulk_calls():
+                with ThreadPoolExecutor(max_workers=self._workers(concurrency)) as executor:
+                    list(executor.map(deadlines.bind(lookup), requests))
+        finally:
+            # keep what has been paid for, even if the call fails
+            bulk.store(self.response_cache, self.SERVICE, url, requests, fetched)
+        return bulk.collect(queries, found, errors, related, related_errors)
+
     def find_by_email(
         self, name: str, query: str, count: int = settings.SUGGESTION_COUNT, **kwargs
     ) -> List[Dict]:
@@ -146,22 +642,72 @@ class SuggestClient(ClientBase):
         url = "findAffiliated/party"
         data = {"query": query, "count": count}
         data.update(kwargs)
+        if self.response_cache:
+            hit, cached = self.response_cache.get(self.SERVICE, url, data)
+            if hit:
+                return cached
         response = self._post(url, data)
+        if self.response_cache:
+            self.response_cache.put(self.SERVICE, url, data, response["suggestions"])
         return response["suggestions"]
 
+    def iter_affiliated(
+        self, query: str, count: int = settings.SUGGESTION_COUNT, **kwargs
+    ) -> Iterator[Dict]:
+        """Find affiliated parties by INN, yielding each one as soon as it arrives."""
+        url = "findAffiliated/party"
+        data = {"query": query, "count": count}
+        data.update(kwargs)
+        return self._post_stream(url, data, key="suggestions")
+
+    def _prefetch(self, name: str, suggestions: List[Dict]):
+        """Fetch details of top suggestions in the background, as the prefetch policy says"""
+        if self.prefetch is None or self._prefetcher is None:
+            return
+        for query in self.prefetch.targets(name, suggestions):
+            try:
+                self._prefetcher.submit(self._fetch_ahead, name, query)
+            except RuntimeError:
+                # client is closed
+                return
+
+    def _fetch_ahead(self, name: str, query: str):
+        """Put records for suggestion ID into response cache, unless they are there already"""
+        policy, cache = self.prefetch, self.response_cache
+        if policy is None or cache is None:
+            return
+        data = {"query": query, "count": settings.SUGGESTION_COUNT}
+        calls = [(f"findById/{name}", lambda: self.find_by_id(name, query))]
+        if policy.affiliated and name == "party":
+            calls.append(("findAffiliated/party", lambda: self.find_affiliated(query)))
+        for url, call in calls:
+            if cache.get(self.SERVICE, url, data)[0]:
+                continue
+            if not policy.claim(self.budget, self.SERVICE):
+                return
+            try:
+                call()
+            except (httpx.HTTPError, RuntimeError):
+                # RuntimeError means the client was closed meanwhile
+                return
+
 
 class ProfileClient(ClientBase):
     """Dadata Profile API client"""
 
     BASE_URL = "https://dadata.ru/api/v2/"
+    SERVICE = "profile"
 
     def __init__(
         self,
-        token: str,
+        token: Union[str, KeyPool],
         secret: Optional[str] = None,
         timeout: int = settings.TIMEOUT_SEC,
+        base_url: Optional[str] = None,
     ):
-        super().__init__(base_url=self.BASE_URL, token=token, secret=secret, timeout=timeout)
+        super().__init__(
+            base_url=base_url or self.BASE_URL, token=token, secret=secret, timeout=timeout
+        )
 
     def get_balance(self) -> float:
         """Get account balance."""
@@ -183,27 +729,93 @@ class ProfileClient(ClientBase):
         return response
 
 
+def _service_url(base_url: Optional[str], service: str) -> Optional[str]:
+    """Base URL of `service` behind a gateway (see `dadata.gateway`) at `base_url`"""
+    return None if base_url is None else f"{base_url.rstrip('/')}/{service}/"
+
+
 class DadataClient:
     """Synchronous Dadata API client"""
 
     def __init__(
         self,
-        token: str,
+        token: Union[str, KeyPool],
         secret: Optional[str] = None,
         timeout: int = settings.TIMEOUT_SEC,
+        suggestion_cache: Optional[SuggestionCache] = None,
+        geo_cache: Optional[GeoCache] = None,
+        ip_cache: Optional[IPCache] = None,
+        budget: Optional[Budget] = None,
+        compression: Optional[str] = None,
+        response_cache: Optional[ResponseCache] = None,
+        base_url: Optional[str] = None,
+        prefetch: Optional[Prefetch] = None,
+        adaptive: Optional[AdaptiveConcurrency] = None,
     ):
-        self._cleaner = CleanClient(token=token, secret=secret, timeout=timeout)
-        self._suggestions = SuggestClient(token=token, secret=secret, timeout=timeout)
-        self._profile = ProfileClient(token=token, secret=secret, timeout=timeout)
+        self._cleaner = CleanClient(
+            token=token,
+            secret=secret,
+            timeout=timeout,
+            budget=budget,
+            compression=compression,
+            response_cache=response_cache,
+            base_url=_service_url(base_url, CleanClient.SERVICE),
+            adaptive=adaptive,
+            profile_url=_service_url(base_url, ProfileClient.SERVICE),
+        )
+        self._suggestions = SuggestClient(
+            token=token,
+            secret=secret,
+            timeout=timeout,
+            suggestion_cache=suggestion_cache,
+            geo_cache=geo_cache,
+            ip_cache=ip_cache,
+            budget=budget,
+            compression=compression,
+            response_cache=response_cache,
+            base_url=_service_url(base_url, SuggestClient.SERVICE),
+            prefetch=prefetch,
+            adaptive=adaptive,
+            profile_url=_service_url(base_url, ProfileClient.SERVICE),
+        )
+        self._profile = ProfileClient(
+            token=token,
+            secret=secret,
+            timeout=timeout,
+            base_url=_service_url(base_url, ProfileClient.SERVICE),
+        )
+        self._watch: Optional[threading.Event] = None
 
     def clean(self, name: str, source: str) -> Optional[Dict]:
         """Cleanse `source` as `name` data type."""
         return self._cleaner.clean(name=name, source=source)
 
+    def clean_many(
+        self,
+        name: str,
+        sources: Sequence[str],
+        concurrency: int = settings.BULK_CONCURRENCY,
+        normalizer: Optional[Normalizer] = DEFAULT_NORMALIZER,
+    ) -> List[Optional[Dict]]:
+        """Cleanse many `sources` as `name` data type."""
+        return self._cleaner.clean_many(
+            name=name, sources=sources, concurrency=concurrency, normalizer=normalizer
+        )
+
+    def iter_clean(self, name: str, sources: Sequence[str]) -> Iterator[Dict]:
+        """Cleanse `sources` as `name` data type, yielding records as they arrive."""
+        return self._cleaner.iter_clean(name=name, sources=sources)
+
     def clean_record(self, structure: List[str], record: List[str]) -> List[Dict]:
         """Cleanse `record` of specified `structure`."""
         return self._cleaner.clean_record(structure=structure, record=record)
 
+    def iter_clean_records(
+        self, structure: List[str], records: Sequence[List[str]]
+    ) -> Iterator[List[Dict]]:
+        """Cleanse `records` of specified `structure`, yielding records as they arrive."""
+        return self._cleaner.iter_clean_records(structure=structure, records=records)
+
     def geolocate(
         self, name: str, lat: float, lon: float, radius_meters: int = 100, **kwargs
     ) -> List[Dict]:
@@ -212,6 +824,23 @@ class DadataClient:
             name=name, lat=lat, lon=lon, radius_meters=radius_meters, **kwargs
         )
 
+    def geolocate_many(
+        self,
+        name: str,
+        points: Sequence[Tuple[float, float]],
+        radius_meters: int = 100,
+        spread_meters: int = 0,
+        **kwargs,
+    ) -> List[List[Dict]]:
+        """Find places near each of given coordinates in given radius."""
+        return self._suggestions.geolocate_many(
+            name=name,
+            points=points,
+            radius_meters=radius_meters,
+            spread_meters=spread_meters,
+            **kwargs,
+        )
+
     def iplocate(self, query: str, **kwargs) -> Optional[Dict]:
         """Detect city by IPv4 or IPv6 address."""
         return self._suggestions.iplocate(query=query, **kwargs)
@@ -228,6 +857,19 @@ class DadataClient:
         """Find record in `name` directory by its ID."""
         return self._suggestions.find_by_id(name=name, query=query, count=count, **kwargs)
 
+    def find_by_ids(
+        self,
+        name: str,
+        queries: Sequence[str],
+        concurrency: int = settings.BULK_CONCURRENCY,
+        affiliated: bool = False,
+        **kwargs,
+    ) -> bulk.BulkResult:
+        """Find records in `name` directory by their IDs."""
+        return self._suggestions.find_by_ids(
+            name=name, queries=queries, concurrency=concurrency, affiliated=affiliated, **kwargs
+        )
+
     def find_by_email(
         self, name: str, query: str, count: int = settings.SUGGESTION_COUNT, **kwargs
     ) -> List[Dict]:
@@ -240,6 +882,52 @@ class DadataClient:
         """Find affiliated parties by INN."""
         return self._suggestions.find_affiliated(query=query, count=count, **kwargs)
 
+    def iter_affiliated(
+        self, query: str, count: int = settings.SUGGESTION_COUNT, **kwargs
+    ) -> Iterator[Dict]:
+        """Find affiliated parties by INN, yielding each one as soon as it arrives."""
+        return self._suggestions.iter_affiliated(query=query, count=count, **kwargs)
+
+    def warmup(self, connections: int = 1):
+        """Open `connections` connections to each API host ahead of time."""
+        for client in (self._cleaner, self._suggestions, self._profile):
+            client.warmup(connections)
+
+    def keepalive(self, interval: float = settings.KEEPALIVE_SEC, connections: int = 1):
+        """Keep `connections` connections to each API host open until the client is closed."""
+        for client in (self._cleaner, self._suggestions, self._profile):
+            client.keepalive(interval, connections)
+
+    def watch_versions(self, interval: float = settings.VERSIONS_POLL_SEC):
+        """Check dataset versions every `interval` seconds until the client is closed.
+        Drop cached results that depend on updated datasets."""
+        tracker = VersionTracker(
+            [
+                self._suggestions.suggestion_cache,
+                self._suggestions.geo_cache,
+                self._suggestions.ip_cache,
+                self._suggestions.response_cache,
+                self._cleaner.response_cache,
+            ]
+        )
+        tracker.update(self.get_versions())
+        if self._watch is not None:
+            self._watch.set()
+        stop = self._watch = threading.Event()
+
+        def run():
+            while not stop.wait(interval):
+                try:
+                    tracker.update(self.get_versions())
+                except httpx.HTTPError:
+                    # try again next time
+                    continue
+                except RuntimeError:
+                    # client closed meanwhile
+                    return
+
+        threading.Thread(target=run, name="dadata-versions", daemon=True).start()
+
     def get_balance(self) -> float:
         """Get account balance."""
         return self._profile.get_balance()
@@ -260,6 +948,9 @@ class DadataClient:
 
     def close(self):
         """Close network connections"""
+        if self._watch is not None:
+            self._watch.set()
+            self._watch = None
         self._cleaner.close()
         self._suggestions.close()
         self._profile.close()
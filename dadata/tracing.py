@@ -0,0 +1,104 @@
+"""
+Per-request phase timings.
+"""
+
+import contextlib
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional
+
+# httpcore trace events by phase
+_PHASES = {
+    "connect_tcp": "connect",
+    "connect_unix_socket": "connect",
+    "start_tls": "tls",
+    "send_request_headers": "send",
+    "send_request_body": "send",
+    "receive_response_headers": "wait",
+    "receive_response_body": "receive",
+}
+
+
+class Timing:
+    """Phase durations of a single API request, in seconds.
+
+    Phases are `encode`, `connect` (including DNS lookup), `tls`, `send`, `wait`
+    (time to first byte), `receive` and `decode`. Phases that did not happen,
+    like `connect` on a reused connection, are absent.
+    """
+
+    def __init__(self, method: str, url: str, callback: Callable[["Timing"], None]):
+        self.method = method
+        self.url = url
+        self.status_code: Optional[int] = None
+        self.phases: Dict[str, float] = {}
+        self.total = 0.0
+        self._callback = callback
+        self._start = time.perf_counter()
+        self._started: Dict[str, float] = {}
+
+    def __repr__(self) -> str:
+        phases = ", ".join(
+            f"{name}={seconds * 1000:.1f}ms" for name, seconds in self.phases.items()
+        )
+        return f"<Timing {self.method} {self.url} {self.status_code} {phases}>"
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time the block as `name` phase."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._add(name, time.perf_counter() - start)
+
+    def trace(self, event: str, info: Dict):
+        """Trace hook for httpx client."""
+        name, _, stage = event.rpartition(".")
+        phase = _PHASES.get(name.partition(".")[2])
+        if phase is None:
+            return
+        if stage == "started":
+            self._started[phase] = time.perf_counter()
+        elif phase in self._started:
+            self._add(phase, time.perf_counter() - self._started.pop(phase))
+
+    async def atrace(self, event: str, info: Dict):
+        """Trace hook for httpx async client."""
+        self.trace(event, info)
+
+    def finish(self, status_code: Optional[int]):
+        """Complete the timing and report it."""
+        self.status_code = status_code
+        self.total = time.perf_counter() - self._start
+        self._callback(self)
+
+    def _add(self, phase: str, seconds: float):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+
+_callback: ContextVar[Optional[Callable[[Timing], None]]] = ContextVar("dadata_trace", default=None)
+
+
+@contextlib.contextmanager
+def trace(callback: Callable[[Timing], None]) -> Iterator[None]:
+    """Pass timings of requests made within the block to `callback`."""
+    token = _callback.set(callback)
+    try:
+        yield
+    finally:
+        _callback.reset(token)
+
+
+@contextlib.contextmanager
+def collect() -> Iterator[List[Timing]]:
+    """Collect timings of requests made within the block into a list."""
+    timings: List[Timing] = []
+    with trace(timings.append):
+        yield timings
+
+
+def start(method: str, url: str) -> Optional[Timing]:
+    """Start timing a request, if tracing is on."""
+    callback = _callback.get()
+    return None if callback is None else Timing(method, url, callback)
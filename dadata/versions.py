@@ -0,0 +1,59 @@
+"""
+Cache invalidation on dataset updates.
+"""
+
+from typing import Any, Dict, Optional, Sequence, Set
+
+# directories built on each dataset, by dataset name as given in get_versions() resources
+DATASETS: Dict[str, Sequence[str]] = {
+    "ЕГРЮЛ": ("party", "company"),
+    "ФИАС": ("address", "fias", "delivery"),
+    "ГАР": ("address", "fias", "delivery"),
+    "Банки": ("bank",),
+}
+
+# get_versions() sections of client services
+SECTIONS = {"clean": "factor", "suggestions": "suggestions"}
+
+
+def changes(old: Dict, new: Dict) -> Dict[str, Optional[Set[str]]]:
+    """Directories affected by dataset updates between two get_versions() responses, by service.
+
+    None means every directory of the service: a dataset not listed in DATASETS has changed.
+    """
+    affected: Dict[str, Optional[Set[str]]] = {}
+    for service, section in SECTIONS.items():
+        before = (old.get(section) or {}).get("resources") or {}
+        after = (new.get(section) or {}).get("resources") or {}
+        changed = {
+            name for name in before.keys() | after.keys() if before.get(name) != after.get(name)
+        }
+        if not changed:
+            continue
+        if changed - DATASETS.keys():
+            affected[service] = None
+        else:
+            affected[service] = {name for dataset in changed for name in DATASETS[dataset]}
+    return affected
+
+
+class VersionTracker:
+    """Invalidates cached results when the datasets behind them are updated.
+
+    Each `update()` with a fresh get_versions() response drops results from caches
+    that depend on datasets changed since the previous one.
+    """
+
+    def __init__(self, caches: Sequence[Any]):
+        # the same cache may serve several clients
+        unique = {id(cache): cache for cache in caches if cache is not None}
+        self.caches = list(unique.values())
+        self.versions: Optional[Dict] = None
+
+    def update(self, versions: Dict):
+        """Invalidate caches according to a get_versions() response."""
+        if self.versions is not None:
+            for service, directories in changes(self.versions, versions).items():
+                for cache in self.caches:
+                    cache.invalidate(service, directories)
+        self.versions = versions
@@ -0,0 +1,123 @@
+"""
+Tests for adaptive concurrency of bulk calls.
+"""
+
+import asyncio
+import threading
+from dadata.adaptive import AdaptiveConcurrency, AdaptiveLimit, bulk_calls, in_bulk_call
+
+
+def test_additive_increase():
+    limit = AdaptiveLimit(initial=2)
+    for _ in range(2):
+        assert limit.try_acquire()
+    assert not limit.try_acquire()
+    limit.release(0.01)
+    limit.release(0.01)
+    assert limit.limit == 2
+    limit.try_acquire()
+    limit.release(0.01)
+    assert limit.limit == 3
+    assert limit.inflight == 0
+
+
+def test_backoff_once_per_round_trip():
+    now = [0.0]
+    limit = AdaptiveLimit(initial=10, clock=lambda: now[0])
+    for _ in range(3):
+        limit.try_acquire()
+    limit.release(0.1, overload=True)
+    assert limit.limit == 7
+    now[0] = 0.05
+    limit.release(0.1, overload=True)
+    assert limit.limit == 7
+    now[0] = 0.2
+    limit.release(0.1, overload=True)
+    assert limit.limit == 4
+
+
+def test_slow_call():
+    now = [0.0]
+    limit = AdaptiveLimit(initial=10, clock=lambda: now[0])
+    for _ in range(2):
+        limit.try_acquire()
+    limit.release(0.01)
+    assert limit.baseline == 0.01
+    now[0] = 1.0
+    limit.release(0.05)
+    assert limit.limit == 7
+
+
+def test_bounds():
+    now = [0.0]
+    limit = AdaptiveLimit(initial=3, min_limit=2, max_limit=4, clock=lambda: now[0])
+    for _ in range(20):
+        limit.try_acquire()
+        limit.release(0.01)
+    assert limit.limit == 4
+    for _ in range(5):
+        now[0] += 1
+        limit.try_acquire()
+        limit.release(0.01, overload=True)
+    assert limit.limit == 2
+
+
+def test_acquire_timeout():
+    limit = AdaptiveLimit(initial=1)
+    assert limit.acquire()
+    assert not limit.acquire(timeout=0.01)
+    waiter = threading.Thread(target=limit.acquire)
+    waiter.start()
+    limit.release(0.01)
+    waiter.join(timeout=1)
+    assert not waiter.is_alive()
+    assert limit.inflight == 1
+
+
+def test_acquire_async_loops():
+    limit = AdaptiveLimit(initial=1)
+
+    async def hold():
+        await limit.acquire_async()
+        await asyncio.sleep(0.01)
+        limit.release(0.01)
+
+    async def run():
+        await asyncio.gather(hold(), hold(), hold())
+
+    # a limit shared by clients in different event loops, one after another
+    asyncio.run(run())
+    asyncio.run(run())
+    assert limit.inflight == 0
+
+
+def test_acquire_async_other_thread():
+    limit = AdaptiveLimit(initial=1)
+    assert limit.acquire()
+    waiter = threading.Thread(target=asyncio.run, args=(limit.acquire_async(),))
+    waiter.start()
+    waiter.join(timeout=0.05)
+    assert waiter.is_alive()
+    limit.release(0.01)
+    waiter.join(timeout=1)
+    assert not waiter.is_alive()
+    assert limit.inflight == 1
+
+
+def test_hosts():
+    changes = []
+    adaptive = AdaptiveConcurrency(initial=5, on_change=lambda *change: changes.append(change))
+    limit = adaptive.host("cleaner.dadata.ru")
+    assert adaptive.host("cleaner.dadata.ru") is limit
+    adaptive.host("suggestions.dadata.ru")
+    limit.try_acquire()
+    limit.release(0.01, overload=True)
+    assert adaptive.limits == {"cleaner.dadata.ru": 3, "suggestions.dadata.ru": 5}
+    assert changes == [("cleaner.dadata.ru", 3)]
+
+
+def test_bulk_calls():
+    assert not in_bulk_call()
+    with bulk_calls():
+        assert in_bulk_call()
+    assert not in_bulk_call()
@@ -0,0 +1,163 @@
+"""
+Tests for response cache backends.
+"""
+
+import multiprocessing
+import socket
+import socketserver
+import sqlite3
+import threading
+import time
+from unittest import mock
+import pytest
+from dadata.backends import MemoryBackend, RedisBackend, RespError, SQLiteBackend, _read
+from dadata.cache import ResponseCache
+
+
+class RespHandler(socketserver.StreamRequestHandler):
+    """Tiny in-memory server for the subset of Redis protocol used by RedisBackend"""
+
+    def handle(self):
+        store = self.server.store  # type: ignore[attr-defined]
+        while True:
+            try:
+                command = _read(self.rfile)
+            except ConnectionError:
+                return
+            name, args = command[0].upper(), command[1:]
+            if name == b"MGET":
+                reply = b"*%d\r\n" % len(args)
+                for key in args:
+                    value = store.get(key)
+                    reply += b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+            elif name == b"SET":
+                store[args[0]] = args[1]
+                reply = b"+OK\r\n"
+            elif name == b"SCAN":
+                pattern = args[2].rstrip(b"*").replace(b"\\", b"")
+                keys = [key for key in store if key.startswith(pattern)]
+                reply = b"*2\r\n$1\r\n0\r\n*%d\r\n" % len(keys)
+                reply += b"".join(b"$%d\r\n%s\r\n" % (len(key), key) for key in keys)
+            elif name == b"DEL":
+                for key in args:
+                    store.pop(key, None)
+                reply = b":%d\r\n" % len(args)
+            else:
+                reply = b"-ERR unknown command\r\n"
+            self.wfile.write(reply)
+
+
+@pytest.fixture
+def resp_server():
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), RespHandler)
+    server.daemon_threads = True
+    server.store = {}  # type: ignore[attr-defined]
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _fill(path):
+    SQLiteBackend(path).set_many({"clean:name:from-child": b"1"}, ttl=60)
+
+
+def test_memory_backend():
+    backend = MemoryBackend(maxsize=2)
+    backend.set_many({"a": b"1", "b": b"2"}, ttl=60)
+    assert backend.get_many(["a", "b", "c"]) == [b"1", b"2", None]
+    backend.set_many({"c": b"3"}, ttl=60)
+    assert backend.get_many(["a", "c"]) == [None, b"3"]
+
+
+def test_memory_backend_expired():
+    backend = MemoryBackend()
+    backend.set_many({"a": b"1"}, ttl=0)
+    assert backend.get_many(["a"]) == [None]
+
+
+def test_sqlite_backend(tmp_path):
+    backend = SQLiteBackend(tmp_path / "cache.db")
+    backend.set_many({"suggestions:party:1": b"1", "suggestions:bank:2": b"2"}, ttl=60)
+    backend.set_many({"clean:name:3": b"3"}, ttl=-1)
+    assert backend.get_many(["suggestions:party:1", "suggestions:bank:2", "clean:name:3"]) == [
+        b"1",
+        b"2",
+        None,
+    ]
+    backend.delete_prefix("suggestions:party:")
+    assert backend.get_many(["suggestions:party:1", "suggestions:bank:2"]) == [None, b"2"]
+    backend.clear()
+    assert backend.get_many(["suggestions:bank:2"]) == [None]
+    backend.close()
+
+
+def test_sqlite_backend_shared(tmp_path):
+    path = tmp_path / "cache.db"
+    backend = SQLiteBackend(path)
+    process = multiprocessing.get_context("spawn").Process(target=_fill, args=(path,))
+    process.start()
+    process.join()
+    assert backend.get_many(["clean:name:from-child"]) == [b"1"]
+
+
+def test_redis_backend(resp_server):
+    backend = RedisBackend(port=resp_server.server_address[1], namespace="test:")
+    backend.set_many({"suggestions:party:1": b"1", "suggestions:bank:2": b"2"}, ttl=60)
+    assert b"test:suggestions:party:1" in resp_server.store
+    assert backend.get_many(["suggestions:party:1", "missing"]) == [b"1", None]
+    backend.delete_prefix("suggestions:party:")
+    assert backend.get_many(["suggestions:party:1", "suggestions:bank:2"]) == [None, b"2"]
+    backend.close()
+
+
+def test_redis_backend_error(resp_server):
+    backend = RedisBackend(port=resp_server.server_address[1], db=1)
+    with pytest.raises(RespError):
+        backend.get_many(["key"])
+
+
+def test_response_cache_backend(tmp_path):
+    path = tmp_path / "cache.db"
+    first = ResponseCache(backend=SQLiteBackend(path))
+    second = ResponseCache(backend=SQLiteBackend(path))
+    first.put_many("clean", "clean/name", [(["Сережа"], {"result": "Сергей"}), (["Вася"], None)])
+    assert second.get_many("clean", "clean/name", [["Сережа"], ["Вася"], ["Петя"]]) == [
+        (True, {"result": "Сергей"}),
+        (True, None),
+        (False, None),
+    ]
+    first.invalidate("clean", {"name"})
+    assert second.get("clean", "clean/name", ["Сережа"]) == (False, None)
+
+
+def test_response_cache_ttl(tmp_path):
+    cache = ResponseCache(ttl=0.05, backend=SQLiteBackend(tmp_path / "cache.db"))
+    cache.put("clean", "clean/name", ["Сережа"], None)
+    time.sleep(0.1)
+    assert cache.get("clean", "clean/name", ["Сережа"]) == (False, None)
+
+
+def test_response_cache_backend_down(caplog):
+    with socket.socket() as sock:
+        sock.bind(("localhost", 0))
+        port = sock.getsockname()[1]
+    cache = ResponseCache(backend=RedisBackend(port=port))
+    cache.put("clean", "clean/name", ["Сережа"], None)
+    assert cache.get("clean", "clean/name", ["Сережа"]) == (False, None)
+    assert "Response cache store failed" in caplog.text
+    assert "Response cache lookup failed" in caplog.text
+
+
+def test_response_cache_database_locked(tmp_path):
+    backend = SQLiteBackend(tmp_path / "cache.db")
+    cache = ResponseCache(backend=backend)
+    locked = sqlite3.OperationalError("database is locked")
+    with mock.patch.object(backend, "set_many", side_effect=locked):
+        cache.put("clean", "clean/name", ["Сережа"], None)
+    with mock.patch.object(backend, "get_many", side_effect=locked):
+        assert cache.get_many("clean", "clean/name", [["Сережа"], ["Вася"]]) == [
+            (False, None),
+            (False, None),
+        ]
@@ -0,0 +1,78 @@
+"""
+Tests for synchronous client backed by a background event loop.
+"""
+
+import json
+import pytest
+from pytest_httpx import HTTPXMock, IteratorStream
+from dadata import DadataBackground
+from dadata.asynchr import CleanClient, SuggestClient
+from dadata.scheduling import BATCH, Scheduler, priority
+from dadata import tracing
+
+
+@pytest.fixture
+def dadata():
+    client = DadataBackground(token="token")
+    yield client
+    client.close()
+
+
+def test_clean(dadata, httpx_mock: HTTPXMock):
+    expected = {"source": "Сережа", "result": "Сергей", "qc": 1}
+    httpx_mock.add_response(method="POST", url=f"{CleanClient.BASE_URL}clean/name", json=[expected])
+    assert dadata.clean(name="name", source="Сережа") == expected
+
+
+def test_submit(dadata, httpx_mock: HTTPXMock):
+    for inn in ("7707083893", "7736207543"):
+        httpx_mock.add_response(
+            method="POST",
+            url=f"{SuggestClient.BASE_URL}findById/party",
+            match_json={"query": inn, "count": 10},
+            json={"suggestions": [{"data": {"inn": inn}}]},
+        )
+    futures = [dadata.submit("find_by_id", "party", inn) for inn in ("7707083893", "7736207543")]
+    actual = [future.result()[0]["data"]["inn"] for future in futures]
+    assert actual == ["7707083893", "7736207543"]
+
+
+def test_submit_priority(httpx_mock: HTTPXMock):
+    httpx_mock.add_response(method="POST", url=f"{CleanClient.BASE_URL}clean/name", json=[])
+    scheduler = Scheduler(slots=2)
+    levels = []
+    acquire = scheduler._acquire
+
+    async def spy(level):
+        levels.append(level)
+        await acquire(level)
+
+    scheduler._acquire = spy
+    with DadataBackground(token="token", scheduler=scheduler) as dadata:
+        with priority(BATCH):
+            dadata.clean(name="name", source="Сережа")
+    assert levels == [BATCH]
+
+
+def test_iter_affiliated(dadata, httpx_mock: HTTPXMock):
+    expected = [{"value": "ООО ДЗЕН.ПЛАТФОРМА"}, {"value": "ООО ЕДАДИЛ"}]
+    body = json.dumps({"suggestions": expected}, ensure_ascii=False).encode()
+    httpx_mock.add_response(
+        method="POST",
+        url=f"{SuggestClient.BASE_URL}findAffiliated/party",
+        stream=IteratorStream([body[:10], body[10:]]),
+    )
+    assert list(dadata.iter_affiliated("7736207543")) == expected
+
+
+def test_close(dadata):
+    dadata.close()
+    dadata.close()
+    assert not dadata._thread.is_alive()
+
+
+def test_tracing(dadata, httpx_mock: HTTPXMock):
+    httpx_mock.add_response(method="POST", url=f"{CleanClient.BASE_URL}clean/name", json=[])
+    with tracing.collect() as timings:
+        dadata.clean(name="name", source="Сережа")
+    assert [timing.url for timing in timings] == ["clean/name"]
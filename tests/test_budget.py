@@ -0,0 +1,51 @@
+"""
+Tests for bulk job budget governor.
+"""
+
+from dadata.budget import Budget
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_claim_poll():
+    clock = Clock()
+    budget = Budget(poll_interval=60, clock=clock)
+    assert budget.claim_poll()
+    assert not budget.claim_poll()
+    clock.now = 60
+    assert budget.claim_poll()
+
+
+def test_unlimited():
+    budget = Budget()
+    budget.update(100.0, {"services": {"clean": 1000}})
+    assert budget.left("clean") == 1.0
+    assert budget.delay("clean") == 0.0
+
+
+def test_daily_limit():
+    budget = Budget(daily_limits={"clean": 1000}, reserve=0.1, slowdown=0.1, max_delay=1.0)
+    budget.update(100.0, {"services": {"clean": 450}})
+    assert budget.left("clean") == 0.5
+    assert budget.left("suggestions") == 1.0
+    budget.record("clean", 405)
+    assert budget.delay("clean") == 0.5
+    budget.record("clean", 45)
+    assert budget.delay("clean") is None
+
+
+def test_money_limit():
+    budget = Budget(limit=10.0, cost=0.5)
+    budget.update(100.0, {})
+    budget.update(96.0, {})
+    assert budget.left("clean") == 0.6
+    budget.record("suggestions", 12)
+    assert budget.delay("clean") is None
+    budget.update(95.0, {})
+    assert budget.left("clean") == 0.5
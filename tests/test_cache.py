@@ -0,0 +1,215 @@
+"""
+Tests for client-side caches.
+"""
+
+from dadata.cache import GeoCache, IPCache, ResponseCache, SuggestionCache
+
+LENIN = [
+    {"value": "г Москва, Ленинский пр-кт", "unrestricted_value": "г Москва, Ленинский пр-кт"},
+    {"value": "г Москва, ул Ленина", "unrestricted_value": "г Москва, ул Ленина"},
+]
+
+HOUSES = [
+    {
+        "value": "г Москва, ул Сухонская, д 11",
+        "data": {"geo_lat": "55.8782557", "geo_lon": "37.65372"},
+    },
+    {"value": "г Москва, ул Сухонская, д 13", "data": {"geo_lat": "55.8785", "geo_lon": "37.6545"}},
+]
+
+
+def test_suggestion_cache_exact():
+    cache = SuggestionCache()
+    cache.put("address", "Москва Ленин", 10, {}, LENIN)
+    assert cache.get("address", "москва  ленин", 10, {}) == LENIN
+    assert cache.get("address", "москва ленин", 1, {}) == LENIN[:1]
+
+
+def test_suggestion_cache_prefix():
+    cache = SuggestionCache()
+    cache.put("address", "москва ленин", 10, {}, LENIN)
+    assert cache.get("address", "москва ленинск", 10, {}) == LENIN[:1]
+
+
+def test_suggestion_cache_incomplete():
+    cache = SuggestionCache()
+    cache.put("address", "москва ленин", 2, {}, LENIN)
+    assert cache.get("address", "москва ленин", 2, {}) == LENIN
+    assert cache.get("address", "москва ленин", 5, {}) is None
+    assert cache.get("address", "москва ленинск", 2, {}) is None
+
+
+def test_suggestion_cache_capped():
+    cache = SuggestionCache()
+    page = LENIN * 10
+    cache.put("address", "москва ленин", 25, {}, page)
+    assert cache.get("address", "москва ленин", 20, {}) == page
+    assert cache.get("address", "москва ленина 3", 25, {}) is None
+
+
+def test_suggestion_cache_fuzzy():
+    cache = SuggestionCache()
+    cache.put("address", "мск ленин", 10, {}, LENIN)
+    assert cache.get("address", "мск ленинск", 10, {}) is None
+
+
+def test_suggestion_cache_empty_answer():
+    cache = SuggestionCache()
+    cache.put("address", "москва ленин", 10, {}, LENIN)
+    assert cache.get("address", "москва ленинх", 10, {}) is None
+
+
+def test_suggestion_cache_scope():
+    cache = SuggestionCache()
+    cache.put("address", "москва ленин", 10, {"locations": [{"city": "Москва"}]}, LENIN)
+    assert cache.get("address", "москва ленин", 10, {}) is None
+    assert cache.get("party", "москва ленин", 10, {"locations": [{"city": "Москва"}]}) is None
+    assert cache.get("address", "москва ленин", 10, {"locations": [{"city": "Москва"}]}) == LENIN
+
+
+def test_suggestion_cache_ttl():
+    cache = SuggestionCache(ttl=0)
+    cache.put("address", "москва ленин", 10, {}, LENIN)
+    assert cache.get("address", "москва ленин", 10, {}) is None
+
+
+def test_suggestion_cache_maxsize():
+    cache = SuggestionCache(maxsize=1)
+    cache.put("address", "москва ленин", 10, {}, LENIN)
+    cache.put("address", "самара", 10, {}, [])
+    assert cache.get("address", "москва ленин", 10, {}) is None
+
+
+def test_geo_cache_covered():
+    cache = GeoCache()
+    cache.put("address", 55.8782, 37.6537, 500, {}, HOUSES)
+    assert cache.get("address", 55.8782, 37.6537, 500, {}) == HOUSES
+    assert cache.get("address", 55.87826, 37.65372, 20, {}) == HOUSES[:1]
+    assert cache.get("address", 55.8786, 37.6546, 30, {"count": 1}) == HOUSES[1:]
+
+
+def test_geo_cache_not_covered():
+    cache = GeoCache()
+    cache.put("address", 55.8782, 37.6537, 100, {}, HOUSES)
+    assert cache.get("address", 55.8782, 37.6537, 200, {}) is None
+    assert cache.get("address", 55.8792, 37.6537, 50, {}) is None
+    assert cache.get("address", 55.8782, 37.6537, 100, {"division": "municipal"}) is None
+
+
+def test_geo_cache_truncated():
+    cache = GeoCache()
+    cache.put("address", 55.8782, 37.6537, 100, {"count": 2}, HOUSES)
+    assert cache.get("address", 55.8782, 37.6537, 50, {"count": 2}) is None
+
+
+def test_geo_cache_capped():
+    cache = GeoCache()
+    cache.put("address", 55.8782, 37.6537, 100, {"count": 25}, HOUSES * 10)
+    assert cache.get("address", 55.8782, 37.6537, 50, {"count": 25}) is None
+
+
+def test_geo_cache_no_coordinates():
+    cache = GeoCache()
+    cache.put("address", 55.8782, 37.6537, 100, {}, [{"value": "г Москва", "data": {}}])
+    assert cache.get("address", 55.8782, 37.6537, 50, {}) is None
+
+
+def test_geo_cache_maxsize():
+    cache = GeoCache(maxsize=1)
+    cache.put("address", 55.8782, 37.6537, 100, {}, HOUSES)
+    cache.put("address", 59.9386, 30.3141, 100, {}, [])
+    assert cache.get("address", 55.8782, 37.6537, 50, {}) is None
+    assert cache.get("address", 59.9386, 30.3141, 50, {}) == []
+
+
+def test_ip_cache_subnet():
+    cache = IPCache()
+    cache.put("212.45.30.108", {}, {"value": "г Москва"})
+    assert cache.get("212.45.30.1", {}) == (True, {"value": "г Москва"})
+    assert cache.get("212.45.31.1", {}) == (False, None)
+    assert cache.get("212.45.30.1", {"language": "en"}) == (False, None)
+
+
+def test_ip_cache_ipv6():
+    cache = IPCache()
+    cache.put("2a02:6b8::feed:0ff", {}, {"value": "г Москва"})
+    assert cache.get("2a02:6b8:0:ffff::1", {}) == (True, {"value": "г Москва"})
+    assert cache.get("2a02:6b8:1::1", {}) == (False, None)
+
+
+def test_ip_cache_longest_prefix():
+    cache = IPCache()
+    cache.put("10.0.0.0", {}, {"value": "г Москва"}, prefix=8)
+    cache.put("10.1.2.3", {}, {"value": "г Самара"})
+    assert cache.get("10.1.2.200", {}) == (True, {"value": "г Самара"})
+    assert cache.get("10.1.3.1", {}) == (True, {"value": "г Москва"})
+
+
+def test_ip_cache_not_found():
+    cache = IPCache()
+    cache.put("192.168.0.1", {}, None)
+    assert cache.get("192.168.0.2", {}) == (True, None)
+    assert cache.get("not an ip", {}) == (False, None)
+
+
+def test_ip_cache_eviction():
+    cache = IPCache(maxsize=1)
+    cache.put("10.1.2.3", {}, {"value": "г Самара"})
+    cache.put("10.1.3.3", {}, {"value": "г Москва"})
+    assert cache.get("10.1.2.3", {}) == (False, None)
+    assert cache.get("10.1.3.3", {}) == (True, {"value": "г Москва"})
+    cache = IPCache(ttl=0)
+    cache.put("10.1.2.3", {}, {"value": "г Самара"})
+    assert cache.get("10.1.2.3", {}) == (False, None)
+
+
+def test_response_cache():
+    cache = ResponseCache()
+    data = {"query": "7707083893", "count": 10}
+    cache.put("suggestions", "findById/party", data, [{"value": "ПАО СБЕРБАНК"}])
+    assert cache.get("suggestions", "findById/party", {"count": 10, "query": "7707083893"}) == (
+        True,
+        [{"value": "ПАО СБЕРБАНК"}],
+    )
+    assert cache.get("suggestions", "findById/party", {"query": "7707083893", "count": 5}) == (
+        False,
+        None,
+    )
+
+
+def test_response_cache_ttl():
+    cache = ResponseCache(ttl=0)
+    cache.put("clean", "clean/name", ["Сережа"], None)
+    assert cache.get("clean", "clean/name", ["Сережа"]) == (False, None)
+
+
+def test_response_cache_invalidate():
+    cache = ResponseCache()
+    cache.put("suggestions", "findById/party", "7707083893", [])
+    cache.put("suggestions", "findById/bank", "044525225", [])
+    cache.put("clean", "clean/party", "7707083893", None)
+    cache.invalidate("suggestions", {"party"})
+    assert cache.get("suggestions", "findById/party", "7707083893") == (False, None)
+    assert cache.get("suggestions", "findById/bank", "044525225")[0]
+    assert cache.get("clean", "clean/party", "7707083893")[0]
+    cache.invalidate("clean")
+    assert cache.get("clean", "clean/party", "7707083893") == (False, None)
+
+
+def test_caches_invalidate():
+    suggestions = SuggestionCache()
+    suggestions.put("address", "москва ленин", 10, {}, LENIN)
+    suggestions.put("party", "сбербанк", 10, {}, [])
+    geo = GeoCache()
+    geo.put("address", 55.878, 37.654, 100, {}, HOUSES)
+    ip = IPCache()
+    ip.put("46.226.227.20", {}, {"value": "г Краснодар"})
+    for cache in (suggestions, geo, ip):
+        cache.invalidate("clean")
+        cache.invalidate("suggestions", {"address"})
+    assert suggestions.get("address", "москва ленин", 10, {}) is None
+    assert suggestions.get("party", "сбербанк", 10, {}) == []
+    assert geo.get("address", 55.878, 37.654, 100, {}) is None
+    assert ip.get("46.226.227.20", {})[0]
+    ip.invalidate("suggestions")
+    assert ip.get("46.226.227.20", {}) == (False, None)
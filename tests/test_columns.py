@@ -0,0 +1,128 @@
+"""
+Tests for columnar input and output.
+"""
+
+import pytest
+from pytest_httpx import HTTPXMock
+from dadata import asynchr, sync
+from dadata.columns import _values, aclean_column, clean_column, flatten
+
+URL = f"{sync.CleanClient.BASE_URL}clean/name"
+
+
+def add_responses(httpx_mock: HTTPXMock):
+    httpx_mock.add_response(
+        method="POST",
+        url=URL,
+        match_json=["Сережа"],
+        json=[{"source": "Сережа", "result": "Сергей", "qc": 0}],
+    )
+    httpx_mock.add_response(
+        method="POST",
+        url=URL,
+        match_json=["Вася"],
+        json=[{"source": "Вася", "result": "Василий", "qc": 1}],
+    )
+
+
+def test_clean_column(httpx_mock: HTTPXMock):
+    add_responses(httpx_mock)
+    with sync.DadataClient(token="token") as dadata:
+        actual = clean_column(dadata, "name", ["Сережа", None, "сережа ", "Вася", float("nan")])
+    assert actual == {
+        "source": ["Сережа", None, "сережа ", "Вася", None],
+        "result": ["Сергей", None, "Сергей", "Василий", None],
+        "qc": [0, None, 0, 1, None],
+    }
+    assert len(httpx_mock.get_requests()) == 2
+
+
+def test_clean_column_fields(httpx_mock: HTTPXMock):
+    add_responses(httpx_mock)
+    with sync.DadataClient(token="token") as dadata:
+        actual = clean_column(dadata, "name", ["Вася", "Сережа"], fields=["result"])
+    assert actual == {"result": ["Василий", "Сергей"]}
+
+
+@pytest.mark.asyncio
+async def test_aclean_column(httpx_mock: HTTPXMock):
+    add_responses(httpx_mock)
+    async with asynchr.DadataClient(token="token") as dadata:
+        actual = await aclean_column(dadata, "name", ["Вася", "Сережа"], fields=["result"])
+    assert actual == {"result": ["Василий", "Сергей"]}
+
+
+def test_clean_column_pandas(httpx_mock: HTTPXMock):
+    pandas = pytest.importorskip("pandas")
+    add_responses(httpx_mock)
+    column = pandas.Series(["Вася", None, "Сережа"], index=[10, 20, 30])
+    with sync.DadataClient(token="token") as dadata:
+        actual = clean_column(dadata, "name", column, fields=["result"])
+    assert list(actual.index) == [10, 20, 30]
+    assert actual["result"].isna().tolist() == [False, True, False]
+    assert actual["result"][30] == "Сергей"
+
+
+def test_clean_column_pandas_nullable(httpx_mock: HTTPXMock):
+    pandas = pytest.importorskip("pandas")
+    add_responses(httpx_mock)
+    column = pandas.Series(["Вася", None, "Сережа"], dtype="string")
+    with sync.DadataClient(token="token") as dadata:
+        actual = clean_column(dadata, "name", column, fields=["result"])
+    assert actual["result"].isna().tolist() == [False, True, False]
+    assert _values(pandas.Series([1, None], dtype="Int64")) == ["1", None]
+
+
+def test_clean_column_arrow(httpx_mock: HTTPXMock):
+    pyarrow = pytest.importorskip("pyarrow")
+    add_responses(httpx_mock)
+    column = pyarrow.array(["Вася", None, "Сережа"])
+    with sync.DadataClient(token="token") as dadata:
+        actual = clean_column(dadata, "name", column, fields=["result", "qc"])
+    assert actual.column_names == ["result", "qc"]
+    assert actual["qc"].to_pylist() == [1, None, 0]
+
+
+SUGGESTIONS = [
+    {
+        "value": "ПАО СБЕРБАНК",
+        "data": {"inn": "7707083893", "capital": {"value": 67760844}, "employee_count": "210000"},
+    },
+    {
+        "value": "ООО ЕДАДИЛ",
+        "data": {"inn": "7728237907", "address": {"value": "г Москва"}, "geo_lat": "55.73"},
+    },
+]
+
+
+def test_flatten():
+    actual = flatten(SUGGESTIONS)
+    assert actual == {
+        "value": ["ПАО СБЕРБАНК", "ООО ЕДАДИЛ"],
+        "data.inn": ["7707083893", "7728237907"],
+        "data.capital.value": [67760844.0, None],
+        "data.employee_count": [210000, None],
+        "data.address.value": [None, "г Москва"],
+        "data.geo_lat": [None, 55.73],
+    }
+
+
+def test_flatten_fields():
+    actual = flatten(SUGGESTIONS, fields=["data.address.value", "data.geo_lat", "data.kpp"])
+    assert actual == {
+        "data.address.value": [None, "г Москва"],
+        "data.geo_lat": [None, 55.73],
+        "data.kpp": [None, None],
+    }
+
+
+def test_flatten_empty():
+    assert flatten([]) == {}
+    assert flatten([], fields=["value"]) == {"value": []}
+
+
+def test_flatten_arrow():
+    pyarrow = pytest.importorskip("pyarrow")
+    actual = flatten(SUGGESTIONS, arrow=True)
+    assert actual["data.geo_lat"].type == pyarrow.float64()
+    assert actual["data.employee_count"].to_pylist() == [210000, None]
@@ -0,0 +1,57 @@
+"""
+Tests for request and response compression.
+"""
+
+import gzip
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from dadata import compression
+
+
+def test_accept_encoding():
+    assert "gzip" in compression.accept_encoding().split(", ")
+
+
+def test_accept_encoding_httpx(monkeypatch):
+    supported = {"identity": None, "gzip": None, "deflate": None}
+    monkeypatch.setattr(compression.httpx_decoders, "SUPPORTED_DECODERS", supported)
+    assert compression.accept_encoding() == "gzip, deflate"
+    monkeypatch.setitem(supported, "br", None)
+    assert compression.accept_encoding() == "br, gzip, deflate"
+    monkeypatch.setattr(compression, "httpx_decoders", None)
+    assert compression.accept_encoding() == "gzip, deflate"
+
+
+def test_zstd_threads():
+    zstandard = pytest.importorskip("zstandard")
+    data = {"query": "москва " * 2000}
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        bodies = list(executor.map(lambda _: compression.compress(data, "zstd", 0)[0], range(64)))
+    expected = compression.encode_json(data)
+    assert all(zstandard.ZstdDecompressor().decompress(body) == expected for body in bodies)
+
+
+def test_compress_small():
+    body, headers = compression.compress(["Сережа"], "gzip", min_size=1024)
+    assert body == '["Сережа"]'.encode()
+    assert headers == {}
+
+
+def test_compress_large():
+    data = {"query": "москва " * 200, "count": 20}
+    body, headers = compression.compress(data, "gzip", min_size=1024)
+    assert headers == {"Content-Encoding": "gzip"}
+    assert gzip.decompress(body) == compression.encode_json(data)
+
+
+def test_compress_unsupported():
+    with pytest.raises(ValueError):
+        compression.compress([], "lzma", min_size=0)
+
+
+def test_decompress():
+    body = b'["7707083893"]'
+    assert compression.decompress(gzip.compress(body), "gzip") == body
+    assert compression.decompress(body, "") == body
+    with pytest.raises(ValueError):
+        compression.decompress(body, "gzip")
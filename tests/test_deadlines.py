@@ -0,0 +1,61 @@
+"""
+Tests for per-call deadlines.
+"""
+
+import contextvars
+import time
+import httpx
+import pytest
+from dadata import deadlines
+from dadata.deadlines import DeadlineExceeded, deadline
+
+
+def test_no_deadline():
+    assert deadlines.remaining() is None
+    deadlines.check(wait=3600)
+    timeout = httpx.Timeout(3)
+    assert deadlines.timeout(timeout) is timeout
+
+
+def test_deadline():
+    with deadline(10):
+        assert 9 < deadlines.remaining() <= 10
+        deadlines.check(wait=1)
+        with pytest.raises(DeadlineExceeded):
+            deadlines.check(wait=11)
+    assert deadlines.remaining() is None
+
+
+def test_nested_deadline():
+    with deadline(1):
+        with deadline(10):
+            assert deadlines.remaining() <= 1
+        with deadline(0.5):
+            assert deadlines.remaining() <= 0.5
+
+
+def test_expired():
+    with deadline(0.01):
+        time.sleep(0.02)
+        with pytest.raises(DeadlineExceeded):
+            deadlines.check()
+
+
+def test_timeout():
+    with deadline(1):
+        timeout = deadlines.timeout(httpx.Timeout(3, connect=0.5))
+    assert timeout.connect == 0.5
+    assert 0.9 < timeout.read <= 1
+    assert 0.9 < timeout.pool <= 1
+
+
+def test_deadline_is_http_error():
+    assert issubclass(DeadlineExceeded, httpx.HTTPError)
+
+
+def test_bind():
+    with deadline(10):
+        call = deadlines.bind(deadlines.remaining)
+    assert deadlines.remaining() is None
+    assert call() <= 10
+    assert contextvars.copy_context().run(call) <= 10
@@ -0,0 +1,129 @@
+"""
+Tests for multi-process bulk engine.
+"""
+
+import json
+import httpx
+import pytest
+from pytest_httpx import HTTPXMock
+from dadata.asynchr import CleanClient, SuggestClient
+from dadata.engine import BulkEngine, SharedRateLimiter, _shard_key
+
+
+def add_clean_responses(httpx_mock: HTTPXMock, names):
+    for name in names:
+        httpx_mock.add_response(
+            method="POST",
+            url=f"{CleanClient.BASE_URL}clean/name",
+            match_json=[name],
+            json=[{"source": name, "result": name.upper()}],
+        )
+
+
+def test_shared_rate_limiter():
+    limiter = SharedRateLimiter(rate=10)
+    assert limiter.acquire() == 0
+    assert limiter.acquire() == pytest.approx(0.1, abs=0.01)
+
+
+def test_clean(httpx_mock: HTTPXMock):
+    add_clean_responses(httpx_mock, ["a", "b", "c"])
+    engine = BulkEngine(token="token", processes=0, shard_size=2)
+    actual = engine.clean(name="name", sources=["a", "b", "c"])
+    assert [item["result"] for item in actual] == ["A", "B", "C"]
+
+
+def test_find_by_id_sink(httpx_mock: HTTPXMock):
+    httpx_mock.add_response(
+        method="POST",
+        url=f"{SuggestClient.BASE_URL}findById/party",
+        json={"suggestions": [{"value": "ООО МОТОРИКА"}]},
+    )
+    shards = []
+    engine = BulkEngine(token="token", processes=0, shard_size=2)
+    engine.find_by_id(
+        name="party",
+        queries=["7719402047", "7719402047"],
+        sink=lambda offset, results: shards.append((offset, results)),
+    )
+    assert shards == [(0, [[{"value": "ООО МОТОРИКА"}], [{"value": "ООО МОТОРИКА"}]])]
+
+
+def test_checkpoint(httpx_mock: HTTPXMock, tmp_path):
+    checkpoint = tmp_path / "job.jsonl"
+    saved = {
+        "offset": 0,
+        "shard": _shard_key("clean", ["a", "b"], {"name": "name"}),
+        "results": [{"source": "a", "result": "A"}, {"source": "b"}],
+    }
+    checkpoint.write_text(json.dumps(saved) + "\n" + '{"offset": 2, "res')
+    add_clean_responses(httpx_mock, ["c"])
+    engine = BulkEngine(token="token", processes=0, shard_size=2, checkpoint=str(checkpoint))
+    actual = engine.clean(name="name", sources=["a", "b", "c"])
+    assert actual == saved["results"] + [{"source": "c", "result": "C"}]
+    lines = checkpoint.read_text().splitlines()
+    assert json.loads(lines[-1]) == {
+        "offset": 2,
+        "shard": _shard_key("clean", ["c"], {"name": "name"}),
+        "results": [{"source": "c", "result": "C"}],
+    }
+
+
+def test_checkpoint_other_job(httpx_mock: HTTPXMock, tmp_path):
+    checkpoint = tmp_path / "job.jsonl"
+    engine = BulkEngine(token="token", processes=0, shard_size=2, checkpoint=str(checkpoint))
+    add_clean_responses(httpx_mock, ["a", "b"])
+    engine.clean(name="name", sources=["a", "b"])
+    assert engine.clean(name="name", sources=["a", "b"])[0]["result"] == "A"
+    httpx_mock.add_response(
+        method="POST",
+        url=f"{CleanClient.BASE_URL}clean/email",
+        json=[{"source": "a", "result": None}],
+        is_reusable=True,
+    )
+    actual = engine.clean(name="email", sources=["a", "b"])
+    assert [item["result"] for item in actual] == [None, None]
+    assert len(httpx_mock.get_requests()) == 4
+
+
+def test_checkpoint_failed_lookups(httpx_mock: HTTPXMock, tmp_path):
+    url = f"{SuggestClient.BASE_URL}findById/party"
+    party = [{"value": "ООО МОТОРИКА"}]
+    httpx_mock.add_response(
+        method="POST",
+        url=url,
+        match_json={"query": "7719402047", "count": 10},
+        json={"suggestions": party},
+    )
+    httpx_mock.add_exception(
+        httpx.ConnectError("Connection refused"),
+        method="POST",
+        url=url,
+        match_json={"query": "7736207543", "count": 10},
+    )
+    checkpoint = tmp_path / "job.jsonl"
+    engine = BulkEngine(token="token", processes=0, shard_size=1, checkpoint=str(checkpoint))
+    queries = ["7719402047", "7736207543"]
+    assert engine.find_by_id(name="party", queries=queries) == [party, None]
+    assert list(engine.errors) == ["7736207543"]
+    httpx_mock.add_response(
+        method="POST",
+        url=url,
+        match_json={"query": "7736207543", "count": 10},
+        json={"suggestions": []},
+    )
+    assert engine.find_by_id(name="party", queries=queries) == [party, []]
+    assert engine.errors == {}
+    assert len(httpx_mock.get_requests()) == 3
+
+
+@pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+def test_processes(httpx_mock: HTTPXMock):
+    # worker processes are forked with the mocked transport
+    multiprocessing = pytest.importorskip("multiprocessing")
+    if multiprocessing.get_start_method() != "fork":
+        pytest.skip("needs fork start method")
+    add_clean_responses(httpx_mock, ["a", "b", "c", "d"])
+    engine = BulkEngine(token="token", processes=2, shard_size=1, rate=1000)
+    actual = engine.clean(name="name", sources=["a", "b", "c", "d"], ordered=True)
+    assert [item["result"] for item in actual] == ["A", "B", "C", "D"]
@@ -0,0 +1,111 @@
+"""
+Tests for local API gateway.
+"""
+
+import asyncio
+import json
+import httpx
+import pytest
+from pytest_httpx import HTTPXMock
+from dadata.asynchr import CleanClient, DadataClient, ProfileClient, SuggestClient
+from dadata.cache import ResponseCache
+from dadata.gateway import Gateway
+
+# let clients reach the gateway, mock only upstream API
+pytestmark = pytest.mark.httpx_mock(should_mock=lambda request: request.url.host != "127.0.0.1")
+
+
+def test_base_url():
+    dadata = DadataClient(token="token", base_url="http://127.0.0.1:8080/")
+    assert dadata._cleaner._client.base_url == "http://127.0.0.1:8080/clean/"
+    assert dadata._suggestions._client.base_url == "http://127.0.0.1:8080/suggestions/"
+    assert dadata._profile._client.base_url == "http://127.0.0.1:8080/profile/"
+
+
+@pytest.mark.asyncio
+async def test_suggest(httpx_mock: HTTPXMock):
+    expected = [{"value": "г Самара"}]
+    httpx_mock.add_response(
+        method="POST",
+        url=f"{SuggestClient.BASE_URL}suggest/address",
+        match_json={"query": "samara", "count": 10},
+        json={"suggestions": expected},
+    )
+    async with Gateway(token="token", port=0, response_cache=ResponseCache()) as gateway:
+        async with DadataClient(token="client", base_url=gateway.url) as dadata:
+            assert await dadata.suggest(name="address", query="samara") == expected
+            assert await dadata.suggest(name="address", query="samara") == expected
+    (request,) = httpx_mock.get_requests()
+    assert request.headers["Authorization"] == "Token token"
+
+
+@pytest.mark.asyncio
+async def test_single_flight(httpx_mock: HTTPXMock):
+    httpx_mock.add_response(
+        method="POST", url=f"{SuggestClient.BASE_URL}findById/party", json={"suggestions": []}
+    )
+    async with Gateway(token="token", port=0) as gateway:
+        async with DadataClient(token="client", base_url=gateway.url) as dadata:
+            calls = [dadata.find_by_id(name="party", query="7719402047") for _ in range(5)]
+            assert await asyncio.gather(*calls) == [[]] * 5
+    assert len(httpx_mock.get_requests()) == 1
+
+
+@pytest.mark.asyncio
+async def test_clean_batched(httpx_mock: HTTPXMock):
+    sources = ["Сережа", "Вася", "Петя"]
+    httpx_mock.add_response(
+        method="POST",
+        url=f"{CleanClient.BASE_URL}clean/name",
+        json=[{"source": source, "result": source.upper()} for source in sources],
+    )
+    async with Gateway(token="token", port=0, batch_window=0.05) as gateway:
+        async with DadataClient(token="client", base_url=gateway.url) as dadata:
+            calls = [dadata.clean(name="name", source=source) for source in sources]
+            actual = await asyncio.gather(*calls)
+    assert [record["result"] for record in actual] == ["СЕРЕЖА", "ВАСЯ", "ПЕТЯ"]
+    (request,) = httpx_mock.get_requests()
+    assert sorted(json.loads(request.content)) == sorted(sources)
+
+
+@pytest.mark.asyncio
+async def test_profile(httpx_mock: HTTPXMock):
+    httpx_mock.add_response(
+        method="GET", url=f"{ProfileClient.BASE_URL}profile/balance", json={"balance": 9922.30}
+    )
+    async with Gateway(token="token", port=0) as gateway:
+        async with DadataClient(token="client", base_url=gateway.url) as dadata:
+            assert await dadata.get_balance() == 9922.30
+
+
+@pytest.mark.asyncio
+async def test_warmup(httpx_mock: HTTPXMock):
+    httpx_mock.add_response(
+        method="GET", url=f"{ProfileClient.BASE_URL}profile/balance", json={"balance": 9922.30}
+    )
+    async with Gateway(token="token", port=0) as gateway:
+        async with DadataClient(token="client", base_url=gateway.url) as dadata:
+            await dadata.warmup()
+            assert await dadata.get_balance() == 9922.30
+
+
+@pytest.mark.asyncio
+async def test_upstream_error(httpx_mock: HTTPXMock):
+    httpx_mock.add_response(
+        method="POST", url=f"{SuggestClient.BASE_URL}suggest/address", status_code=403
+    )
+    async with Gateway(token="token", port=0) as gateway:
+        async with DadataClient(token="client", base_url=gateway.url) as dadata:
+            with pytest.raises(httpx.HTTPStatusError) as info:
+                await dadata.suggest(name="address", query="samara")
+    assert info.value.response.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_not_found():
+    async with Gateway(token="token", port=0) as gateway:
+        async with httpx.AsyncClient(base_url=gateway.url) as client:
+            response = await client.post("unknown/path", json={})
+            assert response.status_code == 404
+            response = await client.post("suggestions/suggest/address", content=b"{")
+            assert response.status_code == 400
@@ -0,0 +1,74 @@
+"""
+Tests for API key pool.
+"""
+
+import pytest
+from dadata.keys import KeyPool, KeyPoolExhausted, retry_after
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_round_robin():
+    pool = KeyPool(["one", ("two", "secret")])
+    assert pool.credentials() == [("one", None), ("two", "secret")]
+    assert [pool.acquire()[0] for _ in range(4)] == [0, 1, 0, 1]
+
+
+def test_rate_limit():
+    clock = Clock()
+    pool = KeyPool(["one", "two"], rate=1, clock=clock)
+    assert pool.acquire() == (0, 0.0)
+    assert pool.acquire() == (1, 0.0)
+    assert pool.acquire() == (0, 1.0)
+    assert pool.available() == 0
+    clock.now = 1.5
+    assert pool.available() == 1
+    clock.now = 2.0
+    assert pool.available() == 2
+
+
+def test_cooldown():
+    clock = Clock()
+    pool = KeyPool(["one", "two"], cooldown=10, clock=clock)
+    pool.report(0, 429)
+    assert pool.acquire()[0] == 1
+    assert pool.acquire()[0] == 1
+    clock.now = 10
+    assert pool.acquire()[0] == 0
+    pool.report(0, 403)
+    assert pool.acquire()[0] == 1
+    clock.now = 25
+    assert pool.acquire()[0] == 1
+    clock.now = 30
+    assert pool.acquire()[0] == 0
+
+
+def test_revoked():
+    pool = KeyPool(["one", "two"])
+    pool.report(0, 401)
+    assert pool.acquire()[0] == 1
+    pool.report(1, 401)
+    with pytest.raises(KeyPoolExhausted):
+        pool.acquire()
+
+
+def test_max_wait():
+    clock = Clock()
+    pool = KeyPool(["one"], cooldown=60, clock=clock)
+    pool.report(0, 429)
+    with pytest.raises(KeyPoolExhausted):
+        pool.acquire(max_wait=3)
+    clock.now = 58
+    assert pool.acquire(max_wait=3) == (0, 2)
+
+
+def test_retry_after():
+    assert retry_after({"Retry-After": "120"}) == 120.0
+    assert retry_after({"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}) is None
+    assert retry_after({}) is None
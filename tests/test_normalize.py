@@ -0,0 +1,39 @@
+"""
+Tests for input normalization.
+"""
+
+from dadata.bulk import dedupe, fan_out
+from dadata.normalize import Normalizer
+
+
+def test_normalizer_default():
+    normalizer = Normalizer()
+    assert normalizer("  Москва,  ул.  Сухонская ") == "москва, ул. сухонская"
+    assert normalizer("Ёлкин") == "ёлкин"
+
+
+def test_normalizer_punctuation():
+    normalizer = Normalizer(punctuation=True, yo=True)
+    assert normalizer("Москва, ул. Сухонская, д.11") == "москва ул сухонская д 11"
+    assert normalizer("Ёлкин") == "елкин"
+
+
+def test_normalizer_off():
+    normalizer = Normalizer(case=False, whitespace=False)
+    assert normalizer(" Москва ") == " Москва "
+
+
+def test_dedupe():
+    keys, unique = dedupe(["Сережа", " сережа", "Вася"], Normalizer())
+    assert keys == ["сережа", "сережа", "вася"]
+    assert unique == {"сережа": "Сережа", "вася": "Вася"}
+
+
+def test_fan_out():
+    found = {"сережа": {"source": "Сережа", "result": "Сергей"}, "вася": None}
+    actual = fan_out(["Сережа", " сережа", "Вася"], ["сережа", "сережа", "вася"], found)
+    assert actual == [
+        {"source": "Сережа", "result": "Сергей"},
+        {"source": " сережа", "result": "Сергей"},
+        None,
+    ]
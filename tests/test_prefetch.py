@@ -0,0 +1,45 @@
+"""
+Tests for suggestion prefetch policy.
+"""
+
+import pytest
+from dadata.budget import Budget
+from dadata.prefetch import Prefetch
+
+PARTIES = [
+    {"value": "ПАО СБЕРБАНК", "data": {"inn": "7707083893"}},
+    {"value": "ПАО СБЕРБАНК", "data": {"inn": "7707083893", "kpp": "773643001"}},
+    {"value": "ООО МОТОРИКА", "data": {"inn": "7719402047"}},
+    {"value": "ИП", "data": {}},
+]
+
+
+def test_targets():
+    policy = Prefetch(top=3)
+    assert policy.targets("party", PARTIES) == ["7707083893", "7719402047"]
+    assert policy.targets("address", PARTIES) == []
+    assert Prefetch(top=1).targets("party", PARTIES) == ["7707083893"]
+
+
+def test_unsupported_directory():
+    with pytest.raises(ValueError):
+        Prefetch(directories=["email"])
+
+
+def test_claim_rate():
+    now = [0.0]
+    policy = Prefetch(rate=2, clock=lambda: now[0])
+    assert policy.claim(None, "suggestions")
+    assert policy.claim(None, "suggestions")
+    assert not policy.claim(None, "suggestions")
+    now[0] = 0.5
+    assert policy.claim(None, "suggestions")
+
+
+def test_claim_budget():
+    budget = Budget(daily_limits={"suggestions": 2}, reserve=0, slowdown=0)
+    budget.update(100, {"services": {"suggestions": 0}})
+    policy = Prefetch(rate=100)
+    assert policy.claim(budget, "suggestions")
+    assert policy.claim(budget, "suggestions")
+    assert not policy.claim(budget, "suggestions")
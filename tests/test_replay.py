@@ -0,0 +1,112 @@
+"""
+Tests for traffic recording and replay.
+"""
+
+import gzip
+import json
+import httpx
+import pytest
+from pytest_httpx import HTTPXMock
+from dadata import asynchr, replay, sync
+from dadata.replay import Recorder, StandIn
+
+# let clients reach the stand-in server, mock only upstream API
+pytestmark = pytest.mark.httpx_mock(should_mock=lambda request: request.url.host != "127.0.0.1")
+
+RECORDS = [
+    {
+        "t": 0.0,
+        "service": "suggestions",
+        "method": "POST",
+        "url": "findById/party",
+        "data": {"query": "7707083893", "count": 10},
+        "status": 200,
+        "response": {"suggestions": [{"value": "ПАО СБЕРБАНК"}]},
+        "elapsed": 0.01,
+    },
+    {
+        "t": 0.01,
+        "service": "clean",
+        "method": "POST",
+        "url": "clean/name",
+        "data": ["Сережа"],
+        "status": 200,
+        "response": [{"source": "Сережа", "result": "Сергей"}],
+        "elapsed": 0.01,
+    },
+    {
+        "t": 0.02,
+        "service": "profile",
+        "method": "GET",
+        "url": "profile/balance",
+        "data": {},
+        "status": 200,
+        "response": {"balance": 9922.3},
+        "elapsed": 0.01,
+    },
+    {
+        "t": 0.03,
+        "service": "suggestions",
+        "method": "POST",
+        "url": "suggest/address",
+        "data": {"query": "samara", "count": 10},
+        "status": 500,
+        "response": None,
+        "elapsed": 0.01,
+    },
+]
+
+
+def test_record(tmp_path, httpx_mock: HTTPXMock):
+    httpx_mock.add_response(
+        method="POST",
+        url=f"{sync.SuggestClient.BASE_URL}suggest/address",
+        json={"suggestions": [{"value": "secret-token"}]},
+    )
+    httpx_mock.add_response(
+        method="POST", url=f"{sync.CleanClient.BASE_URL}clean/name", status_code=500
+    )
+    path = tmp_path / "traffic.jsonl.gz"
+    dadata = sync.DadataClient(token="secret-token", secret="secret-key")
+    with Recorder(path) as recorder:
+        recorder.attach(dadata)
+        dadata.suggest(name="address", query="samara")
+        with pytest.raises(httpx.HTTPStatusError):
+            dadata.clean(name="name", source="Сережа")
+    assert b"secret" not in gzip.decompress(path.read_bytes())
+    first, second = replay.load(path)
+    assert first["service"] == "suggestions"
+    assert first["url"] == "suggest/address"
+    assert first["data"] == {"query": "samara", "count": 10}
+    assert first["response"] == {"suggestions": [{"value": "***"}]}
+    assert second["status"] == 500
+    assert second["t"] >= first["t"] + first["elapsed"]
+
+
+@pytest.mark.asyncio
+async def test_replay(tmp_path):
+    path = tmp_path / "traffic.jsonl"
+    path.write_text("\n".join(json.dumps(record) for record in RECORDS))
+    records = replay.load(path)
+    async with StandIn(records) as server:
+        async with asynchr.DadataClient(token="replay", base_url=server.url) as dadata:
+            report = await replay.replay(records, dadata, speed=2)
+            assert await dadata.clean("name", "Сережа") == RECORDS[1]["response"][0]
+    assert report.requests == 4
+    assert report.errors == 1
+    assert report.throughput > 0
+    assert list(report.latency) == ["p50", "p90", "p99", "max"]
+    assert report.latency["max"] >= 0.01
+
+
+@pytest.mark.asyncio
+async def test_stand_in_not_recorded():
+    async with StandIn(RECORDS, latency=0) as server:
+        async with httpx.AsyncClient(base_url=server.url) as client:
+            response = await client.post("suggestions/suggest/party", json={"query": "x"})
+            assert response.status_code == 404
+            # an answer to HEAD carries no body to break the next response
+            response = await client.head("suggestions/")
+            assert response.content == b""
+            response = await client.get("profile/profile/balance")
+            assert response.json() == {"balance": 9922.3}
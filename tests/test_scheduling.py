@@ -0,0 +1,124 @@
+"""
+Tests for priority scheduling.
+"""
+
+import asyncio
+import pytest
+from dadata.deadlines import DeadlineExceeded, deadline
+from dadata.scheduling import (
+    BATCH,
+    INTERACTIVE,
+    Scheduler,
+    SchedulerFull,
+    current_priority,
+    priority,
+)
+
+
+async def hold(scheduler: Scheduler, level: int, order: list, release: asyncio.Event):
+    with priority(level):
+        async with scheduler.slot():
+            order.append(level)
+            await release.wait()
+
+
+def test_priority():
+    assert current_priority() == INTERACTIVE
+    with priority(BATCH):
+        assert current_priority() == BATCH
+    assert current_priority() == INTERACTIVE
+
+
+@pytest.mark.asyncio
+async def test_interactive_first():
+    scheduler = Scheduler(slots=1, reserved=0, batch_share=0)
+    order: list = []
+    release = asyncio.Event()
+    first = asyncio.create_task(hold(scheduler, BATCH, order, release))
+    await asyncio.sleep(0)
+    queued = [asyncio.create_task(hold(scheduler, BATCH, order, release))]
+    queued.append(asyncio.create_task(hold(scheduler, INTERACTIVE, order, release)))
+    await asyncio.sleep(0)
+    assert scheduler.active == 1
+    assert scheduler.queued == 2
+    release.set()
+    await asyncio.gather(first, *queued)
+    assert order == [BATCH, INTERACTIVE, BATCH]
+
+
+@pytest.mark.asyncio
+async def test_reserved():
+    scheduler = Scheduler(slots=2, reserved=1)
+    order: list = []
+    release = asyncio.Event()
+    tasks = [asyncio.create_task(hold(scheduler, BATCH, order, release)) for _ in range(2)]
+    await asyncio.sleep(0)
+    assert scheduler.active == 1
+    tasks.append(asyncio.create_task(hold(scheduler, INTERACTIVE, order, release)))
+    await asyncio.sleep(0)
+    assert scheduler.active == 2
+    release.set()
+    await asyncio.gather(*tasks)
+
+
+@pytest.mark.asyncio
+async def test_batch_share():
+    scheduler = Scheduler(slots=1, reserved=0, batch_share=0.5)
+    order: list = []
+
+    async def run(level):
+        with priority(level):
+            async with scheduler.slot():
+                order.append(level)
+                await asyncio.sleep(0)
+
+    tasks = [asyncio.create_task(run(level)) for level in [INTERACTIVE] * 4 + [BATCH] * 2]
+    await asyncio.gather(*tasks)
+    assert order == [INTERACTIVE, INTERACTIVE, BATCH, INTERACTIVE, BATCH, INTERACTIVE]
+
+
+@pytest.mark.asyncio
+async def test_cancel_queued():
+    scheduler = Scheduler(slots=1)
+    order: list = []
+    release = asyncio.Event()
+    first = asyncio.create_task(hold(scheduler, INTERACTIVE, order, release))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(hold(scheduler, INTERACTIVE, order, release))
+    await asyncio.sleep(0)
+    second.cancel()
+    await asyncio.sleep(0)
+    assert scheduler.queued == 0
+    release.set()
+    await first
+    assert scheduler.active == 0
+
+
+@pytest.mark.asyncio
+async def test_max_queued():
+    scheduler = Scheduler(slots=1, reserved=0, max_queued=1)
+    order: list = []
+    release = asyncio.Event()
+    first = asyncio.create_task(hold(scheduler, INTERACTIVE, order, release))
+    second = asyncio.create_task(hold(scheduler, INTERACTIVE, order, release))
+    await asyncio.sleep(0)
+    with pytest.raises(SchedulerFull):
+        await hold(scheduler, INTERACTIVE, order, release)
+    release.set()
+    await asyncio.gather(first, second)
+    assert scheduler.active == 0
+
+
+@pytest.mark.asyncio
+async def test_deadline_while_queued():
+    scheduler = Scheduler(slots=1, reserved=0)
+    order: list = []
+    release = asyncio.Event()
+    first = asyncio.create_task(hold(scheduler, INTERACTIVE, order, release))
+    await asyncio.sleep(0)
+    with deadline(0.01), pytest.raises(DeadlineExceeded):
+        await hold(scheduler, INTERACTIVE, order, release)
+    assert scheduler.queued == 0
+    release.set()
+    await first
+    assert scheduler.active == 0
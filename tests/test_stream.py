@@ -0,0 +1,60 @@
+"""
+Tests for incremental decoding of JSON responses.
+"""
+
+import json
+import pytest
+from dadata.stream import ItemStream
+
+
+def parse(body: bytes, key=None, size=1):
+    stream = ItemStream(key)
+    items = []
+    for start in range(0, len(body), size):
+        items.extend(stream.feed(body[start : start + size]))
+    stream.close()
+    return items
+
+
+@pytest.mark.parametrize("size", [1, 3, 1000])
+def test_array(size):
+    items = [{"source": 'a"],{', "result": "\\"}, 42, "x,]", None, [1, [2]], {}]
+    body = json.dumps(items, ensure_ascii=False, indent=2).encode()
+    assert parse(body, size=size) == items
+
+
+@pytest.mark.parametrize("size", [1, 3, 1000])
+def test_key(size):
+    suggestions = [{"value": "ООО ЕДАДИЛ", "data": {"inn": "7728237907"}}]
+    response = {"query": "suggestions", "other": [1], "suggestions": suggestions, "tail": [2]}
+    body = json.dumps(response, ensure_ascii=False).encode()
+    assert parse(body, key="suggestions", size=size) == suggestions
+
+
+def test_empty():
+    assert parse(b"[]") == []
+    assert parse(b'{"suggestions": []}', key="suggestions") == []
+
+
+def test_items_as_they_arrive():
+    stream = ItemStream("data")
+    assert stream.feed(b'{"structure": ["AS_IS"], "data": [[{"source": "1"}], [') == [
+        [{"source": "1"}]
+    ]
+    assert stream.feed(b'{"source": "2"}]]}') == [[{"source": "2"}]]
+    assert stream.done
+
+
+def test_memory():
+    stream = ItemStream()
+    stream.feed(b"[")
+    for _ in range(1000):
+        stream.feed(b'{"source": "' + b"x" * 100 + b'"},')
+    assert len(stream._buffer) < 200
+
+
+def test_truncated():
+    stream = ItemStream()
+    stream.feed(b'[{"source": "1"}, {"sou')
+    with pytest.raises(ValueError):
+        stream.close()
@@ -3,10 +3,20 @@ Tests for synchronous Dadata API client.
 """
 
 import datetime as dt
+import gzip
+import json
+import time
 from unittest import mock
 import httpx
 import pytest
-from pytest_httpx import HTTPXMock
+from pytest_httpx import HTTPXMock, IteratorStream
+from dadata.adaptive import AdaptiveConcurrency
+from dadata.budget import Budget, BudgetExhausted
+from dadata.cache import GeoCache, IPCache, ResponseCache, SuggestionCache
+from dadata.deadlines import DeadlineExceeded, deadline
+from dadata.keys import KeyPool, KeyPoolExhausted
+from dadata.prefetch import Prefetch
+from dadata import tracing
 from dadata.sync import CleanClient, DadataClient, ProfileClient, SuggestClient
 
 dadata = DadataClient(token="token", secret="secret")
@@ -32,6 +42,37 @@ def test_init_profile():
     assert profile._client.headers["X-Secret"] == "secret"
 
 
+def test_init_key_pool():
+    cleaner = CleanClient(token=KeyPool([("one", "secret"), "two"]))
+    assert cleaner._clients[0].headers["Authorization"] == "Token one"
+    assert cleaner._clients[0].headers["X-Secret"] == "secret"
+    assert cleaner._clients[1].headers["Authorization"] == "Token two"
+    assert "X-Secret" not in cleaner._clients[1].headers
+
+
+def test_key_pool_failover(httpx_mock: HTTPXMock):
+    url = f"{SuggestClient.BASE_URL}suggest/address"
+    httpx_mock.add_response(method="POST", url=url, status_code=429)
+    httpx_mock.add_response(method="POST", url=url, json={"suggestions": []}, is_reusable=True)
+    dadata = DadataClient(token=KeyPool(["one", "two"]))
+    assert dadata.suggest(name="address", query="samara") == []
+    tokens = [request.headers["Authorization"] for request in httpx_mock.get_requests()]
+    assert tokens == ["Token one", "Token two"]
+    assert dadata.suggest(name="address", query="samara") == []
+    assert httpx_mock.get_requests()[-1].headers["Authorization"] == "Token two"
+
+
+def test_key_pool_cooling_down(httpx_mock: HTTPXMock):
+    url = f"{SuggestClient.BASE_URL}suggest/address"
+    httpx_mock.add_response(method="POST", url=url, status_code=429)
+    dadata = DadataClient(token=KeyPool(["one"]))
+    with pytest.raises(httpx.HTTPStatusError):
+        dadata.suggest(name="address", query="samara")
+    with pytest.raises(KeyPoolExhausted):
+        dadata.suggest(name="address", query="samara")
+    assert len(httpx_mock.get_requests()) == 1
+
+
 def test_timeout(httpx_mock: HTTPXMock):
     httpx_mock.add_response(
         method="POST",
@@ -49,6 +90,96 @@ def test_timeout(httpx_mock: HTTPXMock):
     }
 
 
+def test_compression(httpx_mock: HTTPXMock):
+    httpx_mock.add_response(
+        method="POST", url=f"{CleanClient.BASE_URL}clean/address", json=[], is_reusable=True
+    )
+    dadata = DadataClient(token="token", compression="gzip")
+    dadata.clean(name="address", source="мск сухонская 11 89")
+    dadata.clean(name="address", source="мск сухонская 11 89" * 100)
+    small, large = httpx_mock.get_requests()
+    assert "gzip" in small.headers["Accept-Encoding"]
+    assert "Content-Encoding" not in small.headers
+    assert small.read() == '["мск сухонская 11 89"]'.encode()
+    assert large.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(large.read()).decode() == f'["{"мск сухонская 11 89" * 100}"]'
+
+
+def test_compression_unsupported():
+    with pytest.raises(ValueError):
+        DadataClient(token="token", compression="lzma")
+
+
+def test_warmup(httpx_mock: HTTPXMock):
+    httpx_mock.add_response(method="HEAD", status_code=405, is_reusable=True)
+    client = DadataClient(token="token")
+    client.warmup(connections=2)
+    requests = httpx_mock.get_requests()
+    assert len(requests) == 6
+    assert {request.url.host for request in requests} == {
+        "cleaner.dadata.ru",
+        "suggestions.dadata.ru",
+        "dadata.ru",
+    }
+
+
+def test_keepalive(httpx_mock: HTTPXMock):
+    httpx_mock.add_response(method="HEAD", is_reusable=True)
+    client = SuggestClient(token="token")
+    client.keepalive(interval=0.01)
+    time.sleep(0.1)
+    client.close()
+    count = len(httpx_mock.get_requests())
+    assert count >= 3
+    time.sleep(0.05)
+    assert len(httpx_mock.get_requests()) == count
+
+
+def test_tracing(httpx_mock: HTTPXMock):
+    httpx_mock.add_response(
+        method="POST",
+        url=f"{SuggestClient.BASE_URL}suggest/address",
+        json={"suggestions": []},
+    )
+    with tracing.collect() as timings:
+        dadata.suggest(name="address", query="samara")
+    assert len(timings) == 1
+    assert timings[0].url == "suggest/address"
+    assert timings[0].status_code == 200
+    assert {"encode", "decode"} <= set(timings[0].phases)
+
+
+def test_tracing_error(httpx_mock: HTTPXMock):
+    httpx_mock.add_response(
+        method="POST", url=f"{SuggestClient.BASE_URL}suggest/address", status_code=500
+    )
+    with tracing.collect() as timings:
+        with pytest.raises(httpx.HTTPStatusError):
+            dadata.suggest(name="address", query="samara")
+    assert timings[0].status_code == 500
+
+
+def test_deadline(httpx_mock: HTTPXMock):
+    httpx_mock.add_response(
+        method="POST",
+        url=f"{SuggestClient.BASE_URL}suggest/address",
+        json={"suggestions": []},
+    )
+    with deadline(1):
+        dadata.suggest(name="address", query="samara")
+    timeout = httpx_mock.get_request().extensions["timeout"]
+    assert 0 < timeout["read"] <= 1
+
+
+def test_deadline_exceeded(httpx_mock: HTTPXMock):
+    with deadline(0):
+        with pytest.raises(DeadlineExceeded):
+            dadata.suggest(name="address", query="samara")
+        actual = dadata.find_by_ids(name="party", queries=["7719402047"])
+    assert isinstance(actual.errors["7719402047"], DeadlineExceeded)
+    assert not httpx_mock.get_requests()
+
+
 def test_clean(httpx_mock: HTTPXMock):
     expected = {"source": "Сережа", "result": "Сергей", "qc": 1}
     httpx_mock.add_response(method="POST", url=f"{CleanClient.BASE_URL}clean/name", json=[expected])
@@ -56,6 +187,122 @@ def test_clean(httpx_mock: HTTPXMock):
     assert actual == expected
 
 
+def test_clean_many(httpx_mock: HTTPXMock):
+    expected = {"source": "Сережа", "result": "Сергей", "qc": 1}
+    httpx_mock.add_response(
+        method="POST",
+        url=f"{CleanClient.BASE_URL}clean/name",
+        match_json=["Сережа"],
+        json=[expected],
+    )
+    actual = dadata.clean_many(name="name", sources=["Сережа", "сережа ", "Сережа"])
+    assert actual == [expected, dict(expected, source="сережа "), expected]
+    assert len(httpx_mock.get_requests()) == 1
+
+
+def test_clean_many_error(httpx_mock: HTTPXMock):
+    url = f"{CleanClient.BASE_URL}clean/name"
+    expected = {"source": "Сережа", "result": "Сергей"}
+    httpx_mock.add_response(method="POST", url=url, match_json=["Сережа"], json=[expected])
+    httpx_mock.add_response(method="POST", url=url, match_json=["Вася"], status_code=500)
+    cache = ResponseCache()
+    dadata = DadataClient(token="token", response_cache=cache)
+    with pytest.raises(httpx.HTTPStatusError):
+        dadata.clean_many(name="name", sources=["Сережа", "Вася", "Петя"], concurrency=1)
+    assert len(httpx_mock.get_requests()) == 2
+    assert cache.get("clean", "clean/name", ["Сережа"]) == (True, expected)
+
+
+def test_clean_many_budget(httpx_mock: HTTPXMock):
+    httpx_mock.add_response(
+        method="GET", url=f"{ProfileClient.BASE_URL}profile/balance", json={"balance": 100}
+    )
+    httpx_mock.add_response(
+        method="GET",
+        url=f"{ProfileClient.BASE_URL}stat/daily",
+        json={"services": {"clean": 0}},
+    )
+    httpx_mock.add_response(
+        method="POST",
+        url=f"{CleanClient.BASE_URL}clean/name",
+        match_json=["Сережа"],
+        json=[{"result": "Сергей"}],
+    )
+    httpx_mock.add_response(
+        method="POST",
+        url=f"{CleanClient.BASE_URL}clean/name",
+        match_json=["Вася"],
+        json=[{"result": "Василий"}],
+    )
+    budget = Budget(daily_limits={"clean": 100})
+    dadata = DadataClient(token="token", secret="secret", budget=budget)
+    actual = dadata.clean_many(name="name", sources=["Сережа", "Вася"])
+    assert actual == [{"result": "Сергей"}, {"result": "Василий"}]
+    assert budget.left("clean") == 88 / 90
+
+
+def test_clean_many_budget_gateway(httpx_mock: HTTPXMock):
+    gateway = "http://gateway.local/"
+    httpx_mock.add_response(
+        method="GET", url=f"{gateway}profile/profile/balance", json={"balance": 100}
+    )
+    httpx_mock.add_response(
+        method="GET", url=f"{gateway}profile/stat/daily", json={"services": {"clean": 0}}
+    )
+    httpx_mock.add_response(
+        method="POST", url=f"{gateway}clean/clean/name", json=[{"result": "Сергей"}]
+    )
+    budget = Budget(daily_limits={"clean": 100})
+    dadata = DadataClient(token="unused", budget=budget, base_url=gateway)
+    assert dadata.clean_many(name="name", sources=["Сережа"]) == [{"result": "Сергей"}]
+
+
+def test_clean_many_budget_poll_error(httpx_mock: HTTPXMock):
+    httpx_mock.add_response(
+        method="GET", url=f"{ProfileClient.BASE_URL}profile/balance", status_code=503
+    )
+    httpx_mock.add_response(
+        method="POST", url=f"{CleanClient.BASE_URL}clean/name", json=[{"result": "Сергей"}]
+    )
+    budget = Budget(daily_limits={"clean": 100})
+    dadata = DadataClient(token="token", budget=budget)
+    assert dadata.clean_many(name="name", sources=["Сережа"]) == [{"result": "Сергей"}]
+
+
+def test_clean_many_budget_exhausted(httpx_mock: HTTPXMock):
+    httpx_mock.add_response(
+        method="GET", url=f"{ProfileClient.BASE_URL}profile/balance", json={"balance": 100}
+    )
+    httpx_mock.add_response(
+        method="GET",
+        url=f"{ProfileClient.BASE_URL}stat/daily",
+        json={"services": {"clean": 95}},
+    )
+    budget = Budget(daily_limits={"clean": 100}, wait=False)
+    dadata = DadataClient(token="token", secret="secret", budget=budget)
+    with pytest.raises(BudgetExhausted):
+        dadata.clean_many(name="name", sources=["Сережа"])
+
+
+def test_iter_clean(httpx_mock: HTTPXMock):
+    expected = [{"source": "Сережа", "result": "Сергей"}, {"source": "Маша", "result": "Мария"}]
+    body = json.dumps(expected, ensure_ascii=False).encode()
+    httpx_mock.add_response(
+        method="POST",
+        url=f"{CleanClient.BASE_URL}clean/name",
+        match_json=["Сережа", "Маша"],
+        stream=IteratorStream([body[:20], body[20:]]),
+    )
+    actual = [record for record in dadata.iter_clean(name="name", sources=["Сережа", "Маша"])]
+    assert actual == expected
+
+
+def test_iter_clean_error(httpx_mock: HTTPXMock):
+    httpx_mock.add_response(method="POST", url=f"{CleanClient.BASE_URL}clean/name", status_code=500)
+    with pytest.raises(httpx.HTTPStatusError):
+        [record for record in dadata.iter_clean(name="name", sources=["Сережа"])]
+
+
 def test_clean_record(httpx_mock: HTTPXMock):
     structure = ["AS_IS", "AS_IS", "AS_IS"]
     record = ["1", "2", "3"]
@@ -66,6 +313,18 @@ def test_clean_record(httpx_mock: HTTPXMock):
     assert actual == expected
 
 
+def test_iter_clean_records(httpx_mock: HTTPXMock):
+    structure = ["AS_IS"]
+    expected = [[{"source": "1"}], [{"source": "2"}]]
+    response = {"structure": structure, "data": expected}
+    httpx_mock.add_response(method="POST", url=f"{CleanClient.BASE_URL}clean", json=response)
+    records = dadata.iter_clean_records(structure=structure, records=[["1"], ["2"]])
+    actual = [record for record in records]
+    assert actual == expected
+    request = httpx_mock.get_request()
+    assert json.loads(request.read()) == {"structure": structure, "data": [["1"], ["2"]]}
+
+
 def test_geolocate(httpx_mock: HTTPXMock):
     expected = [
         {"value": "г Москва, ул Сухонская, д 11", "data": {"kladr_id": "7700000000028360004"}}
@@ -102,6 +361,65 @@ def test_geolocate_not_found(httpx_mock: HTTPXMock):
     assert actual == expected
 
 
+def test_geolocate_cached(httpx_mock: HTTPXMock):
+    expected = [
+        {
+            "value": "г Москва, ул Сухонская, д 11",
+            "data": {"geo_lat": "55.878", "geo_lon": "37.653"},
+        }
+    ]
+    httpx_mock.add_response(
+        method="POST",
+        url=f"{SuggestClient.BASE_URL}geolocate/address",
+        json={"suggestions": expected},
+    )
+    dadata = DadataClient(token="token", geo_cache=GeoCache())
+    assert dadata.geolocate(name="address", lat=55.878, lon=37.653) == expected
+    assert dadata.geolocate(name="address", lat=55.8781, lon=37.653, radius_meters=50) == expected
+    assert len(httpx_mock.get_requests()) == 1
+
+
+def test_geolocate_many(httpx_mock: HTTPXMock):
+    expected = [
+        {
+            "value": "г Москва, ул Сухонская, д 11",
+            "data": {"geo_lat": "55.878", "geo_lon": "37.653"},
+        }
+    ]
+    httpx_mock.add_response(
+        method="POST",
+        url=f"{SuggestClient.BASE_URL}geolocate/address",
+        json={"suggestions": expected},
+    )
+    points = [(55.878, 37.653), (55.8781, 37.6531), (55.878, 37.653)]
+    actual = dadata.geolocate_many(name="address", points=points, spread_meters=50)
+    assert actual == [expected, expected, expected]
+    request = httpx_mock.get_request()
+    assert request.read() == b'{"lat":55.878,"lon":37.653,"radius_meters":150}'
+
+
+def test_geolocate_many_truncated(httpx_mock: HTTPXMock):
+    near = {
+        "value": "г Москва, ул Сухонская, д 11",
+        "data": {"geo_lat": "55.878", "geo_lon": "37.653"},
+    }
+    far = {
+        "value": "г Москва, ул Сухонская, д 13",
+        "data": {"geo_lat": "55.8785", "geo_lon": "37.6545"},
+    }
+    httpx_mock.add_response(
+        method="POST",
+        url=f"{SuggestClient.BASE_URL}geolocate/address",
+        json={"suggestions": [near, far]},
+        is_reusable=True,
+    )
+    points = [(55.878, 37.653), (55.8781, 37.6531)]
+    actual = dadata.geolocate_many(name="address", points=points, spread_meters=50, count=2)
+    assert actual == [[near], [near, far]]
+    radii = [json.loads(request.read())["radius_meters"] for request in httpx_mock.get_requests()]
+    assert radii == [150, 150]
+
+
 def test_iplocate(httpx_mock: HTTPXMock):
     expected = {"value": "г Москва", "data": {"kladr_id": "7700000000000"}}
     httpx_mock.add_response(
@@ -123,6 +441,19 @@ def test_iplocate_not_found(httpx_mock: HTTPXMock):
     assert actual is None
 
 
+def test_iplocate_cached(httpx_mock: HTTPXMock):
+    expected = {"value": "г Москва", "data": {"kladr_id": "7700000000000"}}
+    httpx_mock.add_response(
+        method="GET",
+        url=f"{SuggestClient.BASE_URL}iplocate/address?ip=212.45.30.108",
+        json={"location": expected},
+    )
+    dadata = DadataClient(token="token", ip_cache=IPCache())
+    assert dadata.iplocate("212.45.30.108") == expected
+    assert dadata.iplocate("212.45.30.7") == expected
+    assert len(httpx_mock.get_requests()) == 1
+
+
 def test_suggest(httpx_mock: HTTPXMock):
     expected = [
         {"value": "г Москва, ул Сухонская", "data": {"kladr_id": "77000000000283600"}},
@@ -149,6 +480,19 @@ def test_suggest_request(httpx_mock: HTTPXMock):
     assert request.read() == body
 
 
+def test_suggest_cached(httpx_mock: HTTPXMock):
+    expected = [{"value": "г Москва, ул Сухонская", "data": {"kladr_id": "77000000000283600"}}]
+    httpx_mock.add_response(
+        method="POST",
+        url=f"{SuggestClient.BASE_URL}suggest/address",
+        json={"suggestions": expected},
+    )
+    dadata = DadataClient(token="token", suggestion_cache=SuggestionCache())
+    assert dadata.suggest(name="address", query="москва сух") == expected
+    assert dadata.suggest(name="address", query="москва сухонская") == expected
+    assert len(httpx_mock.get_requests()) == 1
+
+
 def test_suggest_not_found(httpx_mock: HTTPXMock):
     expected = []
     httpx_mock.add_response(
@@ -169,6 +513,97 @@ def test_find_by_id(httpx_mock: HTTPXMock):
     assert actual == expected
 
 
+def test_find_by_id_cached(httpx_mock: HTTPXMock):
+    expected = [{"value": "ООО МОТОРИКА", "data": {"inn": "7719402047"}}]
+    httpx_mock.add_response(
+        method="POST", url=f"{SuggestClient.BASE_URL}findById/party", json={"suggestions": expected}
+    )
+    dadata = DadataClient(token="token", response_cache=ResponseCache())
+    assert dadata.find_by_id(name="party", query="7719402047") == expected
+    assert dadata.find_by_id(name="party", query="7719402047") == expected
+    assert len(httpx_mock.get_requests()) == 1
+
+
+def test_clean_cached(httpx_mock: HTTPXMock):
+    expected = {"source": "Сережа", "result": "Сергей", "qc": 1}
+    httpx_mock.add_response(method="POST", url=f"{CleanClient.BASE_URL}clean/name", json=[expected])
+    dadata = DadataClient(token="token", response_cache=ResponseCache())
+    assert dadata.clean(name="name", source="Сережа") == expected
+    assert dadata.clean(name="name", source="Сережа") == expected
+    assert len(httpx_mock.get_requests()) == 1
+
+
+def test_suggest_prefetch(httpx_mock: HTTPXMock):
+    party = {"value": "ООО МОТОРИКА", "data": {"inn": "7719402047"}}
+    httpx_mock.add_response(
+        method="POST",
+        url=f"{SuggestClient.BASE_URL}suggest/party",
+        json={"suggestions": [party]},
+    )
+    httpx_mock.add_response(
+        method="POST",
+        url=f"{SuggestClient.BASE_URL}findById/party",
+        match_json={"query": "7719402047", "count": 10},
+        json={"suggestions": [party]},
+    )
+    dadata = DadataClient(token="token", response_cache=ResponseCache(), prefetch=Prefetch())
+    assert dadata.suggest(name="party", query="моторика") == [party]
+    dadata._suggestions._prefetcher.shutdown(wait=True)
+    assert dadata.find_by_id(name="party", query="7719402047") == [party]
+    assert len(httpx_mock.get_requests()) == 2
+
+
+def test_clean_many_cached(httpx_mock: HTTPXMock):
+    cache = ResponseCache()
+    cache.put("clean", "clean/name", ["Сережа"], {"source": "Сережа", "result": "Сергей"})
+    httpx_mock.add_response(
+        method="POST",
+        url=f"{CleanClient.BASE_URL}clean/name",
+        json=[{"source": "Вася", "result": "Василий"}],
+    )
+    dadata = DadataClient(token="token", response_cache=cache)
+    actual = dadata.clean_many(name="name", sources=["Сережа", "Вася"])
+    assert [record["result"] for record in actual] == ["Сергей", "Василий"]
+    assert len(httpx_mock.get_requests()) == 1
+    assert cache.get("clean", "clean/name", ["Вася"])[0]
+
+
+def test_find_by_ids_cached(httpx_mock: HTTPXMock):
+    party = {"value": "ООО МОТОРИКА", "data": {"inn": "7719402047"}}
+    cache = ResponseCache()
+    cache.put("suggestions", "findById/party", {"query": "7719402047", "count": 10}, [party])
+    httpx_mock.add_response(
+        method="POST",
+        url=f"{SuggestClient.BASE_URL}findById/party",
+        match_json={"query": "1234567890", "count": 10},
+        json={"suggestions": []},
+    )
+    dadata = DadataClient(token="token", response_cache=cache)
+    actual = dadata.find_by_ids(name="party", queries=["7719402047", "1234567890"])
+    assert actual.results == [[party], []]
+    assert len(httpx_mock.get_requests()) == 1
+    assert cache.get("suggestions", "findById/party", {"query": "1234567890", "count": 10}) == (
+        True,
+        [],
+    )
+
+
+def test_watch_versions(httpx_mock: HTTPXMock):
+    old = {"suggestions": {"resources": {"ЕГРЮЛ": "13.01.2017"}}}
+    new = {"suggestions": {"resources": {"ЕГРЮЛ": "14.01.2017"}}}
+    httpx_mock.add_response(method="GET", url=f"{ProfileClient.BASE_URL}version", json=old)
+    httpx_mock.add_response(
+        method="GET", url=f"{ProfileClient.BASE_URL}version", json=new, is_reusable=True
+    )
+    cache = ResponseCache()
+    client = DadataClient(token="token", response_cache=cache)
+    client.watch_versions(interval=0.01)
+    cache.put("suggestions", "findById/party", "7707083893", [])
+    time.sleep(0.1)
+    client.close()
+    assert cache.get("suggestions", "findById/party", "7707083893") == (False, None)
+
+
 def test_find_by_id_request(httpx_mock: HTTPXMock):
     httpx_mock.add_response(
         method="POST",
@@ -190,6 +625,123 @@ def test_find_by_id_not_found(httpx_mock: HTTPXMock):
     assert actual == expected
 
 
+def test_find_by_ids(httpx_mock: HTTPXMock):
+    party = {"value": "ООО МОТОРИКА", "data": {"inn": "7719402047"}}
+    url = f"{SuggestClient.BASE_URL}findById/party"
+    httpx_mock.add_response(
+        method="POST",
+        url=url,
+        match_json={"query": "7719402047", "count": 10},
+        json={"suggestions": [party]},
+    )
+    httpx_mock.add_response(
+        method="POST",
+        url=url,
+        match_json={"query": "1234567890", "count": 10},
+        json={"suggestions": []},
+    )
+    httpx_mock.add_response(
+        method="POST", url=url, match_json={"query": "0000000000", "count": 10}, status_code=500
+    )
+    queries = ["7719402047", "1234567890", "7719402047", "0000000000"]
+    actual = dadata.find_by_ids(name="party", queries=queries)
+    assert actual.results == [[party], [], [party], None]
+    assert actual.not_found == ["1234567890"]
+    assert list(actual.errors) == ["0000000000"]
+    assert actual.affiliated == {}
+    assert len(httpx_mock.get_requests()) == 3
+
+
+def test_find_by_ids_adaptive(httpx_mock: HTTPXMock):
+    url = f"{SuggestClient.BASE_URL}findById/party"
+    httpx_mock.add_response(
+        method="POST",
+        url=url,
+        match_json={"query": "7719402047", "count": 10},
+        json={"suggestions": []},
+        is_reusable=True,
+    )
+    httpx_mock.add_response(
+        method="POST", url=url, match_json={"query": "0000000000", "count": 10}, status_code=503
+    )
+    changes = []
+    adaptive = AdaptiveConcurrency(initial=10, on_change=lambda *change: changes.append(change))
+    dadata = DadataClient(token="token", adaptive=adaptive)
+    actual = dadata.find_by_ids(name="party", queries=["7719402047", "0000000000"])
+    assert list(actual.errors) == ["0000000000"]
+    assert adaptive.limits == {"suggestions.dadata.ru": 7}
+    assert changes == [("suggestions.dadata.ru", 7)]
+    # single calls are not limited
+    dadata.find_by_id(name="party", query="7719402047")
+    assert adaptive.host("suggestions.dadata.ru").inflight == 0
+    assert len(changes) == 1
+
+
+def test_find_by_ids_affiliated(httpx_mock: HTTPXMock):
+    party = {"value": "ООО ЯНДЕКС", "data": {"inn": "7736207543"}}
+    related = [{"value": "ООО ЕДАДИЛ", "data": {"inn": "7728237907"}}]
+    httpx_mock.add_response(
+        method="POST",
+        url=f"{SuggestClient.BASE_URL}findById/party",
+        json={"suggestions": [party]},
+    )
+    httpx_mock.add_response(
+        method="POST",
+        url=f"{SuggestClient.BASE_URL}findAffiliated/party",
+        json={"suggestions": related},
+    )
+    actual = dadata.find_by_ids(name="party", queries=["7736207543"], affiliated=True)
+    assert actual.results == [[party]]
+    assert actual.affiliated == {"7736207543": related}
+
+
+def test_find_by_ids_budget_exhausted(httpx_mock: HTTPXMock):
+    party = {"value": "ООО МОТОРИКА", "data": {"inn": "7719402047"}}
+    httpx_mock.add_response(
+        method="GET", url=f"{ProfileClient.BASE_URL}profile/balance", json={"balance": 100}
+    )
+    httpx_mock.add_response(
+        method="GET",
+        url=f"{ProfileClient.BASE_URL}stat/daily",
+        json={"services": {"suggestions": 89}},
+    )
+    httpx_mock.add_response(
+        method="POST",
+        url=f"{SuggestClient.BASE_URL}findById/party",
+        json={"suggestions": [party]},
+    )
+    cache = ResponseCache()
+    budget = Budget(daily_limits={"suggestions": 100}, wait=False)
+    dadata = DadataClient(token="token", budget=budget, response_cache=cache)
+    queries = ["7719402047", "7736207543", "7707083893"]
+    with pytest.raises(BudgetExhausted):
+        dadata.find_by_ids(name="party", queries=queries, concurrency=1)
+    assert len(httpx_mock.get_requests(method="POST")) == 1
+    data = {"query": "7719402047", "count": 10}
+    assert cache.get("suggestions", "findById/party", data) == (True, [party])
+
+
+def test_find_by_ids_affiliated_error(httpx_mock: HTTPXMock):
+    party = {"value": "ООО ЯНДЕКС", "data": {"inn": "7736207543"}}
+    httpx_mock.add_response(
+        method="POST",
+        url=f"{SuggestClient.BASE_URL}findById/party",
+        json={"suggestions": [party]},
+    )
+    httpx_mock.add_response(
+        method="POST", url=f"{SuggestClient.BASE_URL}findAffiliated/party", status_code=500
+    )
+    actual = dadata.find_by_ids(name="party", queries=["7736207543"], affiliated=True)
+    assert actual.results == [[party]]
+    assert actual.errors == {}
+    assert list(actual.affiliated_errors) == ["7736207543"]
+
+
+def test_find_by_ids_affiliated_not_party():
+    with pytest.raises(ValueError):
+        dadata.find_by_ids(name="bank", queries=["044525225"], affiliated=True)
+
+
 def test_find_by_email(httpx_mock: HTTPXMock):
     expected = [{"value": "info@dadata.ru", "data": {"company": {"inn": "7721581040"}}}]
     httpx_mock.add_response(
@@ -238,6 +790,21 @@ def test_find_affiliated(httpx_mock: HTTPXMock):
     assert actual == expected
 
 
+def test_iter_affiliated(httpx_mock: HTTPXMock):
+    expected = [
+        {"value": "ООО ДЗЕН.ПЛАТФОРМА", "data": {"inn": "7704431373"}},
+        {"value": "ООО ЕДАДИЛ", "data": {"inn": "7728237907"}},
+    ]
+    body = json.dumps({"suggestions": expected}, ensure_ascii=False).encode()
+    httpx_mock.add_response(
+        method="POST",
+        url=f"{SuggestClient.BASE_URL}findAffiliated/party",
+        stream=IteratorStream([body[i : i + 7] for i in range(0, len(body), 7)]),
+    )
+    actual = [party for party in dadata.iter_affiliated("7736207543")]
+    assert actual == expected
+
+
 def test_find_affiliated_request(httpx_mock: HTTPXMock):
     httpx_mock.add_response(
         method="POST",
@@ -0,0 +1,42 @@
+"""
+Tests for per-request phase timings.
+"""
+
+from dadata import tracing
+
+
+def test_start_disabled():
+    assert tracing.start("POST", "suggest/address") is None
+
+
+def test_trace_events():
+    with tracing.collect() as timings:
+        timing = tracing.start("POST", "suggest/address")
+        with timing.phase("encode"):
+            pass
+        for event in (
+            "connection.connect_tcp",
+            "connection.start_tls",
+            "http11.send_request_headers",
+            "http11.send_request_body",
+            "http11.receive_response_headers",
+            "http11.receive_response_body",
+        ):
+            timing.trace(event + ".started", {})
+            timing.trace(event + ".complete", {})
+        timing.trace("http11.response_closed.started", {})
+        timing.finish(200)
+    assert timings == [timing]
+    assert list(timing.phases) == ["encode", "connect", "tls", "send", "wait", "receive"]
+    assert timing.status_code == 200
+    assert timing.total >= sum(timing.phases.values())
+
+
+def test_trace_nested():
+    outer, inner = [], []
+    with tracing.trace(outer.append):
+        with tracing.trace(inner.append):
+            tracing.start("GET", "profile/balance").finish(200)
+        tracing.start("GET", "stat/daily").finish(200)
+    assert [timing.url for timing in inner] == ["profile/balance"]
+    assert [timing.url for timing in outer] == ["stat/daily"]
@@ -0,0 +1,47 @@
+"""
+Tests for cache invalidation on dataset updates.
+"""
+
+from dadata.cache import ResponseCache
+from dadata.versions import VersionTracker, changes
+
+
+def versions(egrul="13.01.2017", fias="30.01.2017", passports="30.01.2017"):
+    return {
+        "dadata": {"version": "17.1 (5995:3d7b54a78838)"},
+        "suggestions": {
+            "version": "16.10 (5a2e47f29553)",
+            "resources": {"ЕГРЮЛ": egrul, "ФИАС": fias},
+        },
+        "factor": {
+            "version": "8.0 (90780)",
+            "resources": {"ФИАС": fias, "Паспорта": passports},
+        },
+    }
+
+
+def test_changes_none():
+    assert changes(versions(), versions()) == {}
+
+
+def test_changes_known():
+    assert changes(versions(), versions(egrul="14.01.2017")) == {
+        "suggestions": {"party", "company"}
+    }
+
+
+def test_changes_unknown():
+    assert changes(versions(), versions(passports="14.01.2017")) == {"clean": None}
+
+
+def test_tracker():
+    cache = ResponseCache()
+    tracker = VersionTracker([cache, None, cache])
+    tracker.update(versions())
+    cache.put("suggestions", "findById/party", "7707083893", [])
+    cache.put("suggestions", "findById/address", "7700000000000", [])
+    tracker.update(versions())
+    assert cache.get("suggestions", "findById/party", "7707083893")[0]
+    tracker.update(versions(egrul="14.01.2017"))
+    assert cache.get("suggestions", "findById/party", "7707083893") == (False, None)
+    assert cache.get("suggestions", "findById/address", "7700000000000")[0]